@@ -39,6 +39,8 @@ def _create_or_update_table_definition(spec):
         db_aggregation_spec.end_column = spec.time_aggregation.end_column
         db_aggregation_spec.save()
         table_definition.time_aggregation = db_aggregation_spec
+    # the definition may have changed, so the next run needs to populate everything
+    table_definition.aggregation_checkpoint = None
     table_definition.save()
     return table_definition
 
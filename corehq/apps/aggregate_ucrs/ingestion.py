@@ -3,39 +3,71 @@ This module deals with data ingestion: populating the aggregate tables from othe
 """
 from __future__ import absolute_import, unicode_literals
 from collections import namedtuple
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import sqlalchemy
 from sqlalchemy.dialects.postgresql import insert
 
 from corehq.apps.aggregate_ucrs.aggregations import AGG_WINDOW_START_PARAM, AGG_WINDOW_END_PARAM, \
     TimePeriodAggregationWindow, get_time_period_class
+from corehq.apps.aggregate_ucrs.models import AggregateTableDefinition
 from corehq.apps.userreports.util import get_indicator_adapter
 
 AggregationParam = namedtuple('AggregationParam', 'name value mapped_column_id')
 AggregationWindow = namedtuple('AggregationWindow', 'start end')
 
+# UCR rows are timestamped before they are committed, so rows saved just before
+# a checkpoint may only become visible after it. Re-aggregating anything inserted
+# shortly before the checkpoint makes sure those rows aren't missed.
+CHECKPOINT_OVERLAP = timedelta(minutes=5)
+INSERTED_AT_COLUMN = 'inserted_at'
+
 
 def populate_aggregate_table_data(aggregate_table_adapter):
     """
-    Seeds the database table with all data from the table adapter.
+    Populates the aggregate table from its data sources.
+
+    The first run (and the first run after a rebuild) aggregates everything.
+    Later runs only re-aggregate the rows and time windows affected by
+    source rows inserted or modified since the last successful run.
     """
     aggregate_table_definition = aggregate_table_adapter.config
-    # get checkpoint
+    next_checkpoint = datetime.utcnow()
     last_update = get_last_aggregate_checkpoint(aggregate_table_definition)
     for window in get_time_aggregation_windows(aggregate_table_definition, last_update):
         populate_aggregate_table_data_for_time_period(
-            aggregate_table_adapter, window,
+            aggregate_table_adapter, window, last_update,
         )
+    set_aggregate_checkpoint(aggregate_table_definition, next_checkpoint)
 
 
 def get_last_aggregate_checkpoint(aggregate_table_definition):
     """
     Checkpoints indicate the last time the aggregation script successfully ran.
-    Will be used to do partial ingestion.
+    Source rows inserted after the returned time need to be re-aggregated.
+    Returns None if the table has never been populated.
     """
-    # todo
-    return None
+    checkpoint = AggregateTableDefinition.objects.filter(
+        id=aggregate_table_definition.id
+    ).values_list('aggregation_checkpoint', flat=True).first()
+    if checkpoint is None:
+        return None
+    return checkpoint - CHECKPOINT_OVERLAP
+
+
+def set_aggregate_checkpoint(aggregate_table_definition, checkpoint):
+    # update rather than save to avoid clobbering other changes to the definition
+    AggregateTableDefinition.objects.filter(
+        id=aggregate_table_definition.id
+    ).update(aggregation_checkpoint=checkpoint)
+    aggregate_table_definition.aggregation_checkpoint = checkpoint
+
+
+def reset_aggregate_checkpoint(aggregate_table_definition):
+    """
+    Makes the next run populate the whole table, e.g. after the table was rebuilt.
+    """
+    set_aggregate_checkpoint(aggregate_table_definition, None)
 
 
 def get_time_aggregation_windows(aggregate_table_definition, last_update):
@@ -44,6 +76,9 @@ def get_time_aggregation_windows(aggregate_table_definition, last_update):
         yield None
     else:
         start_time = get_aggregation_start_period(aggregate_table_definition, last_update)
+        if start_time is None:
+            # no source rows have changed since the last update
+            return
         end_time = get_aggregation_end_period(aggregate_table_definition, last_update)
         period_class = get_time_period_class(aggregate_table_definition.time_aggregation.aggregation_unit)
         current_window = TimePeriodAggregationWindow(period_class, start_time)
@@ -93,13 +128,36 @@ def _get_aggregation_from_primary_table(aggregate_table_definition, column_id, s
         primary_table = primary_data_source_adapter.get_table()
         aggregation_sql_column = primary_table.c[column_id]
         query = session.query(sqlalchemy_agg_fn(aggregation_sql_column))
+        if last_update is not None:
+            query = query.filter(
+                _get_changed_since_filter(aggregate_table_definition, primary_table, last_update)
+            )
         return session.execute(query).scalar()
 
 
-def populate_aggregate_table_data_for_time_period(aggregate_table_adapter, window):
+def _get_changed_since_filter(aggregate_table_definition, primary_table, last_update):
+    """
+    Filter matching the primary table rows whose aggregated values may have changed
+    since last_update: rows that were saved since then and rows that are joined to
+    secondary table rows that were saved since then.
+    """
+    conditions = [primary_table.c[INSERTED_AT_COLUMN] >= last_update]
+    for secondary_table in aggregate_table_definition.secondary_tables.all():
+        sqlalchemy_secondary_table = get_indicator_adapter(secondary_table.data_source).get_table()
+        changed_join_values = sqlalchemy.select([
+            sqlalchemy_secondary_table.c[secondary_table.join_column_secondary]
+        ]).where(sqlalchemy_secondary_table.c[INSERTED_AT_COLUMN] >= last_update)
+        conditions.append(primary_table.c[secondary_table.join_column_primary].in_(changed_join_values))
+    return sqlalchemy.or_(*conditions)
+
+
+def populate_aggregate_table_data_for_time_period(aggregate_table_adapter, window, last_update=None):
     """
     For a given period (start/end) - populate all data in the aggregate table associated
     with that period.
+
+    If last_update is passed, only rows for primary keys affected by source rows
+    changed since then are populated.
     """
     doing_time_aggregation = window is not None
     if doing_time_aggregation:
@@ -156,6 +214,10 @@ def populate_aggregate_table_data_for_time_period(aggregate_table_adapter, windo
         select_statement = select_statement.where(
             sqlalchemy.or_(primary_table.c[window.end.mapped_column_id] == None,  # noqa this is sqlalchemy
                            primary_table.c[window.end.mapped_column_id] >= window.start.value))
+    if last_update is not None:
+        select_statement = select_statement.where(
+            _get_changed_since_filter(aggregate_table_adapter.config, primary_table, last_update)
+        )
 
     for primary_column_adapter in primary_column_adapters:
         if primary_column_adapter.is_groupable():
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from __future__ import absolute_import
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aggregate_ucrs', '0002_auto_20180827_1148'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aggregatetabledefinition',
+            name='aggregation_checkpoint',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
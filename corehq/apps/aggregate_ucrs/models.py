@@ -63,6 +63,10 @@ class AggregateTableDefinition(models.Model, AbstractUCRDataSource):
     time_aggregation = models.OneToOneField(TimeAggregationDefinition, null=True, blank=True,
                                             on_delete=models.CASCADE)
 
+    # when the table was last successfully populated. source rows inserted after
+    # this are re-aggregated on the next run. None means the table needs a full populate.
+    aggregation_checkpoint = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         unique_together = ('domain', 'table_id')
 
@@ -3,9 +3,10 @@ from __future__ import unicode_literals
 
 import uuid
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.test import TestCase
+from mock import patch
 from sqlalchemy import Date, Integer, SmallInteger, UnicodeText
 
 from casexml.apps.case.mock import CaseBlock
@@ -14,7 +15,7 @@ from casexml.apps.case.util import post_case_blocks
 from corehq.apps.aggregate_ucrs.aggregations import AGGREGATION_UNIT_CHOICE_WEEK
 from corehq.apps.aggregate_ucrs.importer import import_aggregation_models_from_spec
 from corehq.apps.aggregate_ucrs.ingestion import populate_aggregate_table_data, get_aggregation_start_period, \
-    get_aggregation_end_period
+    get_aggregation_end_period, get_last_aggregate_checkpoint, reset_aggregate_checkpoint
 from corehq.apps.aggregate_ucrs.models import AggregateTableDefinition
 from corehq.apps.aggregate_ucrs.tests.base import AggregationBaseTestMixin
 from corehq.apps.app_manager.tests.app_factory import AppFactory
@@ -270,6 +271,37 @@ class UCRAggregationTest(TestCase, AggregationBaseTestMixin):
         populate_aggregate_table_data(aggregate_table_adapter)
         self._check_basic_results()
 
+    # the source rows were only just inserted, so don't re-aggregate rows
+    # from shortly before the checkpoint
+    @patch('corehq.apps.aggregate_ucrs.ingestion.CHECKPOINT_OVERLAP', timedelta(0))
+    def test_incremental_aggregation(self):
+        aggregate_table_adapter = get_indicator_adapter(self.basic_aggregate_table_definition)
+        aggregate_table_adapter.rebuild_table()
+        populate_aggregate_table_data(aggregate_table_adapter)
+        self.assertIsNotNone(get_last_aggregate_checkpoint(self.basic_aggregate_table_definition))
+
+        aggregate_table = aggregate_table_adapter.get_table()
+        aggregate_query = aggregate_table_adapter.get_query_object()
+        with aggregate_table_adapter.session_helper.session_context() as session:
+            session.execute(aggregate_table.delete())
+
+        # nothing has changed in the data sources since the last run
+        populate_aggregate_table_data(aggregate_table_adapter)
+        self.assertEqual(0, aggregate_query.count())
+
+        # only the rows affected by a new form are aggregated again
+        form_table = self.form_adapter.get_table()
+        with self.form_adapter.session_helper.session_context() as session:
+            session.execute(form_table.update().values(inserted_at=datetime.utcnow()))
+        populate_aggregate_table_data(aggregate_table_adapter)
+        self.assertEqual(1, aggregate_query.count())
+        self._check_basic_results()
+
+        # and everything is aggregated again after a reset
+        reset_aggregate_checkpoint(self.basic_aggregate_table_definition)
+        populate_aggregate_table_data(aggregate_table_adapter)
+        self.assertEqual(2, aggregate_query.count())
+
     def _check_basic_results(self):
         aggregate_table_adapter = get_indicator_adapter(self.basic_aggregate_table_definition)
         aggregate_table = aggregate_table_adapter.get_table()
@@ -8,6 +8,7 @@ from django.utils.decorators import method_decorator
 from django.utils.translation import ugettext_lazy
 
 from corehq import toggles
+from corehq.apps.aggregate_ucrs.ingestion import reset_aggregate_checkpoint
 from corehq.apps.aggregate_ucrs.models import AggregateTableDefinition
 from corehq.apps.aggregate_ucrs.tasks import populate_aggregate_table_data_task
 from corehq.apps.domain.decorators import login_and_domain_required, login_or_basic
@@ -90,6 +91,7 @@ def rebuild_aggregate_ucr(request, domain, table_id):
     )
     aggregate_table_adapter = get_indicator_adapter(table_definition)
     aggregate_table_adapter.rebuild_table()
+    reset_aggregate_checkpoint(table_definition)
     populate_aggregate_table_data_task.delay(table_definition.id)
     messages.success(request, 'Table rebuild successfully started.')
     return HttpResponseRedirect(reverse(AggregateUCRView.urlname, args=[domain, table_id]))
@@ -0,0 +1,96 @@
+"""
+Hashes of the inputs of generated build files
+
+When a build generates a file that depends only on the app and on inputs
+that can be hashed, it records a hash of those inputs in
+``build_file_hashes``, keyed by the path of the file. The next build can
+then copy the file from the previous build, rather than generate it
+again, if it computes the same hash for it.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import importlib
+import inspect
+import json
+
+import six
+from memoized import memoized
+
+# Bump this when generated files change for reasons that aren't part of
+# their inputs or of the code in _FORM_FILE_CODE_MODULES (e.g. a library
+# upgrade), so that files from earlier builds aren't reused
+BUILD_FILE_HASH_VERSION = 1
+
+# Modules with the code that renders form files. The hash of their source
+# is part of every form file hash, so that a deploy that changes them stops
+# files rendered by the previous code from being reused.
+_FORM_FILE_CODE_MODULES = [
+    'corehq.apps.app_manager.const',
+    'corehq.apps.app_manager.models',
+    'corehq.apps.app_manager.suite_xml.post_process.instances',
+    'corehq.apps.app_manager.xform',
+    'corehq.apps.app_manager.xpath',
+]
+
+# Properties that differ between builds of the same app without changing
+# the files that are generated from it
+_BUILD_PROPERTIES = {
+    '_id', '_rev', '_attachments', 'external_blobs', 'copy_of', 'version',
+    'built_on', 'built_with', 'build_signed', 'build_comment', 'comment_from',
+    'build_broken', 'build_broken_reason', 'is_released', 'is_auto_generated',
+    'date_created', 'last_modified', 'build_file_hashes', 'has_submissions',
+    'short_url', 'short_odk_url', 'short_odk_media_url', 'recipients',
+}
+_FORM_BUILD_PROPERTIES = {'version', 'validation_cache'}
+_MEDIA_BUILD_PROPERTIES = {'version', 'unique_id'}
+
+
+def get_app_hash(app):
+    """Hash of the app doc, excluding build bookkeeping and form and media versions"""
+    app_json = {
+        key: value for key, value in six.iteritems(app.to_json())
+        if key not in _BUILD_PROPERTIES
+    }
+    app_json['modules'] = [
+        dict(module, forms=[
+            _without_keys(form, _FORM_BUILD_PROPERTIES) for form in module.get('forms', [])
+        ])
+        for module in app_json.get('modules', [])
+    ]
+    app_json['multimedia_map'] = {
+        path: _without_keys(item, _MEDIA_BUILD_PROPERTIES)
+        for path, item in six.iteritems(app_json.get('multimedia_map') or {})
+    }
+    return _hash(app_json)
+
+
+def get_form_file_hash(app_hash, form, build_profile_id=None):
+    """Hash of everything the rendered XML of form depends on"""
+    return _hash({
+        'hash_version': BUILD_FILE_HASH_VERSION,
+        'code': get_form_file_code_hash(),
+        'app': app_hash,
+        'form': form.unique_id,
+        'form_version': form.get_version(),
+        'source': form.source,
+        'build_profile_id': build_profile_id,
+    })
+
+
+@memoized
+def get_form_file_code_hash():
+    """Hash of the source of the code that renders form files"""
+    sha = hashlib.sha1()
+    for name in _FORM_FILE_CODE_MODULES:
+        sha.update(inspect.getsource(importlib.import_module(name)).encode('utf-8'))
+    return sha.hexdigest()
+
+
+def _without_keys(value, keys):
+    return {key: item for key, item in six.iteritems(value) if key not in keys}
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
@@ -1,12 +1,16 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
+import json
 from collections import namedtuple
 from itertools import chain
 
 from couchdbkit.exceptions import DocTypeError, ResourceNotFound
 
+from corehq.util.cache_utils import SizedLRUCache
+from corehq.util.datadog.gauges import datadog_counter
 from corehq.util.python_compatibility import soft_assert_type_text
 from corehq.util.quickcache import quickcache
+from django.conf import settings
 from django.http import Http404
 from django.core.cache import cache
 
@@ -148,22 +152,57 @@ def get_current_app(domain, app_id):
     return wrap_app(get_current_app_doc(domain, app_id))
 
 
+APP_BUILD_CACHE_TIMEOUT = 24 * 3600
+
+# wrapped app builds, keyed by build id, shared by the phone api calls
+# served by this process
+_app_build_lru = SizedLRUCache(settings.APP_BUILD_CACHE_MAX_SIZE, timeout=APP_BUILD_CACHE_TIMEOUT)
+
+
 def get_app_cached(domain, app_id):
     """Cached version of ``get_app`` for use in phone
     api calls where most requests will be for app builds
     which are read-only.
 
+    Builds are kept in memory by each process, in front of the
+    django cache. Callers share the returned object, so they
+    must not change it.
+
     This only caches app builds."""
-    key = 'app_build_cache_{}_{}'.format(domain, app_id)
-    app = cache.get(key)
-    if not app:
+    app = _app_build_lru.get(app_id)
+    if app is not None and app.domain == domain:
+        datadog_counter('commcare.app_build_cache.local.hit')
+        return app
+    datadog_counter('commcare.app_build_cache.local.miss')
+
+    key = 'app_build_and_size_{}_{}'.format(domain, app_id)
+    cached = cache.get(key)
+    if cached:
+        app, size = cached
+    else:
         app = get_app(domain, app_id)
         if app.copy_of:
-            cache.set(key, app, 24 * 3600)
+            size = len(json.dumps(app.to_json()))
+            cache.set(key, (app, size), APP_BUILD_CACHE_TIMEOUT)
 
+    if app.copy_of:
+        app._LAZY_ATTACHMENTS_CACHE = _UnretainedAttachments()
+        _app_build_lru.set(app_id, app, size)
     return app
 
 
+class _UnretainedAttachments(dict):
+    """Attachment cache for builds in ``_app_build_lru`` that doesn't keep anything
+
+    Attachments fetched through a shared build would otherwise stay in
+    memory for as long as the build, without counting towards its size.
+    They are still cached in the django cache.
+    """
+
+    def __setitem__(self, key, value):
+        pass
+
+
 def get_app(domain, app_id, wrap_cls=None, latest=False, target=None):
     """
     Utility for getting an app, making sure it's in the domain specified, and
@@ -9,7 +9,7 @@ from django.views.decorators.http import require_POST
 from django.urls import reverse
 from corehq import toggles
 from corehq.apps.app_manager.exceptions import CaseError
-from corehq.apps.app_manager.dbaccessors import get_app
+from corehq.apps.app_manager.dbaccessors import get_app, get_app_cached
 from corehq.apps.app_manager.models import AppEditingError
 from corehq.apps.app_manager.util import get_latest_enabled_build_for_profile
 from corehq.apps.users.decorators import require_permission
@@ -49,7 +49,7 @@ def safe_download(f):
     return _safe_download
 
 
-def safe_cached_download(f):
+def safe_cached_download(f, use_app_build_cache=False):
     """
     Same as safe_download, but makes it possible for the browser to cache.
 
@@ -78,6 +78,8 @@ def safe_cached_download(f):
         try:
             if latest_enabled_build:
                 request.app = latest_enabled_build
+            elif use_app_build_cache and not latest:
+                request.app = get_app_cached(domain, app_id)
             else:
                 request.app = get_app(domain, app_id, latest=latest, target=target)
             if not request.app.doc_type.endswith(DELETED_SUFFIX):
@@ -98,6 +100,15 @@ def safe_cached_download(f):
     return _safe_cached_download
 
 
+def safe_cached_build_download(f):
+    """
+    Same as safe_cached_download, but gets app builds with get_app_cached,
+    so the view shares them with other phone api calls. This should not be
+    used on any view that changes the app.
+    """
+    return safe_cached_download(f, use_app_build_cache=True)
+
+
 def no_conflict_require_POST(fn):
     """
     Catches resource conflicts on save and returns a 409 error.
@@ -77,6 +77,7 @@ from corehq.apps.app_manager.app_schemas.case_properties import (
     get_all_case_properties,
     get_usercase_properties,
 )
+from corehq.apps.app_manager.build_file_hashes import get_app_hash, get_form_file_hash
 from corehq.apps.app_manager.commcare_settings import check_condition
 from corehq.apps.app_manager.const import *
 from corehq.apps.app_manager.const import USERCASE_TYPE
@@ -4057,6 +4058,9 @@ class ApplicationBase(VersionedDoc, SnapshotMixin,
     # currently only canonical value is 'incomplete-build',
     # for when build resources aren't found where they should be
     build_broken_reason = StringProperty()
+    # hashes of the inputs of generated files, by file path,
+    # see corehq.apps.app_manager.build_file_hashes
+    build_file_hashes = DictProperty()
 
     # watch out for a past bug:
     # when reverting to a build that happens to be released
@@ -4488,6 +4492,7 @@ class ApplicationBase(VersionedDoc, SnapshotMixin,
             # but check explicitly so as not to change the _id if it exists
             copy._id = uuid.uuid4().hex
 
+        copy.build_file_hashes = {}
         copy.create_build_files()
 
         # since this hard to put in a test
@@ -4740,8 +4745,10 @@ class Application(ApplicationBase, TranslationMixin, ApplicationMediaMixin,
         previous_version = self.get_previous_version()
         if previous_version:
             force_new_version = self.build_profiles != previous_version.build_profiles
+            reuse_build_files = toggles.INCREMENTAL_APP_BUILDS.enabled(self.domain)
             for form_stuff in self.get_forms(bare=False):
-                filename = 'files/%s' % self.get_form_filename(**form_stuff)
+                form_path = self.get_form_filename(**form_stuff)
+                filename = 'files/%s' % form_path
                 form = form_stuff["form"]
                 if not force_new_version:
                     try:
@@ -4758,6 +4765,10 @@ class Application(ApplicationBase, TranslationMixin, ApplicationMediaMixin,
                         # so that that's not treated as the diff
                         previous_form_version = previous_form.get_version()
                         form.version = previous_form_version
+                        if (reuse_build_files and previous_version.build_file_hashes.get(form_path)
+                                == self._get_form_file_hash(form)):
+                            # same inputs as the previous build's form, so it would render the same
+                            continue
                         my_hash = _hash(self.fetch_xform(form=form))
                         if previous_hash != my_hash:
                             form.version = None
@@ -4990,9 +5001,27 @@ class Application(ApplicationBase, TranslationMixin, ApplicationMediaMixin,
             for lang in ['default'] + self.get_build_langs(build_profile_id)
         }
 
+    @memoized
+    def _get_app_hash(self):
+        return get_app_hash(self)
+
+    def _get_form_file_hash(self, form, build_profile_id=None):
+        return get_form_file_hash(self._get_app_hash(), form, build_profile_id)
+
+    def _get_reusable_form_file(self, previous_version, filename, file_hash):
+        """Returns the previous build's copy of a form file, if it was generated from the same inputs"""
+        if previous_version and previous_version.build_file_hashes.get(filename) == file_hash:
+            try:
+                return previous_version.lazy_fetch_attachment('files/%s' % filename)
+            except ResourceNotFound:
+                pass
+        return None
+
     @time_method()
     def _get_form_files(self, prefix, build_profile_id):
         files = {}
+        reuse_build_files = toggles.INCREMENTAL_APP_BUILDS.enabled(self.domain)
+        previous_version = self.get_previous_version() if reuse_build_files else None
         for form_stuff in self.get_forms(bare=False):
             def exclude_form(form):
                 return isinstance(form, ShadowForm) or form.is_a_disabled_release_form()
@@ -5000,6 +5029,15 @@ class Application(ApplicationBase, TranslationMixin, ApplicationMediaMixin,
             if not exclude_form(form_stuff['form']):
                 filename = prefix + self.get_form_filename(**form_stuff)
                 form = form_stuff['form']
+                if reuse_build_files:
+                    file_hash = self._get_form_file_hash(form, build_profile_id)
+                    self.build_file_hashes[filename] = file_hash
+                    previous_file = self._get_reusable_form_file(previous_version, filename, file_hash)
+                    if previous_file is not None:
+                        files[filename] = previous_file
+                        self.timing_context.add_count('form_files.reused')
+                        continue
+                    self.timing_context.add_count('form_files.generated')
                 try:
                     files[filename] = self.fetch_xform(form=form, build_profile_id=build_profile_id)
                 except XFormValidationFailed:
@@ -1,12 +1,17 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 from couchdbkit.exceptions import NoResultFound
+from django.core.cache import cache
+from django.http import Http404
 from django.test import TestCase
+from mock import patch
 from corehq.apps.app_manager.dbaccessors import (
+    _app_build_lru,
     domain_has_apps,
     get_all_app_ids,
     get_all_built_app_ids_and_versions,
     get_app,
+    get_app_cached,
     get_apps_in_domain,
     get_brief_apps_in_domain,
     get_build_doc_by_version,
@@ -276,3 +281,33 @@ class TestAppGetters(TestCase):
     def test_get_latest_released_app_version(self):
         version = get_latest_released_app_version(self.domain, self.app_id)
         self.assertEqual(version, 2)
+
+    def test_get_app_cached_build(self):
+        self.addCleanup(cache.clear)
+        self.addCleanup(_app_build_lru.clear)
+        build = get_app_cached(self.domain, self.v2_build._id)
+        self.assertEqual(build.version, 2)
+        self.assertIs(get_app_cached(self.domain, self.v2_build._id), build)
+        with self.assertRaises(Http404):
+            get_app_cached('other-domain', self.v2_build._id)
+
+    def test_get_app_cached_build_does_not_keep_attachments(self):
+        self.addCleanup(cache.clear)
+        self.addCleanup(_app_build_lru.clear)
+        build = get_app_cached(self.domain, self.v2_build._id)
+        build._LAZY_ATTACHMENTS_CACHE['files/suite.xml'] = b'<suite/>'
+        self.assertEqual(build._LAZY_ATTACHMENTS_CACHE, {})
+
+        # builds from the django cache aren't serialized again to get their size
+        _app_build_lru.clear()
+        with patch('corehq.apps.app_manager.dbaccessors.json.dumps') as dumps:
+            self.assertEqual(get_app_cached(self.domain, self.v2_build._id).version, 2)
+        self.assertFalse(dumps.called)
+
+    def test_get_app_cached_current_app(self):
+        self.addCleanup(cache.clear)
+        self.addCleanup(_app_build_lru.clear)
+        app = get_app_cached(self.domain, self.app_id)
+        self.assertEqual(app.version, 4)
+        self.assertIsNot(get_app_cached(self.domain, self.app_id), app)
+        self.assertEqual(len(_app_build_lru), 0)
@@ -3,10 +3,12 @@ from __future__ import unicode_literals
 from django.test.testcases import TestCase, SimpleTestCase
 from mock import patch
 
+from corehq.apps.app_manager.build_file_hashes import get_app_hash, get_form_file_hash
 from corehq.apps.app_manager.suite_xml import xml_models as suite_models
 from corehq.apps.app_manager.models import Application, Module, Form, import_app, FormLink
 from corehq.apps.app_manager.tests.util import add_build, patch_default_builds
 from corehq.apps.builds.models import BuildSpec
+from corehq.util.test_utils import flag_enabled
 
 
 BLANK_TEMPLATE = """<?xml version="1.0" encoding="UTF-8" ?>
@@ -118,6 +120,69 @@ class FormVersioningTest(TestCase):
         return [r.version for r in suite.xform_resources]
 
 
+class IncrementalBuildTest(TestCase):
+
+    @patch_default_builds
+    @patch('corehq.apps.app_manager.models.validate_xform', return_value=None)
+    @flag_enabled('INCREMENTAL_APP_BUILDS')
+    def test_unchanged_forms_are_reused(self, mock):
+        add_build(version='2.7.0', build_number=20655)
+        domain = 'incremental-build-test'
+
+        app = Application.new_app(domain, 'Foo')
+        app.modules.append(Module(forms=[Form(), Form()]))
+        app.build_spec = BuildSpec.from_string('2.7.0/latest')
+        app.get_module(0).get_form(0).source = BLANK_TEMPLATE.format(xmlns='xmlns-0.0')
+        app.get_module(0).get_form(1).source = BLANK_TEMPLATE.format(xmlns='xmlns-1')
+        app.save()
+        self.addCleanup(app.delete)
+
+        build1 = app.make_build()
+        build1.save()
+        self.addCleanup(build1.delete)
+        self.assertEqual(
+            set(build1.build_file_hashes),
+            {'modules-0/forms-0.xml', 'modules-0/forms-1.xml'}
+        )
+
+        app.get_module(0).get_form(0).source = BLANK_TEMPLATE.format(xmlns='xmlns-0.1')
+        app.save()
+
+        with patch.object(Application, 'fetch_xform', autospec=True,
+                          side_effect=Application.fetch_xform) as fetch_xform:
+            build2 = app.make_build()
+        build2.save()
+        self.addCleanup(build2.delete)
+
+        rendered_forms = {
+            call[1]['form'].unique_id for call in fetch_xform.call_args_list if call[1].get('form')
+        }
+        self.assertEqual(rendered_forms, {app.get_module(0).get_form(0).unique_id})
+        self.assertEqual(FormVersioningTest.get_form_versions(build2), [2, 1])
+        self.assertNotEqual(build2.build_file_hashes['modules-0/forms-0.xml'],
+                            build1.build_file_hashes['modules-0/forms-0.xml'])
+        self.assertEqual(build2.build_file_hashes['modules-0/forms-1.xml'],
+                         build1.build_file_hashes['modules-0/forms-1.xml'])
+        self.assertEqual(build2.fetch_attachment('files/modules-0/forms-1.xml'),
+                         build1.fetch_attachment('files/modules-0/forms-1.xml'))
+
+
+class FormFileHashTest(SimpleTestCase):
+
+    def test_form_file_hash_depends_on_code(self):
+        app = Application.new_app('domain', 'Foo')
+        app.modules.append(Module(forms=[Form()]))
+        form = app.get_module(0).get_form(0)
+        form.source = BLANK_TEMPLATE.format(xmlns='xmlns-0.0')
+        app_hash = get_app_hash(app)
+
+        form_hash = get_form_file_hash(app_hash, form)
+        self.assertEqual(form_hash, get_form_file_hash(app_hash, form))
+        with patch('corehq.apps.app_manager.build_file_hashes.get_form_file_code_hash',
+                   return_value='changed-code'):
+            self.assertNotEqual(form_hash, get_form_file_hash(app_hash, form))
+
+
 class FormIdTest(SimpleTestCase):
 
     def test_update_form_references_case_list_form(self):
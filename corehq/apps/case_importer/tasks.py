@@ -1,7 +1,9 @@
 from __future__ import absolute_import, unicode_literals
 
 import uuid
-from collections import namedtuple
+from collections import defaultdict, namedtuple
+
+import six
 
 from celery import states
 from celery.exceptions import Ignore
@@ -22,18 +24,23 @@ from corehq.apps.hqadmin.tasks import AbnormalUsageAlert, send_abnormal_usage_al
 from corehq.apps.hqcase.utils import submit_case_blocks
 from corehq.apps.locations.models import SQLLocation
 from corehq.apps.users.models import CouchUser
-from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.toggles import BULK_UPLOAD_DATE_OPENED
 from corehq.util.datadog.gauges import datadog_gauge_task
 from corehq.util.datadog.utils import case_load_counter
 from corehq.util.soft_assert import soft_assert
+from dimagi.utils.chunked import chunked
 from soil.progress import set_task_progress, update_task_state
 
 POOL_SIZE = 10
 PRIME_VIEW_FREQUENCY = 500
 CASEBLOCK_CHUNKSIZE = 100
+ROW_CHUNKSIZE = 1000
 
 RowAndCase = namedtuple('RowAndCase', ['row', 'case'])
+ImportRow = namedtuple('ImportRow', [
+    'number', 'search_id', 'fields_to_update', 'external_id', 'parent_id',
+    'parent_external_id', 'parent_type', 'parent_ref', 'to_close',
+])
 
 
 @task(serializer='pickle', queue='case_import_queue')
@@ -81,6 +88,7 @@ def do_import(spreadsheet, config, domain, task=None, chunksize=CASEBLOCK_CHUNKS
     # keep a cache of id lookup successes to help performance
     id_cache = {}
     name_cache = {}
+    case_lookup = importer_util.CaseLookupCache(domain)
     caseblocks = []
     ids_seen = set()
     track_load = case_load_counter("case_importer", domain)
@@ -130,178 +138,203 @@ def do_import(spreadsheet, config, domain, task=None, chunksize=CASEBLOCK_CHUNKS
         return err
 
     row_count = spreadsheet.max_row
-    for i, row in enumerate(spreadsheet.iter_row_dicts()):
-        if task:
-            set_task_progress(task, i, row_count)
-
-        # skip first row (header row)
-        if i == 0:
-            continue
-
-        search_id = importer_util.parse_search_id(config, row)
-
-        fields_to_update = importer_util.populate_updated_fields(config, row)
-        if not any(fields_to_update.values()):
-            # if the row was blank, just skip it, no errors
-            continue
-
-        if config.search_field == 'external_id' and not search_id:
-            # do not allow blank external id since we save this
-            errors.add(ImportErrors.BlankExternalId, i + 1)
-            continue
-
-        external_id = fields_to_update.pop('external_id', None)
-        parent_id = fields_to_update.pop('parent_id', None)
-        parent_external_id = fields_to_update.pop('parent_external_id', None)
-        parent_type = fields_to_update.pop('parent_type', config.case_type)
-        parent_ref = fields_to_update.pop('parent_ref', 'parent')
-        to_close = fields_to_update.pop('close', False)
-
-        if any([lookup_id and lookup_id in ids_seen for lookup_id in [search_id, parent_id, parent_external_id]]):
-            # clear out the queue to make sure we've processed any potential
-            # cases we want to look up
-            # note: these three lines are repeated a few places, and could be converted
-            # to a function that makes use of closures (and globals) to do the same thing,
-            # but that seems sketchier than just beeing a little RY
-            _submit_caseblocks(domain, config.case_type, caseblocks)
-            num_chunks += 1
-            caseblocks = []
-            ids_seen = set()  # also clear ids_seen, since all the cases will now be in the database
-
-        case, error = importer_util.lookup_case(
-            config.search_field,
-            search_id,
-            domain,
-            config.case_type
-        )
-        track_load()
-
-        if case:
-            if case.type != config.case_type:
+    rows = enumerate(spreadsheet.iter_row_dicts())
+    # skip first row (header row)
+    next(rows, None)
+    for rows_chunk in chunked(rows, ROW_CHUNKSIZE):
+        import_rows = []
+        for i, row in rows_chunk:
+            search_id = importer_util.parse_search_id(config, row)
+
+            fields_to_update = importer_util.populate_updated_fields(config, row)
+            if not any(fields_to_update.values()):
+                # if the row was blank, just skip it, no errors
                 continue
-        elif error == LookupErrors.NotFound:
-            if not config.create_new_cases:
+
+            if config.search_field == 'external_id' and not search_id:
+                # do not allow blank external id since we save this
+                errors.add(ImportErrors.BlankExternalId, i + 1)
                 continue
-        elif error == LookupErrors.MultipleResults:
-            too_many_matches += 1
-            continue
 
-        uploaded_owner_name = fields_to_update.pop('owner_name', None)
-        uploaded_owner_id = fields_to_update.pop('owner_id', None)
+            import_rows.append(ImportRow(
+                number=i,
+                search_id=search_id,
+                fields_to_update=fields_to_update,
+                external_id=fields_to_update.pop('external_id', None),
+                parent_id=fields_to_update.pop('parent_id', None),
+                parent_external_id=fields_to_update.pop('parent_external_id', None),
+                parent_type=fields_to_update.pop('parent_type', config.case_type),
+                parent_ref=fields_to_update.pop('parent_ref', 'parent'),
+                to_close=fields_to_update.pop('close', False),
+            ))
+
+        # resolve everything the rows refer to up front with bulk queries
+        case_lookup.clear()
+        _prefetch_lookups(config, domain, import_rows, case_lookup, name_cache)
+
+        for import_row in import_rows:
+            i = import_row.number
+            if task:
+                set_task_progress(task, i, row_count)
+
+            search_id = import_row.search_id
+            fields_to_update = import_row.fields_to_update
+            external_id = import_row.external_id
+            parent_id = import_row.parent_id
+            parent_external_id = import_row.parent_external_id
+            parent_type = import_row.parent_type
+            parent_ref = import_row.parent_ref
+            to_close = import_row.to_close
+
+            if any([lookup_id and lookup_id in ids_seen for lookup_id in [search_id, parent_id, parent_external_id]]):
+                # clear out the queue to make sure we've processed any potential
+                # cases we want to look up
+                # note: these three lines are repeated a few places, and could be converted
+                # to a function that makes use of closures (and globals) to do the same thing,
+                # but that seems sketchier than just beeing a little RY
+                _submit_caseblocks(domain, config.case_type, caseblocks)
+                num_chunks += 1
+                caseblocks = []
+                # the cases may not have existed when they were prefetched
+                case_lookup.forget(ids_seen)
+                ids_seen = set()  # also clear ids_seen, since all the cases will now be in the database
+
+            case, error = importer_util.lookup_case(
+                config.search_field,
+                search_id,
+                domain,
+                config.case_type,
+                case_accessors=case_lookup,
+            )
+            track_load()
 
-        if uploaded_owner_name:
-            # If an owner name was provided, replace the provided
-            # uploaded_owner_id with the id of the provided group or owner
-            try:
-                uploaded_owner_id = importer_util.get_id_from_name(uploaded_owner_name, domain, name_cache)
-            except SQLLocation.MultipleObjectsReturned:
-                errors.add(ImportErrors.DuplicateLocationName, i + 1)
+            if case:
+                if case.type != config.case_type:
+                    continue
+            elif error == LookupErrors.NotFound:
+                if not config.create_new_cases:
+                    continue
+            elif error == LookupErrors.MultipleResults:
+                too_many_matches += 1
                 continue
 
-            if not uploaded_owner_id:
-                errors.add(ImportErrors.InvalidOwnerName, i + 1, 'owner_name')
-                continue
-        if uploaded_owner_id:
-            # If an owner_id mapping exists, verify it is a valid user
-            # or case sharing group
-            if importer_util.is_valid_id(uploaded_owner_id, domain, id_cache):
-                owner_id = uploaded_owner_id
-                id_cache[uploaded_owner_id] = True
+            uploaded_owner_name = fields_to_update.pop('owner_name', None)
+            uploaded_owner_id = fields_to_update.pop('owner_id', None)
+
+            if uploaded_owner_name:
+                # If an owner name was provided, replace the provided
+                # uploaded_owner_id with the id of the provided group or owner
+                try:
+                    uploaded_owner_id = importer_util.get_id_from_name(uploaded_owner_name, domain, name_cache)
+                except SQLLocation.MultipleObjectsReturned:
+                    errors.add(ImportErrors.DuplicateLocationName, i + 1)
+                    continue
+
+                if not uploaded_owner_id:
+                    errors.add(ImportErrors.InvalidOwnerName, i + 1, 'owner_name')
+                    continue
+            if uploaded_owner_id:
+                # If an owner_id mapping exists, verify it is a valid user
+                # or case sharing group
+                if importer_util.is_valid_id(uploaded_owner_id, domain, id_cache):
+                    owner_id = uploaded_owner_id
+                    id_cache[uploaded_owner_id] = True
+                else:
+                    errors.add(ImportErrors.InvalidOwnerId, i + 1, 'owner_id')
+                    id_cache[uploaded_owner_id] = False
+                    continue
             else:
-                errors.add(ImportErrors.InvalidOwnerId, i + 1, 'owner_id')
-                id_cache[uploaded_owner_id] = False
-                continue
-        else:
-            # if they didn't supply an owner_id mapping, default to current
-            # user
-            owner_id = user_id
-
-        extras = {}
-        if parent_id:
-            try:
-                parent_case = CaseAccessors(domain).get_case(parent_id)
+                # if they didn't supply an owner_id mapping, default to current
+                # user
+                owner_id = user_id
+
+            extras = {}
+            if parent_id:
+                try:
+                    parent_case = case_lookup.get_case(parent_id)
+                    track_load()
+
+                    if parent_case.domain == domain:
+                        extras['index'] = {
+                            parent_ref: (parent_case.type, parent_id)
+                        }
+                except ResourceNotFound:
+                    errors.add(ImportErrors.InvalidParentId, i + 1, 'parent_id')
+                    continue
+            elif parent_external_id:
+                parent_case, error = importer_util.lookup_case(
+                    'external_id',
+                    parent_external_id,
+                    domain,
+                    parent_type,
+                    case_accessors=case_lookup,
+                )
                 track_load()
-
-                if parent_case.domain == domain:
+                if parent_case:
                     extras['index'] = {
-                        parent_ref: (parent_case.type, parent_id)
+                        parent_ref: (parent_type, parent_case.case_id)
                     }
-            except ResourceNotFound:
-                errors.add(ImportErrors.InvalidParentId, i + 1, 'parent_id')
-                continue
-        elif parent_external_id:
-            parent_case, error = importer_util.lookup_case(
-                'external_id',
-                parent_external_id,
-                domain,
-                parent_type
-            )
-            track_load()
-            if parent_case:
-                extras['index'] = {
-                    parent_ref: (parent_type, parent_case.case_id)
-                }
-
-        case_name = fields_to_update.pop('name', None)
-
-        if BULK_UPLOAD_DATE_OPENED.enabled(domain):
-            date_opened = fields_to_update.pop(CASE_TAG_DATE_OPENED, None)
-            if date_opened:
-                extras['date_opened'] = date_opened
-
-        if not case:
-            id = uuid.uuid4().hex
 
-            if config.search_field == 'external_id':
-                extras['external_id'] = search_id
-            elif external_id:
-                extras['external_id'] = external_id
-
-            try:
-                caseblock = CaseBlock(
-                    create=True,
-                    case_id=id,
-                    owner_id=owner_id,
-                    user_id=user_id,
-                    case_type=config.case_type,
-                    case_name=case_name or '',
-                    update=fields_to_update,
-                    **extras
-                )
-                caseblocks.append(RowAndCase(i, caseblock))
-                created_count += 1
+            case_name = fields_to_update.pop('name', None)
+
+            if BULK_UPLOAD_DATE_OPENED.enabled(domain):
+                date_opened = fields_to_update.pop(CASE_TAG_DATE_OPENED, None)
+                if date_opened:
+                    extras['date_opened'] = date_opened
+
+            if not case:
+                id = uuid.uuid4().hex
+
+                if config.search_field == 'external_id':
+                    extras['external_id'] = search_id
+                elif external_id:
+                    extras['external_id'] = external_id
+
+                try:
+                    caseblock = CaseBlock(
+                        create=True,
+                        case_id=id,
+                        owner_id=owner_id,
+                        user_id=user_id,
+                        case_type=config.case_type,
+                        case_name=case_name or '',
+                        update=fields_to_update,
+                        **extras
+                    )
+                    caseblocks.append(RowAndCase(i, caseblock))
+                    created_count += 1
+                    if external_id:
+                        ids_seen.add(external_id)
+                except CaseBlockError:
+                    errors.add(ImportErrors.CaseGeneration, i + 1)
+            else:
                 if external_id:
-                    ids_seen.add(external_id)
-            except CaseBlockError:
-                errors.add(ImportErrors.CaseGeneration, i + 1)
-        else:
-            if external_id:
-                extras['external_id'] = external_id
-            if uploaded_owner_id:
-                extras['owner_id'] = owner_id
-            if to_close == 'yes':
-                extras['close'] = True
-            if case_name is not None:
-                extras['case_name'] = case_name
-
-            try:
-                caseblock = CaseBlock(
-                    create=False,
-                    case_id=case.case_id,
-                    update=fields_to_update,
-                    **extras
-                )
-                caseblocks.append(RowAndCase(i, caseblock))
-                match_count += 1
-            except CaseBlockError:
-                errors.add(ImportErrors.CaseGeneration, i + 1)
-
-        # check if we've reached a reasonable chunksize
-        # and if so submit
-        if len(caseblocks) >= chunksize:
-            _submit_caseblocks(domain, config.case_type, caseblocks)
-            num_chunks += 1
-            caseblocks = []
+                    extras['external_id'] = external_id
+                if uploaded_owner_id:
+                    extras['owner_id'] = owner_id
+                if to_close == 'yes':
+                    extras['close'] = True
+                if case_name is not None:
+                    extras['case_name'] = case_name
+
+                try:
+                    caseblock = CaseBlock(
+                        create=False,
+                        case_id=case.case_id,
+                        update=fields_to_update,
+                        **extras
+                    )
+                    caseblocks.append(RowAndCase(i, caseblock))
+                    match_count += 1
+                except CaseBlockError:
+                    errors.add(ImportErrors.CaseGeneration, i + 1)
+
+            # check if we've reached a reasonable chunksize
+            # and if so submit
+            if len(caseblocks) >= chunksize:
+                _submit_caseblocks(domain, config.case_type, caseblocks)
+                num_chunks += 1
+                caseblocks = []
 
     # final purge of anything left in the queue
     if _submit_caseblocks(domain, config.case_type, caseblocks):
@@ -316,6 +349,31 @@ def do_import(spreadsheet, config, domain, task=None, chunksize=CASEBLOCK_CHUNKS
     }
 
 
+def _prefetch_lookups(config, domain, import_rows, case_lookup, name_cache):
+    """
+    Look up the cases and owners referenced by a chunk of rows with a few
+    bulk queries instead of a query per row
+    """
+    parent_external_ids_by_type = defaultdict(list)
+    for row in import_rows:
+        if not row.parent_id and row.parent_external_id:
+            parent_external_ids_by_type[row.parent_type].append(row.parent_external_id)
+
+    if config.search_field == 'case_id':
+        case_lookup.prefetch_cases([row.search_id for row in import_rows] +
+                                   [row.parent_id for row in import_rows])
+    else:
+        case_lookup.prefetch_cases([row.parent_id for row in import_rows])
+        if config.search_field == importer_util.EXTERNAL_ID:
+            case_lookup.prefetch_cases_by_external_id([row.search_id for row in import_rows], config.case_type)
+    for parent_type, external_ids in six.iteritems(parent_external_ids_by_type):
+        case_lookup.prefetch_cases_by_external_id(external_ids, parent_type)
+
+    importer_util.prefetch_ids_from_names(
+        [row.fields_to_update.get('owner_name') for row in import_rows], domain, name_cache
+    )
+
+
 def _alert_on_result(result, domain):
     """ Check import result and send internal alerts based on result
 
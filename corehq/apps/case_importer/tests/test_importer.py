@@ -17,6 +17,7 @@ from corehq.apps.domain.shortcuts import create_domain
 from corehq.apps.hqcase.dbaccessors import get_case_ids_in_domain
 from corehq.apps.locations.models import LocationType
 from corehq.apps.users.models import CommCareUser, WebUser
+from corehq.apps.users.util import format_username
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.form_processor.tests.utils import run_with_all_backends
 from corehq.util.test_utils import flag_enabled
@@ -360,6 +361,30 @@ class ImporterTest(TestCase):
                          len(res['errors'][ImportErrors.InvalidParentId][error_column_name]['rows']),
                          "All cases should have missing parent")
 
+    @run_with_all_backends
+    @patch('corehq.apps.case_importer.tasks.ROW_CHUNKSIZE', 2)
+    def test_lookups_across_row_chunks(self):
+        case_owner = CommCareUser.create(self.domain, format_username('case-owner', self.domain), 'pw')
+        [existing_case] = self.factory.create_or_update_case(CaseStructure(attrs={'create': True}))
+        res = self.import_mock_file([
+            ['case_id', 'name', 'external_id', 'parent_external_id', 'owner_name'],
+            [existing_case.case_id, 'existing', '', '', 'case-owner'],
+            ['', 'parent', 'parent-ext-id', '', 'case-owner'],
+            # the parent case is still queued when this row is looked up
+            ['', 'child', '', 'parent-ext-id', 'case-owner'],
+            ['', 'missing-owner', '', '', 'not-a-user'],
+        ])
+        self.assertEqual(1, res['match_count'])
+        self.assertEqual(2, res['created_count'])
+        self.assertEqual(res['errors'][ImportErrors.InvalidOwnerName]['owner_name']['rows'], [5])
+
+        case_ids = self.accessor.get_case_ids_in_domain()
+        cases = {c.name: c for c in list(self.accessor.get_cases(case_ids))}
+        self.assertEqual(existing_case.case_id, cases['existing'].case_id)
+        self.assertEqual(cases['child'].indices[0].referenced_id, cases['parent'].case_id)
+        for name in ['existing', 'parent', 'child']:
+            self.assertEqual(cases[name].owner_id, case_owner._id)
+
     def import_mock_file(self, rows):
         config = self._config(rows[0])
         xls_file = make_worksheet_wrapper(*rows)
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 from contextlib import contextmanager
 import json
 from collections import defaultdict, namedtuple, OrderedDict
+from django.conf import settings
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 from couchdbkit import NoResultFound
@@ -260,15 +261,85 @@ def parse_search_id(config, row):
     return convert_field_value(search_id)
 
 
-def lookup_case(search_field, search_id, domain, case_type):
+class CaseLookupCache(object):
+    """
+    Cases referenced by a chunk of spreadsheet rows, loaded in bulk so that
+    each row doesn't need its own query.
+
+    Has the same case lookup methods as ``CaseAccessors`` so it can be passed
+    to ``lookup_case``. Lookups for ids that weren't prefetched fall back to
+    the database.
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.case_accessors = CaseAccessors(domain)
+        self._cases_by_id = {}
+        self._cases_by_external_id = {}
+
+    def prefetch_cases(self, case_ids):
+        case_ids = list({case_id for case_id in case_ids if case_id and case_id not in self._cases_by_id})
+        if not case_ids:
+            return
+        for case_id in case_ids:
+            self._cases_by_id[case_id] = None
+        for case in self.case_accessors.get_cases(case_ids):
+            self._cases_by_id[case.case_id] = case
+
+    def prefetch_cases_by_external_id(self, external_ids, case_type):
+        external_ids = list({
+            external_id for external_id in external_ids
+            if external_id and (external_id, case_type) not in self._cases_by_external_id
+        })
+        if not external_ids:
+            return
+        for external_id in external_ids:
+            self._cases_by_external_id[(external_id, case_type)] = []
+        for case in self.case_accessors.get_cases_by_external_ids(external_ids, case_type=case_type):
+            self._cases_by_external_id[(case.external_id, case_type)].append(case)
+
+    def forget(self, ids):
+        """
+        Forget what was prefetched for these case ids or external ids, e.g.
+        because cases with those ids have been created since.
+        """
+        ids = set(ids)
+        for case_id in ids:
+            self._cases_by_id.pop(case_id, None)
+        for key in [key for key in self._cases_by_external_id if key[0] in ids]:
+            del self._cases_by_external_id[key]
+
+    def clear(self):
+        self._cases_by_id = {}
+        self._cases_by_external_id = {}
+
+    def get_case(self, case_id):
+        if case_id not in self._cases_by_id:
+            return self.case_accessors.get_case(case_id)
+        case = self._cases_by_id[case_id]
+        if case is None:
+            raise CaseNotFound(case_id)
+        return case
+
+    def get_cases_by_external_id(self, external_id, case_type=None):
+        try:
+            return list(self._cases_by_external_id[(external_id, case_type)])
+        except KeyError:
+            return self.case_accessors.get_cases_by_external_id(external_id, case_type=case_type)
+
+
+def lookup_case(search_field, search_id, domain, case_type, case_accessors=None):
     """
     Attempt to find the case in CouchDB by the provided search_field and search_id.
 
     Returns a tuple with case (if found) and an
     error code (if there was an error in lookup).
+
+    :param case_accessors: ``CaseAccessors`` or ``CaseLookupCache`` to look
+    the case up with. Defaults to ``CaseAccessors(domain)``.
     """
     found = False
-    case_accessors = CaseAccessors(domain)
+    case_accessors = case_accessors or CaseAccessors(domain)
     if search_field == 'case_id':
         try:
             case = case_accessors.get_case(search_id)
@@ -410,6 +481,52 @@ def get_id_from_name(name, domain, cache):
     return id
 
 
+def prefetch_ids_from_names(names, domain, cache):
+    """
+    Resolve owner names into ``cache`` in bulk, the same way
+    ``get_id_from_name`` does one at a time. Users are looked up by username,
+    then groups by name, then locations by site code. Names that are still
+    unresolved are left for ``get_id_from_name``.
+    """
+    from corehq.apps.users.dbaccessors.all_commcare_users import get_user_docs_by_username
+
+    names = {name for name in names if name and name not in cache}
+    if not names:
+        return
+
+    names_by_username = {
+        (name if '@' in name else format_username(name, domain)): name
+        for name in names
+    }
+    user_ids_by_name = defaultdict(set)
+    for doc in get_user_docs_by_username(list(names_by_username)):
+        if doc and doc.get('username') in names_by_username:
+            user_ids_by_name[names_by_username[doc['username']]].add(doc['_id'])
+    for name, user_ids in six.iteritems(user_ids_by_name):
+        if len(user_ids) == 1:
+            cache[name] = user_ids.pop()
+    names -= set(user_ids_by_name)
+    if not names:
+        return
+
+    groups = Group.view(
+        'groups/by_name',
+        keys=[[domain, name] for name in names],
+        include_docs=True,
+        stale=settings.COUCH_STALE_QUERY,
+    )
+    for group in groups:
+        if group.name in names and group.name not in cache:
+            cache[group.name] = group.get_id
+    names -= set(cache)
+    if not names:
+        return
+
+    locations = SQLLocation.objects.filter(domain=domain, site_code__in=names)
+    for location_id, site_code in locations.values_list('location_id', 'site_code'):
+        cache[site_code] = location_id
+
+
 def get_importer_error_message(e):
     if isinstance(e, ImporterRefError):
         # I'm not totally sure this is the right error, but it's what was being
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 import json
+from contextlib import contextmanager
 from copy import copy
 
 import six
@@ -110,6 +111,15 @@ class KafkaChangeFeed(ChangeFeed):
     def get_processed_offsets(self):
         return copy(self._processed_topic_offsets)
 
+    @contextmanager
+    def processed_offsets_as_of(self, offsets):
+        processed_offsets = self._processed_topic_offsets
+        self._processed_topic_offsets = copy(offsets)
+        try:
+            yield
+        finally:
+            self._processed_topic_offsets = processed_offsets
+
     def get_latest_offsets(self):
         return self.consumer.end_offsets(self.consumer.assignment())
 
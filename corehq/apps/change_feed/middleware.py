@@ -0,0 +1,19 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from django.utils.deprecation import MiddlewareMixin
+
+from corehq.apps.change_feed.producer import producer
+
+
+class BatchedChangePublishingMiddleware(MiddlewareMixin):
+    """
+    Publish the changes made while handling a request to kafka in batches,
+    waiting for them to be delivered only once the response is ready.
+    """
+
+    def process_request(self, request):
+        producer.start_batch()
+
+    def process_response(self, request, response):
+        producer.end_batch()
+        return response
@@ -1,18 +1,29 @@
 from __future__ import unicode_literals
 from __future__ import absolute_import
+import itertools
 import json
+import threading
+from contextlib import contextmanager
+
 import six
 
+from celery.signals import task_postrun, task_prerun
 from django.conf import settings
 from kafka import KafkaProducer
+from kafka.errors import KafkaTimeoutError
 
+from corehq.apps.change_feed import change_feed_logger
+from corehq.util.datadog.gauges import datadog_counter
 from corehq.util.soft_assert import soft_assert
+from pillow_retry.const import CHANGE_PUBLISHER_RETRY_NAME
+from pillowtop.feed.interface import Change
 
 
 class ChangeProducer(object):
 
     def __init__(self):
         self._producer = None
+        self._local = threading.local()
 
     @property
     def producer(self):
@@ -25,6 +36,8 @@ class ChangeProducer(object):
             client_id="cchq-producer",
             retries=3,
             acks=1,
+            linger_ms=settings.KAFKA_PRODUCER_LINGER_MS,
+            batch_size=settings.KAFKA_PRODUCER_BATCH_SIZE,
             key_serializer=lambda key: str(key).encode()
         )
         return self._producer
@@ -34,9 +47,13 @@ class ChangeProducer(object):
         message_json_dump = json.dumps(message)
         if six.PY3:
             message_json_dump = message_json_dump.encode('utf-8')
+        batch = self._batch
         try:
-            self.producer.send(topic, message_json_dump, key=change_meta.document_id)
-            self.producer.flush()
+            future = self.producer.send(topic, message_json_dump, key=change_meta.document_id)
+            if batch is None:
+                self.producer.flush()
+            else:
+                batch.track(future, topic, change_meta)
         except Exception as e:
             _assert = soft_assert(notify_admins=True)
             _assert(False, 'Problem sending change to kafka {}: {} ({})'.format(
@@ -44,5 +61,139 @@ class ChangeProducer(object):
             ))
             raise
 
+    @property
+    def _batch(self):
+        return getattr(self._local, 'batch', None)
+
+    def start_batch(self):
+        """Publish changes sent by this thread asynchronously until `end_batch`
+
+        Batches may be nested; changes are flushed when the outermost
+        batch ends.
+        """
+        if self._batch is None:
+            self._local.batch = _ChangeBatch()
+        self._local.batch.depth += 1
+
+    def end_batch(self):
+        """Wait for the changes sent since `start_batch` to be delivered
+
+        Changes that could not be delivered are queued in pillow_retry
+        to be published again.
+        """
+        batch = self._batch
+        if batch is None:
+            return
+        batch.depth -= 1
+        if batch.depth > 0:
+            return
+        self._local.batch = None
+        for topic, change_meta, exception in self._flush(batch):
+            _queue_change_for_retry(topic, change_meta, exception)
+
+    @contextmanager
+    def batched(self):
+        """Publish changes sent in this context with a single blocking flush at the end"""
+        self.start_batch()
+        try:
+            yield
+        finally:
+            self.end_batch()
+
+    @contextmanager
+    def delivered(self):
+        """Publish changes sent in this context and wait for their delivery on exit
+
+        Unlike `batched` this does not defer to an enclosing batch, and
+        the first delivery error is raised rather than queued for retry
+        so that the caller can handle it.
+        """
+        outer_batch = self._batch
+        self._local.batch = batch = _ChangeBatch()
+        batch.depth += 1
+        try:
+            yield
+        finally:
+            self._local.batch = outer_batch
+        for topic, change_meta, exception in self._flush(batch):
+            raise exception
+
+    def _flush(self, batch):
+        """Flush the producer and return the changes in `batch` that were not delivered
+
+        :returns: List of `(topic, change_meta, exception)` tuples.
+        """
+        if batch.all_delivered():
+            return []
+        try:
+            self.producer.flush(timeout=settings.KAFKA_PRODUCER_FLUSH_TIMEOUT)
+        except KafkaTimeoutError:
+            pass
+        return batch.undelivered()
+
+
+class _ChangeBatch(object):
+    """Changes sent to kafka that have not been confirmed as delivered
+
+    Delivery callbacks are run on the kafka producer's I/O thread, so
+    `pending` and `errors` are only accessed while holding `_lock`.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.pending = {}
+        self.errors = {}
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+
+    def track(self, future, topic, change_meta):
+        key = next(self._keys)
+        with self._lock:
+            self.pending[key] = (topic, change_meta)
+        future.add_callback(self._on_success, key)
+        future.add_errback(self._on_error, key)
+
+    def _on_success(self, key, record_metadata):
+        with self._lock:
+            self.pending.pop(key, None)
+
+    def _on_error(self, key, exception):
+        with self._lock:
+            self.errors[key] = exception
+
+    def all_delivered(self):
+        with self._lock:
+            return not self.pending
+
+    def undelivered(self):
+        """:returns: List of `(topic, change_meta, exception)` tuples in the order they were sent"""
+        with self._lock:
+            return [
+                (topic, change_meta,
+                 self.errors.get(key) or KafkaTimeoutError('Change not delivered before flush timeout'))
+                for key, (topic, change_meta) in sorted(self.pending.items())
+            ]
+
+
+def _queue_change_for_retry(topic, change_meta, exception):
+    from pillow_retry.models import PillowError
+    change_feed_logger.error('Error publishing change %s to %s: %s', change_meta.document_id, topic, exception)
+    datadog_counter('commcare.change_feed.publish_failures', tags=['topic:{}'.format(topic)])
+    change = Change(change_meta.document_id, sequence_id=None, metadata=change_meta, topic=topic)
+    error = PillowError.get_or_create_for_pillow_name(change, CHANGE_PUBLISHER_RETRY_NAME)
+    error.change_metadata = change_meta.to_json()
+    error.add_attempt(exception, None)
+    error.save()
+
 
 producer = ChangeProducer()
+
+
+@task_prerun.connect
+def start_task_change_batch(**kwargs):
+    producer.start_batch()
+
+
+@task_postrun.connect
+def end_task_change_batch(**kwargs):
+    producer.end_batch()
@@ -0,0 +1,106 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from django.test import SimpleTestCase
+from kafka.errors import KafkaError
+from kafka.future import Future
+from mock import patch
+
+from corehq.apps.change_feed import topics
+from corehq.apps.change_feed.producer import ChangeProducer
+from pillowtop.feed.interface import ChangeMeta
+
+
+class FakeKafkaProducer(object):
+
+    def __init__(self, fail_ids=()):
+        self.fail_ids = fail_ids
+        self.sent = []
+        self.flushes = 0
+        self._futures = []
+
+    def send(self, topic, value, key=None):
+        future = Future()
+        self.sent.append(key)
+        self._futures.append((key, future))
+        return future
+
+    def flush(self, timeout=None):
+        self.flushes += 1
+        for key, future in self._futures:
+            if key in self.fail_ids:
+                future.failure(KafkaError('delivery failed'))
+            else:
+                future.success(None)
+        self._futures = []
+
+
+def _change_meta(doc_id):
+    return ChangeMeta(document_id=doc_id, data_source_type='sql', data_source_name='form-sql', domain='test')
+
+
+@patch('corehq.apps.change_feed.producer._queue_change_for_retry')
+class ChangeProducerBatchTest(SimpleTestCase):
+
+    def setUp(self):
+        self.change_producer = ChangeProducer()
+
+    def test_unbatched_changes_are_flushed(self, queue_for_retry):
+        self.change_producer._producer = kafka = FakeKafkaProducer()
+        self.change_producer.send_change(topics.FORM_SQL, _change_meta('form1'))
+        self.change_producer.send_change(topics.FORM_SQL, _change_meta('form2'))
+        self.assertEqual(kafka.flushes, 2)
+
+    def test_batch_flushes_once(self, queue_for_retry):
+        self.change_producer._producer = kafka = FakeKafkaProducer()
+        with self.change_producer.batched():
+            with self.change_producer.batched():
+                self.change_producer.send_change(topics.FORM_SQL, _change_meta('form1'))
+            self.change_producer.send_change(topics.CASE_SQL, _change_meta('case1'))
+            self.assertEqual(kafka.flushes, 0)
+        self.assertEqual(kafka.sent, ['form1', 'case1'])
+        self.assertEqual(kafka.flushes, 1)
+        self.assertFalse(queue_for_retry.called)
+
+        # changes are no longer batched
+        self.change_producer.send_change(topics.FORM_SQL, _change_meta('form2'))
+        self.assertEqual(kafka.flushes, 2)
+
+    def test_failed_deliveries_are_queued_for_retry(self, queue_for_retry):
+        self.change_producer._producer = FakeKafkaProducer(fail_ids=['case1'])
+        with self.change_producer.batched():
+            self.change_producer.send_change(topics.FORM_SQL, _change_meta('form1'))
+            self.change_producer.send_change(topics.CASE_SQL, _change_meta('case1'))
+        self.assertEqual(queue_for_retry.call_count, 1)
+        topic, change_meta, exception = queue_for_retry.call_args[0]
+        self.assertEqual((topic, change_meta.document_id), (topics.CASE_SQL, 'case1'))
+        self.assertIsInstance(exception, KafkaError)
+
+    def test_undelivered_changes_are_queued_for_retry(self, queue_for_retry):
+        kafka = FakeKafkaProducer()
+        kafka.flush = lambda timeout=None: None
+        self.change_producer._producer = kafka
+        with self.change_producer.batched():
+            self.change_producer.send_change(topics.FORM_SQL, _change_meta('form1'))
+        self.assertEqual(queue_for_retry.call_count, 1)
+
+    def test_delivered_flushes_inside_batch(self, queue_for_retry):
+        self.change_producer._producer = kafka = FakeKafkaProducer()
+        with self.change_producer.batched():
+            self.change_producer.send_change(topics.CASE_SQL, _change_meta('case1'))
+            with self.change_producer.delivered():
+                self.change_producer.send_change(topics.FORM_SQL, _change_meta('form1'))
+            self.assertEqual(kafka.flushes, 1)
+            # the outer batch is still open
+            self.change_producer.send_change(topics.CASE_SQL, _change_meta('case2'))
+            self.assertEqual(kafka.flushes, 1)
+        self.assertEqual(kafka.flushes, 2)
+        self.assertFalse(queue_for_retry.called)
+
+    def test_delivered_raises_delivery_errors(self, queue_for_retry):
+        self.change_producer._producer = FakeKafkaProducer(fail_ids=['form1'])
+        with self.change_producer.batched():
+            with self.assertRaises(KafkaError):
+                with self.change_producer.delivered():
+                    self.change_producer.send_change(topics.FORM_SQL, _change_meta('form1'))
+        self.assertFalse(queue_for_retry.called)
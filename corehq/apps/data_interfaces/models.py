@@ -62,7 +62,7 @@ from django.conf import settings
 from django.contrib.postgres.fields import JSONField
 from django.db import models, transaction
 from django.db.models import Q
-from corehq.apps.hqcase.utils import update_case
+from corehq.apps.hqcase.utils import bulk_update_cases, update_case
 from corehq.form_processor.models import CommCareCaseSQL, CommCareCaseIndexSQL
 from django.utils.translation import ugettext_lazy
 from jsonobject.api import JsonObject
@@ -72,6 +72,10 @@ import six
 ALLOWED_DATE_REGEX = re.compile(r'^\d{4}-\d{2}-\d{2}')
 AUTO_UPDATE_XMLNS = 'http://commcarehq.org/hq_case_update_rule'
 
+# CommCareCaseSQL.get_case_property() reads these from the model's fields
+# when they aren't in case_json
+_CASE_SQL_FIELD_NAMES = {field.name for field in CommCareCaseSQL._meta.fields}
+
 
 def _try_date_conversion(date_or_string):
     if isinstance(date_or_string, bytes):
@@ -481,14 +485,93 @@ class AutomaticUpdateRule(models.Model):
         return date
 
     @classmethod
-    def get_case_ids(cls, domain, case_type, boundary_date=None, db=None):
+    def get_case_sql_filter_for_rules(cls, rules, now):
+        """
+        Returns a (sql, params) WHERE clause for CommCareCaseSQL that keeps
+        every case any of the rules could match, or None if all cases of the
+        rules' case type have to be checked.
+        """
+        sql_filters = [rule.get_case_sql_filter(now) for rule in rules]
+        if not sql_filters or None in sql_filters:
+            return None
+
+        params = []
+        for sql, rule_params in sql_filters:
+            params.extend(rule_params)
+        return ' OR '.join('({})'.format(sql) for sql, rule_params in sql_filters), params
+
+    def get_case_sql_filter(self, now):
+        """
+        Returns a (sql, params) WHERE clause for CommCareCaseSQL that keeps
+        every open case of this rule's case type that criteria_match() could
+        return True for, or None if no criteria can be checked in SQL.
+
+        The clause only narrows down the cases to check: cases it keeps are
+        still checked with criteria_match().
+        """
+        clauses = []
+        params = []
+        if self.filter_on_server_modified:
+            clauses.append('"{}"."server_modified_on" <= %s'.format(CommCareCaseSQL._meta.db_table))
+            params.append(now - timedelta(days=self.server_modified_boundary))
+
+        for criteria in self.memoized_criteria:
+            sql_filter = criteria.definition.get_case_sql_filter(now)
+            if sql_filter is not None:
+                sql, criteria_params = sql_filter
+                clauses.append(sql)
+                params.extend(criteria_params)
+
+        if not clauses:
+            return None
+        return ' AND '.join('({})'.format(sql) for sql in clauses), params
+
+    @property
+    def can_run_in_batches(self):
+        """
+        True if run_rule_for_cases() can update the cases this rule matches
+        in one form. Its criteria and updates must only involve the case
+        itself, so that updating one case can't change what happens to the
+        others.
+        """
+        if self.references_parent_case:
+            return False
+
+        for criterion in self.memoized_criteria:
+            definition = criterion.definition
+            if not isinstance(definition, MatchPropertyDefinition) or '/' in definition.property_name:
+                return False
+
+        for action in self.memoized_actions:
+            definition = action.definition
+            if not isinstance(definition, UpdateCaseDefinition):
+                return False
+            for property_definition in definition.get_properties_to_update():
+                if '/' in property_definition.name:
+                    return False
+                if (
+                    property_definition.value_type == UpdateCaseDefinition.VALUE_TYPE_CASE_PROPERTY and
+                    '/' in property_definition.value
+                ):
+                    return False
+
+        return True
+
+    @classmethod
+    def get_case_ids(cls, domain, case_type, boundary_date=None, db=None, case_sql_filter=None):
+        """
+        :param case_sql_filter: A (sql, params) WHERE clause, as returned by
+        get_case_sql_filter_for_rules(), to filter the cases on. Only used
+        for domains on the SQL backend.
+        """
         if should_use_sql_backend(domain):
-            return cls._get_case_ids_from_postgres(domain, case_type, boundary_date=boundary_date, db=db)
+            return cls._get_case_ids_from_postgres(domain, case_type, boundary_date=boundary_date, db=db,
+                case_sql_filter=case_sql_filter)
         else:
             return cls._get_case_ids_from_es(domain, case_type, boundary_date=boundary_date)
 
     @classmethod
-    def _get_case_ids_from_postgres(cls, domain, case_type, boundary_date=None, db=None):
+    def _get_case_ids_from_postgres(cls, domain, case_type, boundary_date=None, db=None, case_sql_filter=None):
         q_expression = Q(
             domain=domain,
             type=case_type,
@@ -499,7 +582,15 @@ class AutomaticUpdateRule(models.Model):
         if boundary_date:
             q_expression = q_expression & Q(server_modified_on__lte=boundary_date)
 
-        if db:
+        if case_sql_filter:
+            sql, params = case_sql_filter
+            dbs = [db] if db else get_db_aliases_for_partitioned_query()
+            for db_alias in dbs:
+                queryset = (CommCareCaseSQL.objects.using(db_alias).filter(q_expression)
+                            .extra(where=[sql], params=params))
+                for c_id in queryset.values_list('case_id', flat=True):
+                    yield c_id
+        elif db:
             for c_id in CommCareCaseSQL.objects.using(db).filter(q_expression).values_list('case_id', flat=True):
                 yield c_id
         else:
@@ -627,6 +718,53 @@ class AutomaticUpdateRule(models.Model):
     def run_actions_when_case_matches(self, case):
         return self._run_method_on_action_definitions(case, 'when_case_matches')
 
+    def run_rule_for_cases(self, cases, now):
+        """
+        Runs the rule against each of the cases, like run_rule(), but
+        updates all the cases that match in one form. Only for rules where
+        can_run_in_batches is True.
+
+        :return: A tuple of the CaseRuleActionResult object aggregating the
+        results for all the cases, and the ids of the cases that were
+        updated or closed.
+        """
+        if self.deleted:
+            raise self.RuleError("Attempted to call run_rule_for_cases on a deleted rule")
+
+        if not self.active:
+            raise self.RuleError("Attempted to call run_rule_for_cases on an inactive rule")
+
+        aggregated_result = CaseRuleActionResult()
+        case_changes = []
+        for case in cases:
+            if not isinstance(case, (CommCareCase, CommCareCaseSQL)) or case.domain != self.domain:
+                raise self.RuleError("Invalid case given")
+
+            if not self.criteria_match(case, now):
+                continue
+
+            properties = {}
+            close = False
+            for action in self.memoized_actions:
+                definition = action.definition
+                case_properties = definition.get_cases_to_update(case).get(case.case_id, {})
+                properties.update(case_properties)
+                close = close or definition.close_case
+                aggregated_result.add_result(CaseRuleActionResult(
+                    num_updates=1 if case_properties else 0,
+                    num_closes=1 if definition.close_case else 0,
+                ))
+
+            if properties or close:
+                case_changes.append((case.case_id, properties, close))
+
+        if case_changes:
+            xform, updated_cases = bulk_update_cases(self.domain, case_changes, device_id=None,
+                xmlns=AUTO_UPDATE_XMLNS, user_id=SYSTEM_USER_ID)
+            self.log_submission(xform.form_id)
+
+        return aggregated_result, [case_id for case_id, properties, close in case_changes]
+
     def run_actions_when_case_does_not_match(self, case):
         return self._run_method_on_action_definitions(case, 'when_case_does_not_match')
 
@@ -740,6 +878,14 @@ class CaseRuleCriteriaDefinition(models.Model):
     def matches(self, case, now):
         raise NotImplementedError()
 
+    def get_case_sql_filter(self, now):
+        """
+        Returns a (sql, params) WHERE clause for CommCareCaseSQL that keeps
+        every case matches() could return True for, or None if it can't be
+        checked in SQL.
+        """
+        return None
+
 
 class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
     # True when today < (the date in property_name + property_value days)
@@ -858,6 +1004,47 @@ class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
 
         return False
 
+    def get_case_sql_filter(self, now):
+        name = self.property_name
+        if '/' in name or name == '_id' or name in _CASE_SQL_FIELD_NAMES:
+            # only properties that get_case_values() reads from case_json
+            return None
+
+        value_sql = '"{}"."case_json"::jsonb -> %s'.format(CommCareCaseSQL._meta.db_table)
+        text_sql = '"{}"."case_json"::jsonb ->> %s'.format(CommCareCaseSQL._meta.db_table)
+        if self.match_type == self.MATCH_EQUAL and self.property_value is not None:
+            return '({}) = to_jsonb(%s::text)'.format(value_sql), [name, self.property_value]
+        elif self.match_type == self.MATCH_NOT_EQUAL and self.property_value is not None:
+            return '({}) IS DISTINCT FROM to_jsonb(%s::text)'.format(value_sql), [name, self.property_value]
+        elif self.match_type == self.MATCH_HAS_VALUE:
+            return "NULLIF(btrim({}), '') IS NOT NULL".format(text_sql), [name]
+        elif self.match_type in (self.MATCH_DAYS_BEFORE, self.MATCH_DAYS_AFTER):
+            return self._get_date_sql_filter(text_sql, now)
+        elif self.match_type == self.MATCH_REGEX:
+            return '({}) IS NOT NULL'.format(text_sql), [name]
+        return None
+
+    def _get_date_sql_filter(self, text_sql, now):
+        date_sql = r"({text_sql}) ~ '^\d{{4}}-\d{{2}}-\d{{2}}'".format(text_sql=text_sql)
+        try:
+            days = int(self.property_value)
+        except (ValueError, TypeError):
+            return date_sql, [self.property_name]
+
+        # Compare the date the value starts with, allowing for its time and
+        # timezone, which are only applied when the value is parsed
+        if self.match_type == self.MATCH_DAYS_BEFORE:
+            comparison = '>='
+            boundary = now - timedelta(days=days + 2)
+        else:
+            comparison = '<='
+            boundary = now - timedelta(days=days - 1)
+        return (
+            '{date_sql} AND left({text_sql}, 10) {comparison} %s'.format(
+                date_sql=date_sql, text_sql=text_sql, comparison=comparison),
+            [self.property_name, self.property_name, boundary.strftime('%Y-%m-%d')],
+        )
+
     def matches(self, case, now):
         return {
             self.MATCH_DAYS_BEFORE: self.check_days_before,
@@ -909,6 +1096,17 @@ class ClosedParentDefinition(CaseRuleCriteriaDefinition):
 
         return False
 
+    def get_case_sql_filter(self, now):
+        # parent cases may be in another shard, so only check that the case has a parent
+        return (
+            'EXISTS (SELECT 1 FROM "{index_table}" WHERE "{index_table}"."case_id" = "{case_table}"."case_id" '
+            'AND "{index_table}"."identifier" = %s AND "{index_table}"."relationship_id" = %s)'.format(
+                index_table=CommCareCaseIndexSQL._meta.db_table,
+                case_table=CommCareCaseSQL._meta.db_table,
+            ),
+            [self.identifier, self.relationship_id],
+        )
+
 
 class CaseRuleAction(models.Model):
     rule = models.ForeignKey('AutomaticUpdateRule', on_delete=models.PROTECT)
@@ -1050,7 +1248,11 @@ class UpdateCaseDefinition(CaseRuleActionDefinition):
 
         self.properties_to_update = result
 
-    def when_case_matches(self, case, rule):
+    def get_cases_to_update(self, case):
+        """
+        Returns {case_id: {name: value}} of the properties to update on the
+        case and on the cases it references
+        """
         cases_to_update = defaultdict(dict)
 
         def _get_case_property_value(current_case, name):
@@ -1093,6 +1295,10 @@ class UpdateCaseDefinition(CaseRuleActionDefinition):
             if value != _get_case_property_value(case, prop.name):
                 _add_update_property(prop.name, value, case)
 
+        return cases_to_update
+
+    def when_case_matches(self, case, rule):
+        cases_to_update = self.get_cases_to_update(case)
         num_updates = 0
         num_closes = 0
         num_related_updates = 0
@@ -23,9 +23,11 @@ from django.utils.translation import ugettext as _
 
 from corehq.apps.data_interfaces.utils import add_cases_to_case_group, archive_forms_old, archive_or_restore_forms
 from corehq.sql_db.util import get_db_aliases_for_partitioned_query
+from corehq.toggles import SET_BASED_CASE_UPDATE_RULES
 from .interfaces import FormManagementMode, BulkFormManagementInterface
 from .dispatcher import EditDataInterfaceDispatcher
 from corehq.util.log import send_HTML_email
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import CriticalSection
 from dimagi.utils.logging import notify_error
 import six
@@ -34,6 +36,7 @@ import six
 logger = get_task_logger('data_interfaces')
 ONE_HOUR = 60 * 60
 HALT_AFTER = 23 * 60 * 60
+CASE_RULE_BATCH_SIZE = 100
 
 
 @task(serializer='pickle', ignore_result=True)
@@ -105,6 +108,27 @@ def run_rules_for_case(case, rules, now):
     return aggregated_result
 
 
+def run_rules_for_cases(cases, rules, now):
+    """
+    Runs the rules against a batch of cases like run_rules_for_case(), but
+    each rule updates all the cases it matches in one form. All the rules
+    must be able to run in batches.
+    """
+    aggregated_result = CaseRuleActionResult()
+    for rule in rules:
+        result, updated_case_ids = rule.run_rule_for_cases(cases, now)
+        aggregated_result.add_result(result)
+        if updated_case_ids:
+            # closed cases don't match any further rules
+            updated_cases = {
+                case.case_id: case
+                for case in CaseAccessors(rule.domain).get_cases(updated_case_ids)
+            }
+            cases = [updated_cases.get(case.case_id, case) for case in cases]
+
+    return aggregated_result
+
+
 def check_data_migration_in_progress(domain, last_migration_check_time):
     utcnow = datetime.utcnow()
     if last_migration_check_time is None or (utcnow - last_migration_check_time) > timedelta(minutes=1):
@@ -149,11 +173,21 @@ def run_case_update_rules_for_domain_and_db(domain, now, run_id, db=None):
     all_rules = list(AutomaticUpdateRule.by_domain(domain, AutomaticUpdateRule.WORKFLOW_CASE_UPDATE))
     rules_by_case_type = AutomaticUpdateRule.organize_rules_by_case_type(all_rules)
 
+    set_based = SET_BASED_CASE_UPDATE_RULES.enabled(domain)
+
     for case_type, rules in six.iteritems(rules_by_case_type):
         boundary_date = AutomaticUpdateRule.get_boundary_date(rules, now)
-        case_ids = list(AutomaticUpdateRule.get_case_ids(domain, case_type, boundary_date, db=db))
+        case_sql_filter = AutomaticUpdateRule.get_case_sql_filter_for_rules(rules, now) if set_based else None
+        case_ids = list(AutomaticUpdateRule.get_case_ids(domain, case_type, boundary_date, db=db,
+            case_sql_filter=case_sql_filter))
+
+        cases = CaseAccessors(domain).iter_cases(case_ids)
+        if set_based and all(rule.can_run_in_batches for rule in rules):
+            batches = chunked(cases, CASE_RULE_BATCH_SIZE)
+        else:
+            batches = ([case] for case in cases)
 
-        for case in CaseAccessors(domain).iter_cases(case_ids):
+        for batch in batches:
             migration_in_progress, last_migration_check_time = check_data_migration_in_progress(domain,
                 last_migration_check_time)
 
@@ -168,8 +202,11 @@ def run_case_update_rules_for_domain_and_db(domain, now, run_id, db=None):
                 notify_error("Halting rule run for domain %s." % domain)
                 return
 
-            case_update_result.add_result(run_rules_for_case(case, rules, now))
-            cases_checked += 1
+            if len(batch) == 1:
+                case_update_result.add_result(run_rules_for_case(batch[0], rules, now))
+            else:
+                case_update_result.add_result(run_rules_for_cases(batch, rules, now))
+            cases_checked += len(batch)
 
     run = DomainCaseRuleRun.done(run_id, DomainCaseRuleRun.STATUS_FINISHED, cases_checked, case_update_result,
         db=db)
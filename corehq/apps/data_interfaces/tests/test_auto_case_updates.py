@@ -29,15 +29,17 @@ from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors, FormAccessors
 from corehq.form_processor.tests.utils import (
     run_with_all_backends,
-    set_case_property_directly
+    set_case_property_directly,
+    use_sql_backend,
 )
 from corehq.form_processor.utils.general import should_use_sql_backend
 from corehq.form_processor.signals import sql_case_post_save
 
-from corehq.util.test_utils import set_parent_case as set_actual_parent_case
+from corehq.util.test_utils import flag_enabled, set_parent_case as set_actual_parent_case
 from django.test import TestCase, override_settings
 from mock import patch
 
+from corehq.sql_db.util import get_db_alias_for_partitioned_doc
 from corehq.util.context_managers import drop_connected_signals
 from corehq.toggles import NAMESPACE_DOMAIN, RUN_AUTO_CASE_UPDATES_ON_SAVE
 from corehq.apps import hqcase
@@ -1092,6 +1094,231 @@ class CaseRuleEndToEndTests(BaseCaseRuleTest):
                 self.assertLastRuleRun(1)
 
 
+@use_sql_backend
+class SetBasedCaseRuleTest(BaseCaseRuleTest):
+
+    @classmethod
+    def setUpClass(cls):
+        super(SetBasedCaseRuleTest, cls).setUpClass()
+        cls.domain_object = Domain(name=cls.domain)
+        cls.domain_object.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.domain_object.delete()
+        super(SetBasedCaseRuleTest, cls).tearDownClass()
+
+    def setUp(self):
+        super(SetBasedCaseRuleTest, self).setUp()
+        self.case_ids = []
+
+    def tearDown(self):
+        CaseAccessorSQL.hard_delete_cases(self.domain, self.case_ids)
+        super(SetBasedCaseRuleTest, self).tearDown()
+
+    def _create_case(self, **properties):
+        with drop_connected_signals(case_post_save), drop_connected_signals(sql_case_post_save):
+            case = CaseFactory(self.domain).create_case(case_type='person', update=properties)
+        self.case_ids.append(case.case_id)
+        return case
+
+    def _get_filtered_case_ids(self, rules, now):
+        case_sql_filter = AutomaticUpdateRule.get_case_sql_filter_for_rules(rules, now)
+        self.assertIsNotNone(case_sql_filter)
+        return set(AutomaticUpdateRule.get_case_ids(self.domain, 'person', case_sql_filter=case_sql_filter))
+
+    def assertFilteredCases(self, rule, now, expected_cases):
+        cases = CaseAccessors(self.domain).get_cases(self.case_ids)
+        matching_case_ids = {case.case_id for case in cases if rule.criteria_match(case, now)}
+        filtered_case_ids = self._get_filtered_case_ids([rule], now)
+        self.assertTrue(matching_case_ids <= filtered_case_ids)
+        self.assertEqual(filtered_case_ids, {case.case_id for case in expected_cases})
+
+    def _add_update_action(self, rule, close_case=False, **properties):
+        _, definition = rule.add_action(UpdateCaseDefinition, close_case=close_case)
+        definition.set_properties_to_update([
+            UpdateCaseDefinition.PropertyDefinition(
+                name=name,
+                value_type=UpdateCaseDefinition.VALUE_TYPE_EXACT,
+                value=value,
+            )
+            for name, value in properties.items()
+        ])
+        definition.save()
+
+    def test_filter_equal(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            property_value='negative',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        negative = self._create_case(result='negative')
+        self._create_case(result='x')
+        self._create_case()
+        self.assertFilteredCases(rule, datetime.utcnow(), [negative])
+
+    def test_filter_not_equal(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            property_value='negative',
+            match_type=MatchPropertyDefinition.MATCH_NOT_EQUAL,
+        )
+        self._create_case(result='negative')
+        other = self._create_case(result='x')
+        missing = self._create_case()
+        self.assertFilteredCases(rule, datetime.utcnow(), [other, missing])
+
+    def test_filter_has_value(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            match_type=MatchPropertyDefinition.MATCH_HAS_VALUE,
+        )
+        with_value = self._create_case(result='x')
+        self._create_case(result=' ')
+        self._create_case()
+        self.assertFilteredCases(rule, datetime.utcnow(), [with_value])
+
+    def test_filter_days_after(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='last_visit_date',
+            property_value='5',
+            match_type=MatchPropertyDefinition.MATCH_DAYS_AFTER,
+        )
+        matching = self._create_case(last_visit_date='2017-01-10')
+        with_time = self._create_case(last_visit_date='2017-01-15T23:00:00+05:00')
+        # within a day of the boundary, so left to criteria_match
+        close_to_boundary = self._create_case(last_visit_date='2017-01-16')
+        self._create_case(last_visit_date='2017-02-01')
+        self._create_case(last_visit_date='not a date')
+        self._create_case()
+        self.assertFilteredCases(rule, datetime(2017, 1, 20), [matching, with_time, close_to_boundary])
+
+    def test_filter_days_before(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='last_visit_date',
+            property_value='5',
+            match_type=MatchPropertyDefinition.MATCH_DAYS_BEFORE,
+        )
+        self._create_case(last_visit_date='2017-01-10')
+        close_to_boundary = self._create_case(last_visit_date='2017-01-13')
+        matching = self._create_case(last_visit_date='2017-01-18')
+        self._create_case()
+        self.assertFilteredCases(rule, datetime(2017, 1, 20), [close_to_boundary, matching])
+
+    def test_filter_closed_parent(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(ClosedParentDefinition)
+        parent = self._create_case()
+        child = self._create_case()
+        child = set_parent_case(self.domain, child, parent)
+        self.assertFilteredCases(rule, datetime.utcnow(), [child])
+
+    def test_filter_server_modified(self):
+        rule = _create_empty_rule(self.domain)
+        rule.filter_on_server_modified = True
+        rule.server_modified_boundary = 10
+        rule.save()
+        old = self._create_case()
+        _update_case(self.domain, old.case_id, datetime(2017, 1, 1))
+        new = self._create_case()
+        _update_case(self.domain, new.case_id, datetime(2017, 1, 19))
+        self.assertFilteredCases(rule, datetime(2017, 1, 20), [old])
+
+    def test_no_filter(self):
+        rule1 = _create_empty_rule(self.domain)
+        rule1.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            property_value='negative',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        rule2 = _create_empty_rule(self.domain)
+        rule2.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            match_type=MatchPropertyDefinition.MATCH_HAS_NO_VALUE,
+        )
+        now = datetime.utcnow()
+        self.assertIsNotNone(AutomaticUpdateRule.get_case_sql_filter_for_rules([rule1], now))
+        self.assertIsNone(AutomaticUpdateRule.get_case_sql_filter_for_rules([rule2], now))
+        self.assertIsNone(AutomaticUpdateRule.get_case_sql_filter_for_rules([rule1, rule2], now))
+
+    def test_can_run_in_batches(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            property_value='negative',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        self._add_update_action(rule, status='done')
+        self.assertTrue(rule.can_run_in_batches)
+
+        parent_rule = _create_empty_rule(self.domain)
+        self._add_update_action(parent_rule, **{'parent/status': 'done'})
+        self.assertFalse(parent_rule.can_run_in_batches)
+
+        custom_rule = _create_empty_rule(self.domain)
+        custom_rule.add_action(
+            CustomActionDefinition,
+            name='CUSTOM_ACTION_TEST',
+        )
+        self.assertFalse(custom_rule.can_run_in_batches)
+
+    @flag_enabled('SET_BASED_CASE_UPDATE_RULES')
+    def test_batched_run(self):
+        rule1 = _create_empty_rule(self.domain)
+        rule1.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            property_value='negative',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        self._add_update_action(rule1, status='done')
+
+        # matches the cases updated by rule1
+        rule2 = _create_empty_rule(self.domain)
+        rule2.add_criteria(
+            MatchPropertyDefinition,
+            property_name='status',
+            property_value='done',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        self._add_update_action(rule2, close_case=True)
+
+        negative_cases = [self._create_case(result='negative') for i in range(3)]
+        other_case = self._create_case(result='x')
+
+        run_case_update_rules_for_domain(self.domain)
+
+        # one form for each rule in each shard
+        num_dbs = len({get_db_alias_for_partitioned_doc(case.case_id) for case in negative_cases})
+        self.assertEqual(CaseRuleSubmission.objects.filter(rule=rule1).count(), num_dbs)
+        self.assertEqual(CaseRuleSubmission.objects.filter(rule=rule2).count(), num_dbs)
+        for case in CaseAccessors(self.domain).get_cases([case.case_id for case in negative_cases]):
+            self.assertEqual(case.get_case_property('status'), 'done')
+            self.assertTrue(case.closed)
+        other_case = CaseAccessors(self.domain).get_case(other_case.case_id)
+        self.assertIsNone(other_case.get_case_property('status'))
+        self.assertFalse(other_case.closed)
+
+        last_run = DomainCaseRuleRun.objects.filter(domain=self.domain).order_by('-finished_on')[0]
+        self.assertEqual(last_run.status, DomainCaseRuleRun.STATUS_FINISHED)
+        self.assertEqual(last_run.cases_checked, 3)
+        self.assertEqual(last_run.num_updates, 3)
+        self.assertEqual(last_run.num_closes, 3)
+
+
 class TestParentCaseReferences(BaseCaseRuleTest):
 
     def test_closed_parent_criteria(self):
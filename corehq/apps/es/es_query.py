@@ -111,6 +111,7 @@ from corehq.elastic import (
     ES_DEFAULT_INSTANCE,
     ESError,
     run_query,
+    parallel_scroll_query,
     scroll_query,
     SIZE_LIMIT,
     ScanResult,
@@ -233,15 +234,22 @@ class ESQuery(object):
             query = query.size(0)
         return query
 
-    def scroll(self):
+    def scroll(self, max_workers=1):
         """
         Run the query against the scroll api. Returns an iterator yielding each
         document that matches the query.
+
+        With max_workers > 1 the shards of the index are scrolled in parallel,
+        and documents are yielded in no particular order.
         """
         query = deepcopy(self)
         if query._size is None:
             query._size = SCROLL_PAGE_SIZE_LIMIT
-        result = scroll_query(query.index, query.raw_query, es_instance_alias=self.es_instance_alias)
+        if max_workers > 1:
+            result = parallel_scroll_query(query.index, query.raw_query,
+                                           es_instance_alias=self.es_instance_alias, max_workers=max_workers)
+        else:
+            result = scroll_query(query.index, query.raw_query, es_instance_alias=self.es_instance_alias)
         return ScanResult(
             result.count,
             (ESQuerySet.normalize_result(query, r) for r in result)
@@ -484,9 +492,9 @@ class ESQuery(object):
         For very large sets of IDs, use ``scroll_ids`` instead"""
         return self.exclude_source().run().doc_ids
 
-    def scroll_ids(self):
+    def scroll_ids(self, max_workers=1):
         """Returns a generator of all matching ids"""
-        return self.exclude_source().size(5000).scroll()
+        return self.exclude_source().size(5000).scroll(max_workers=max_workers)
 
 
 class ESQuerySet(object):
@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import itertools
+import threading
+import time
+
+
+class ElasticsearchClientFake(object):
+    """
+    Stand-in for the parts of the elasticsearch client used by
+    ``corehq.elastic.scan`` and ``corehq.elastic.parallel_scan``.
+
+    Documents are spread over the given number of shards. Every request
+    sleeps for ``latency`` seconds, plus ``hit_latency`` seconds for each hit
+    it returns, to mimic a round trip to the cluster.
+    Queries are ignored: every scroll returns all the documents.
+    """
+
+    def __init__(self, docs, num_shards=5, latency=0, hit_latency=0):
+        self.num_shards = num_shards
+        self.latency = latency
+        self.hit_latency = hit_latency
+        self.shards = [docs[shard::num_shards] for shard in range(num_shards)]
+        self._scrolls = {}
+        self._scroll_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def count(self, index=None, doc_type=None, body=None):
+        self._wait()
+        return {'count': sum(len(docs) for docs in self.shards)}
+
+    def search_shards(self, index=None):
+        return {'shards': [
+            [{'index': index, 'shard': shard, 'primary': True}]
+            for shard in range(self.num_shards)
+        ]}
+
+    def search(self, body=None, scroll=None, search_type=None, preference=None, **kwargs):
+        self._wait()
+        if preference:
+            shards = [int(preference[len('_shards:'):])]
+        else:
+            shards = list(range(self.num_shards))
+        docs = [doc for shard in shards for doc in self.shards[shard]]
+        # as with search_type=scan, size is the number of hits per shard
+        page_size = (body or {}).get('size', 10) * len(shards)
+        with self._lock:
+            scroll_id = 'scroll-{}'.format(next(self._scroll_ids))
+            self._scrolls[scroll_id] = (docs, page_size, 0)
+        return {
+            '_scroll_id': scroll_id,
+            '_shards': {'total': len(shards), 'failed': 0},
+            'hits': {'total': len(docs), 'hits': []},
+        }
+
+    def scroll(self, scroll_id, scroll=None):
+        with self._lock:
+            docs, page_size, position = self._scrolls[scroll_id]
+            self._scrolls[scroll_id] = (docs, page_size, position + page_size)
+        self._wait(len(docs[position:position + page_size]))
+        return {
+            '_scroll_id': scroll_id,
+            '_shards': {'total': 1, 'failed': 0},
+            'hits': {
+                'total': len(docs),
+                'hits': [
+                    {'_id': doc['_id'], '_source': doc}
+                    for doc in docs[position:position + page_size]
+                ],
+            },
+        }
+
+    def _wait(self, hits=0):
+        delay = self.latency + self.hit_latency * hits
+        if delay:
+            time.sleep(delay)
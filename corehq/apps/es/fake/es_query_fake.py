@@ -160,7 +160,7 @@ class ESQueryFake(object):
             },
         }, self)
 
-    def scroll(self):
+    def scroll(self, max_workers=1):
         result_docs = list(self._result_docs)
         total = len(result_docs)
         if self._sort_field:
@@ -0,0 +1,61 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+from six.moves import range
+
+from corehq.apps.es.fake.client_fake import ElasticsearchClientFake
+from corehq.elastic import parallel_scan, scan
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the docs/sec of a single scroll (scan) with scrolling each shard
+    in parallel (parallel_scan) against an in-memory elasticsearch stand-in
+    with a simulated round trip time.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', type=int, default=200000)
+        parser.add_argument('--shards', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=1000,
+                            help='Hits per shard per scroll request')
+        parser.add_argument('--latency', type=float, default=0.02,
+                            help='Seconds per request')
+        parser.add_argument('--hit-latency', type=float, default=0.00002,
+                            help='Seconds per hit returned')
+        parser.add_argument('--consumer-latency', type=float, default=0,
+                            help='Seconds the consumer spends on each hit')
+
+    def handle(self, **options):
+        docs = [{'_id': 'doc{}'.format(i), 'form': {'question': i}} for i in range(options['docs'])]
+        client = ElasticsearchClientFake(
+            docs, options['shards'], latency=options['latency'], hit_latency=options['hit_latency']
+        )
+        query = {'query': {'match_all': {}}, 'size': options['page_size']}
+        print("{docs} docs, {shards} shards, {page_size} hits per shard per request".format(**options))
+
+        self._run_benchmark('scan', scan(client, query=query), options)
+        workers = 1
+        while workers <= options['shards']:
+            self._run_benchmark(
+                'parallel_scan, {} workers'.format(workers),
+                parallel_scan(client, 'benchmark', query=query, max_workers=workers),
+                options,
+            )
+            workers *= 2
+
+    def _run_benchmark(self, name, result, options):
+        consumer_latency = options['consumer_latency']
+        start = time.time()
+        count = 0
+        for hit in result:
+            count += 1
+            if consumer_latency:
+                time.sleep(consumer_latency)
+        elapsed = time.time() - start
+        print("{:<30} {:>8} docs in {:6.2f}s ({:.0f} docs/sec)".format(name, count, elapsed, count / elapsed))
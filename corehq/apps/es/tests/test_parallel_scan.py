@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from unittest import TestCase
+
+from corehq.apps.es.fake.client_fake import ElasticsearchClientFake
+from corehq.elastic import parallel_scan, scan
+
+
+class TestParallelScan(TestCase):
+
+    def setUp(self):
+        self.docs = [{'_id': 'doc{}'.format(i)} for i in range(2500)]
+        self.client = ElasticsearchClientFake(self.docs, num_shards=5)
+
+    def test_parallel_scan(self):
+        result = parallel_scan(self.client, 'forms', query={'size': 100}, max_workers=3)
+        self.assertEqual(result.count, 2500)
+        doc_ids = [hit['_id'] for hit in result]
+        self.assertEqual(len(doc_ids), 2500)
+        self.assertEqual(set(doc_ids), {doc['_id'] for doc in self.docs})
+
+    def test_matches_scan(self):
+        scan_ids = {hit['_id'] for hit in scan(self.client, query={'size': 100})}
+        parallel_scan_ids = {hit['_id'] for hit in parallel_scan(self.client, 'forms', query={'size': 100})}
+        self.assertEqual(scan_ids, parallel_scan_ids)
+
+    def test_stop_early(self):
+        hits = iter(parallel_scan(self.client, 'forms', query={'size': 10}, max_workers=5))
+        self.assertEqual(len([next(hits) for i in range(50)]), 50)
+        hits.close()
+
+    def test_shard_failure(self):
+        scroll = self.client.scroll
+
+        def fail_on_shard_2(scroll_id, scroll=None):
+            response = scroll(scroll_id)
+            if any(hit['_id'] == 'doc2' for hit in response['hits']['hits']):
+                raise ValueError('shard 2 failed')
+            return response
+        self.client.scroll = fail_on_shard_2
+
+        with self.assertRaises(ValueError):
+            list(parallel_scan(self.client, 'forms', query={'size': 100}))
@@ -93,6 +93,8 @@ FORM_EXPORT = 'form'
 CASE_EXPORT = 'case'
 SMS_EXPORT = 'sms'
 MAX_EXPORTABLE_ROWS = 100000
+# number of documents whose rows are computed and written together
+EXPORT_PAGE_SIZE = 500
 CASE_SCROLL_SIZE = 10000
 
 # When a question is missing completely from a form/case this should be the value
@@ -10,6 +10,7 @@ import datetime
 
 from couchdbkit import ResourceConflict
 
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 from soil import DownloadBase
 
@@ -32,7 +33,7 @@ from corehq.apps.export.models.new import (
     FormExportInstance,
     SMSExportInstance,
 )
-from corehq.apps.export.const import MAX_EXPORTABLE_ROWS
+from corehq.apps.export.const import EXPORT_PAGE_SIZE, MAX_EXPORTABLE_ROWS
 import six
 from io import open
 
@@ -117,6 +118,18 @@ class _ExportWriter(object):
             (table, [FormattedRow(data=row.data, hyperlink_column_indices=row.hyperlink_column_indices)])
         ])
 
+    def write_rows(self, table, rows):
+        """
+        Write a block of rows to the given table of the export.
+        _Writer must be opened first.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        self.writer.write_rows(table, [
+            FormattedRow(data=row.data, hyperlink_column_indices=row.hyperlink_column_indices)
+            for row in rows
+        ])
+
     def get_preview(self):
         return self.writer.get_preview()
 
@@ -257,16 +270,34 @@ class _PaginatedExportWriter(object):
         :param table: A TableConfiguration
         :param row: An ExportRow
         """
-        if self.rows_written[table] >= MAX_EXPORTABLE_ROWS * (self.pages[table] + 1):
-            self.pages[table] += 1
-            self.writer.add_table(
+        self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write a block of rows to the given table of the export, splitting
+        it across tables wherever a table fills up.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        start = 0
+        while start < len(rows):
+            page_end = MAX_EXPORTABLE_ROWS * (self.pages[table] + 1)
+            if self.rows_written[table] >= page_end:
+                self.pages[table] += 1
+                page_end += MAX_EXPORTABLE_ROWS
+                self.writer.add_table(
+                    self._paged_table_index(table),
+                    self._get_paginated_headers()[self._paged_table_index(table)][0],
+                    table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                )
+
+            block = rows[start:start + page_end - self.rows_written[table]]
+            self.writer.write_rows(
                 self._paged_table_index(table),
-                self._get_paginated_headers()[self._paged_table_index(table)][0],
-                table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                [FormattedRow(data=row.data) for row in block]
             )
-
-        self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
-        self.rows_written[table] += 1
+            self.rows_written[table] += len(block)
+            start += len(block)
 
 
 def get_export_writer(export_instances, temp_path, allow_pagination=True):
@@ -314,10 +345,11 @@ def get_export_file(export_instances, filters, temp_path, progress_tracker=None)
     return ExportFile(writer.path, writer.format)
 
 
-def get_export_documents(export_instance, filters):
-    # Pull doc ids from elasticsearch and stream to disk
+def get_export_documents(export_instance, filters, scroll_workers=1):
+    # Pull doc ids from elasticsearch and stream to disk,
+    # or scroll the docs from scroll_workers shards at once
     query = _get_export_query(export_instance, filters)
-    return iter_es_docs_from_query(query)
+    return iter_es_docs_from_query(query, max_workers=scroll_workers)
 
 
 def _get_export_query(export_instance, filters):
@@ -336,6 +368,9 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
     Write rows to the given open _Writer.
     Rows will be written to each table in the export instance for each of
     the given documents.
+
+    Documents are processed a page at a time: the rows of each table are
+    computed for the whole page and then written as one block.
     :param writer: An open _Writer
     :param export_instance: An ExportInstance
     :param documents: An iterable yielding documents
@@ -347,54 +382,72 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
 
     start = _time_in_milliseconds()
     total_bytes = 0
+    max_page_bytes = 0
     total_rows = 0
     compute_total = 0
     write_total = 0
     track_load = load_counter(export_instance.type, "export", export_instance.domain)
-
-    for row_number, doc in enumerate(documents):
-        total_bytes += sys.getsizeof(doc)
-        for table in export_instance.selected_tables:
+    row_builders = [
+        (table, table.get_row_builder(
+            split_columns=export_instance.split_multiselects,
+            transform_dates=export_instance.transform_dates,
+        ))
+        for table in export_instance.selected_tables
+    ]
+
+    row_number = 0
+    for page in chunked(documents, EXPORT_PAGE_SIZE):
+        page_bytes = sum(sys.getsizeof(doc) for doc in page)
+        total_bytes += page_bytes
+        max_page_bytes = max(max_page_bytes, page_bytes)
+        for table, get_rows in row_builders:
             compute_start = _time_in_milliseconds()
-            try:
-                rows = table.get_rows(
-                    doc,
-                    row_number,
-                    split_columns=export_instance.split_multiselects,
-                    transform_dates=export_instance.transform_dates,
-                )
-            except Exception as e:
-                notify_exception(None, "Error exporting doc", details={
-                    'domain': export_instance.domain,
-                    'export_instance_id': export_instance.get_id,
-                    'export_table': table.label,
-                    'doc_id': doc.get('_id'),
-                })
-                e.sentry_capture = False
-                raise
+            rows = _get_page_rows(export_instance, table, get_rows, page, row_number)
             compute_total += _time_in_milliseconds() - compute_start
 
             write_start = _time_in_milliseconds()
-            for row in rows:
-                # It might be bad to write one row at a time when you can do more (from a performance perspective)
-                # Regardless, we should handle the batching of rows in the _Writer class, not here.
-                writer.write(table, row)
+            writer.write_rows(table, rows)
             write_total += _time_in_milliseconds() - write_start
 
             total_rows += len(rows)
 
-        track_load()
+        row_number += len(page)
+        track_load(len(page))
         if progress_tracker:
-            DownloadBase.set_progress(progress_tracker, row_number + 1, documents.count)
+            DownloadBase.set_progress(progress_tracker, row_number, documents.count)
 
     end = _time_in_milliseconds()
     tags = ['format:{}'.format(writer.format)]
     _record_datadog_export_write_rows(write_total, total_bytes, total_rows, tags)
     _record_datadog_export_compute_rows(compute_total, total_bytes, total_rows, tags)
     _record_datadog_export_duration(end - start, total_bytes, total_rows, tags)
+    _record_datadog_export_throughput(end - start, total_rows, max_page_bytes, tags)
     _record_export_duration(end - start, export_instance)
 
 
+def _get_page_rows(export_instance, table, get_rows, page, first_row_number):
+    """
+    Return the rows of the given table for a page of documents
+    :param get_rows: A row builder from ``TableConfiguration.get_row_builder``
+    :param page: A list of documents
+    :param first_row_number: The index of the first document of the page in the export
+    """
+    rows = []
+    for row_number, doc in enumerate(page, first_row_number):
+        try:
+            rows.extend(get_rows(doc, row_number))
+        except Exception as e:
+            notify_exception(None, "Error exporting doc", details={
+                'domain': export_instance.domain,
+                'export_instance_id': export_instance.get_id,
+                'export_table': table.label,
+                'doc_id': doc.get('_id'),
+            })
+            e.sentry_capture = False
+            raise
+    return rows
+
+
 def _time_in_milliseconds():
     return int(time.time() * 1000)
 
@@ -411,6 +464,12 @@ def _record_datadog_export_duration(duration, doc_bytes, n_rows, tags):
     __record_datadog_export(duration, doc_bytes, n_rows, 'commcare.export_duration', tags)
 
 
+def _record_datadog_export_throughput(duration, n_rows, max_page_bytes, tags):
+    if duration:
+        datadog_histogram('commcare.export_rows_per_second', n_rows * 1000 // duration, tags=tags)
+    datadog_histogram('commcare.export_max_page_bytes', max_page_bytes, tags=tags)
+
+
 def __record_datadog_export(duration, doc_bytes, n_rows, metric, tags):
     # deprecated: datadog histograms used this way are usually meaningless
     # because they are aggregated on a 10s window (so unless you're constantly
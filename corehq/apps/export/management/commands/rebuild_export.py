@@ -30,6 +30,13 @@ class Command(BaseCommand):
             default=multiprocessing.cpu_count() - 1,
             help='Number of parallel processes to run.'
         )
+        parser.add_argument(
+            '--scroll-workers',
+            type=int,
+            dest='scroll_workers',
+            default=1,
+            help='Number of elasticsearch shards to scroll at once.'
+        )
 
     def handle(self, **options):
         if __debug__:
@@ -38,7 +45,8 @@ class Command(BaseCommand):
         export_id = options.pop('export_id')
         page_size = options.pop('page_size')
         processes = options.pop('processes')
+        scroll_workers = options.pop('scroll_workers')
 
-        rebuild_export_mutiprocess(export_id, processes, page_size)
+        rebuild_export_mutiprocess(export_id, processes, page_size, scroll_workers)
 
         self.stdout.write(self.style.SUCCESS('Rebuild Complete'))
@@ -277,6 +277,32 @@ class ExportColumn(DocumentSchema):
         path = [x.name for x in self.item.path[len(base_path):]]
         return self._transform(NestedDictGetter(path)(doc), doc, transform_dates)
 
+    def get_value_getter(self, base_path, transform_dates=False, split_column=False):
+        """
+        Return a function ``(domain, doc_id, doc, row_index)`` that returns the same value as
+        ``get_value`` with the remaining arguments bound. For plain columns the path to the
+        ExportItem is resolved here rather than for every document.
+        """
+        if type(self) is ExportColumn:
+            assert base_path == self.item.path[:len(base_path)], "ExportItem's path doesn't start with the base_path"
+            getter = NestedDictGetter([x.name for x in self.item.path[len(base_path):]])
+            transform = self._transform
+
+            def get_value(domain, doc_id, doc, row_index):
+                return transform(getter(doc), doc, transform_dates)
+        else:
+            def get_value(domain, doc_id, doc, row_index):
+                return self.get_value(
+                    domain,
+                    doc_id,
+                    doc,
+                    base_path,
+                    row_index=row_index,
+                    split_column=split_column,
+                    transform_dates=transform_dates,
+                )
+        return get_value
+
     def _transform(self, value, doc, transform_dates):
         """
         Transform the given value with the transform specified in self.item.transform.
@@ -488,38 +514,45 @@ class TableConfiguration(DocumentSchema):
         :param row_number: number indicating this documents index in the sequence of all documents in the export
         :return: List of ExportRows
         """
-        document_id = document.get('_id')
+        return self.get_row_builder(split_columns, transform_dates)(document, row_number)
+
+    def get_row_builder(self, split_columns=False, transform_dates=False):
+        """
+        Return a function ``(document, row_number)`` that returns the same ExportRows as
+        ``get_rows``. The selected columns and their paths are resolved once, so the function
+        can be applied to a page of documents at a time.
+        """
+        value_getters = [
+            col.get_value_getter(self.path, transform_dates=transform_dates, split_column=split_columns)
+            for col in self.selected_columns
+        ]
+        hyperlink_column_indices = self.get_hyperlink_column_indices(split_columns)
 
-        sub_documents = self._get_sub_documents(document, row_number, document_id=document_id)
+        def get_rows(document, row_number):
+            document_id = document.get('_id')
 
-        domain = document.get('domain')
+            sub_documents = self._get_sub_documents(document, row_number, document_id=document_id)
 
-        assert domain is not None, 'Form or Case must be associated with domain'
-        assert document_id is not None, 'Form or Case must have an id'
+            domain = document.get('domain')
 
-        rows = []
-        for doc_row in sub_documents:
-            doc, row_index = doc_row.doc, doc_row.row
+            assert domain is not None, 'Form or Case must be associated with domain'
+            assert document_id is not None, 'Form or Case must have an id'
 
-            row_data = []
-            for col in self.selected_columns:
-                val = col.get_value(
-                    domain,
-                    document_id,
-                    doc,
-                    self.path,
-                    row_index=row_index,
-                    split_column=split_columns,
-                    transform_dates=transform_dates,
-                )
-                if isinstance(val, list):
-                    row_data.extend(val)
-                else:
-                    row_data.append(val)
-            rows.append(ExportRow(
-                data=row_data, hyperlink_column_indices=self.get_hyperlink_column_indices(split_columns)
-            ))
-        return rows
+            rows = []
+            for doc_row in sub_documents:
+                doc, row_index = doc_row.doc, doc_row.row
+
+                row_data = []
+                for get_value in value_getters:
+                    val = get_value(domain, document_id, doc, row_index)
+                    if isinstance(val, list):
+                        row_data.extend(val)
+                    else:
+                        row_data.append(val)
+                rows.append(ExportRow(data=row_data, hyperlink_column_indices=hyperlink_column_indices))
+            return rows
+
+        return get_rows
 
     def get_column(self, item_path, item_doc_type, column_transform):
         """
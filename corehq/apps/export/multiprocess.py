@@ -117,7 +117,7 @@ class OutputPaginator(object):
         return RetryResult(self.page, self.path, self.page_size, 0)
 
 
-def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000):
+def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000, scroll_workers=1):
     assert num_processes > 0
 
     export_instance = get_properly_wrapped_export_instance(export_id)
@@ -127,15 +127,15 @@ def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000):
     paginator = OutputPaginator(export_id)
 
     logger.info('Starting data dump of {} docs'.format(total_docs))
-    run_multiprocess_exporter(exporter, filters, paginator, page_size)
+    run_multiprocess_exporter(exporter, filters, paginator, page_size, scroll_workers)
 
 
-def run_multiprocess_exporter(exporter, filters, paginator, page_size):
+def run_multiprocess_exporter(exporter, filters, paginator, page_size, scroll_workers=1):
     def _log_page_dumped(paginator):
         logger.info('  Dump page {} complete: {} docs'.format(paginator.page, paginator.page_size))
 
     with exporter, paginator:
-        for doc in get_export_documents(exporter.export_instance, filters):
+        for doc in get_export_documents(exporter.export_instance, filters, scroll_workers):
             paginator.write(doc)
             if paginator.page_size == page_size:
                 _log_page_dumped(paginator)
@@ -112,6 +112,15 @@ def get_cases_in_domain_by_external_id(domain, external_id):
     ).all()
 
 
+def get_cases_in_domain_by_external_ids(domain, external_ids):
+    return CommCareCase.view(
+        'cases_by_domain_external_id/view',
+        keys=[[domain, external_id] for external_id in external_ids],
+        reduce=False,
+        include_docs=True,
+    ).all()
+
+
 def get_all_case_owner_ids(domain):
     """
     Get all owner ids that are assigned to cases in a domain.
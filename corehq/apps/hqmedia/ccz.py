@@ -0,0 +1,159 @@
+"""
+Writing the files of an app to a CCZ
+
+Media files are fetched from the blob db by a bounded pool of threads,
+ahead of the zip writer, and are written to the zip in the order of the
+app's multimedia map.
+
+Stored multimedia never changes, and is identified by the hash of its
+content. When the shared drive is configured, each media file is kept in
+``SHARED_DRIVE_CONF.ccz_media_cache_dir`` after it is fetched, and later
+CCZs that include it copy it from there instead of fetching it again.
+Entries are named by content hash, so the directory can be cleared at any
+time.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import logging
+import os
+import re
+import tempfile
+import zipfile
+from collections import deque, namedtuple
+
+import six
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils.translation import ugettext as _
+
+from corehq.apps.hqmedia.utils import MULTIMEDIA_PREFIX
+from corehq.util.datadog.gauges import datadog_counter
+
+MULTIMEDIA_EXTENSIONS = ('.mp3', '.wav', '.jpg', '.png', '.gif', '.3gp', '.mp4', '.zip', )
+
+logger = logging.getLogger(__name__)
+
+
+class CachedMediaFile(namedtuple('CachedMediaFile', 'path')):
+    """A media file in the media cache, to be copied into the CCZ from disk"""
+
+
+def iter_media_files(media_objects, max_workers=None, cache_dir=None):
+    """
+    take as input the output of get_media_objects
+    and return an iterator of (path, data) tuples for the media files
+    as they should show up in the .zip
+    as well as a list of error messages
+
+    data is either the content of the file or a CachedMediaFile.
+    Up to max_workers files are fetched at once, ahead of the iterator.
+
+    as a side effect of implementation,
+    errors will not include all error messages until the iterator is exhausted
+
+    """
+    if max_workers is None:
+        max_workers = settings.CCZ_MEDIA_FETCH_CONCURRENCY
+    media_objects = list(media_objects)
+    errors = []
+
+    def _media_files():
+        fetched = _iter_concurrently(
+            lambda path_and_media: _fetch_media_file(path_and_media[1], cache_dir),
+            media_objects,
+            max_workers,
+        )
+        for (path, media), (data, error) in six.moves.zip(media_objects, fetched):
+            if error is not None:
+                errors.append("%(path)s produced an ERROR: %(error)s" % {
+                    'path': path,
+                    'error': error,
+                })
+            elif not isinstance(data, six.text_type):
+                yield path.replace(MULTIMEDIA_PREFIX, ""), data
+    return _media_files(), errors
+
+
+def _iter_concurrently(fn, items, max_workers):
+    """Yield fn(item) for each item, in order, computing up to
+    max_workers results at once and at most twice that many ahead"""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= max_workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _fetch_media_file(media, cache_dir):
+    """Return (data, error) for media"""
+    cache_path = _get_cache_path(media, cache_dir)
+    if cache_path and os.path.exists(cache_path):
+        datadog_counter('commcare.ccz.media_cache.hit')
+        return CachedMediaFile(cache_path), None
+    try:
+        data, content_type = media.get_display_file()
+    except NameError as e:
+        return None, e
+    if cache_path and not isinstance(data, six.text_type):
+        datadog_counter('commcare.ccz.media_cache.miss')
+        _write_cache_file(cache_path, data)
+    return data, None
+
+
+def _get_cache_path(media, cache_dir):
+    # media attached under a name other than its hash may not match it
+    if cache_dir and media.file_hash and media.attachment_id == media.file_hash:
+        return os.path.join(cache_dir, media.file_hash)
+    return None
+
+
+def _write_cache_file(cache_path, data):
+    # write to a temporary file and rename it, so that other processes
+    # never copy a partly written file into a CCZ
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.rename(tmp_path, cache_path)
+    except (IOError, OSError):
+        logger.exception("Could not add %s to the CCZ media cache", cache_path)
+
+
+class CCZWriter(object):
+    """
+    Writes files to a zip, recording what was written so that the zip can
+    be checked without reading it back
+    """
+
+    def __init__(self, zip_file, compression):
+        self.zip_file = zip_file
+        self.compression = compression
+        self.names = set()
+        self.media_suites = []
+
+    def write(self, path, data):
+        # don't compress multimedia files
+        extension = os.path.splitext(path)[1]
+        compression = zipfile.ZIP_STORED if extension in MULTIMEDIA_EXTENSIONS else self.compression
+        if isinstance(data, CachedMediaFile):
+            self.zip_file.write(data.path, path, compression)
+        else:
+            self.zip_file.writestr(path, data, compression)
+        self.names.add(path)
+        if re.search(r'\bmedia_suite.xml\b', path):
+            self.media_suites.append(data)
+
+    def get_missing_media_errors(self):
+        """Errors for media files in media_suite.xml that were not written"""
+        if len(self.media_suites) != 1:
+            return [_('Could not identify media_suite.xml in CCZ')]
+        from corehq.apps.app_manager.xform import parse_xml
+        parsed = parse_xml(self.media_suites[0])
+        resources = {node.text for node in
+                     parsed.findall("media/resource/location[@authority='local']")}
+        missing = [r for r in resources if re.sub(r'^\.\/', '', r) not in self.names]
+        return [_('Media file missing from CCZ: {}').format(r) for r in missing]
@@ -10,11 +10,12 @@ from celery.utils.log import get_task_logger
 from django.conf import settings
 import itertools
 import json
-import re
+import time
 import zipfile
 from corehq import toggles
 from corehq.apps.app_manager.dbaccessors import get_app
 from corehq.apps.hqmedia.cache import BulkMultimediaStatusCache
+from corehq.apps.hqmedia.ccz import CCZWriter
 from corehq.apps.hqmedia.models import CommCareMultimedia
 from corehq.util.files import file_extention_from_filename
 from dimagi.utils.logging import notify_exception
@@ -27,7 +28,8 @@ from soil.util import expose_file_download, expose_cached_download
 
 logging = get_task_logger(__name__)
 
-MULTIMEDIA_EXTENSIONS = ('.mp3', '.wav', '.jpg', '.png', '.gif', '.3gp', '.mp4', '.zip', )
+# seconds between progress updates while files are added to a zip
+PROGRESS_UPDATE_INTERVAL = 1
 
 
 @task(serializer='pickle')
@@ -173,32 +175,19 @@ def build_application_zip(include_multimedia_files, include_index_files, app,
 
         with open(fpath, 'wb') as tmp:
             with zipfile.ZipFile(tmp, "w") as z:
+                writer = CCZWriter(z, compression)
                 progress = initial_progress
+                last_progress_update = 0
                 for path, data in files:
-                    # don't compress multimedia files
-                    extension = os.path.splitext(path)[1]
-                    file_compression = zipfile.ZIP_STORED if extension in MULTIMEDIA_EXTENSIONS else compression
-                    z.writestr(path, data, file_compression)
+                    writer.write(path, data)
                     progress += file_progress / file_count
-                    DownloadBase.set_progress(build_application_zip, progress, 100)
+                    if time.time() - last_progress_update >= PROGRESS_UPDATE_INTERVAL:
+                        DownloadBase.set_progress(build_application_zip, progress, 100)
+                        last_progress_update = time.time()
 
         # Integrity check that all media files present in media_suite.xml were added to the zip
         if include_multimedia_files and include_index_files and toggles.CAUTIOUS_MULTIMEDIA.enabled(app.domain):
-            with open(fpath, 'rb') as tmp:
-                with zipfile.ZipFile(tmp, "r") as z:
-                    media_suites = [f for f in z.namelist() if re.search(r'\bmedia_suite.xml\b', f)]
-                    if len(media_suites) != 1:
-                        message = _('Could not identify media_suite.xml in CCZ')
-                        errors.append(message)
-                    else:
-                        with z.open(media_suites[0]) as media_suite:
-                            from corehq.apps.app_manager.xform import parse_xml
-                            parsed = parse_xml(media_suite.read())
-                            resources = {node.text for node in
-                                         parsed.findall("media/resource/location[@authority='local']")}
-                            names = z.namelist()
-                            missing = [r for r in resources if re.sub(r'^\.\/', '', r) not in names]
-                            errors += [_('Media file missing from CCZ: {}').format(r) for r in missing]
+            errors += writer.get_missing_media_errors()
 
         if errors:
             os.remove(fpath)
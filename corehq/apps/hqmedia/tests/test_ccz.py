@@ -0,0 +1,89 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import shutil
+import tempfile
+import zipfile
+
+from django.test import SimpleTestCase
+
+from corehq.apps.hqmedia.ccz import CachedMediaFile, CCZWriter, iter_media_files
+
+MEDIA_SUITE = b"""<suite>
+    <media path="../../commcare">
+        <resource id="media-1" version="1">
+            <location authority="local">./commcare/image.png</location>
+        </resource>
+        <resource id="media-2" version="1">
+            <location authority="local">./commcare/audio.mp3</location>
+        </resource>
+    </media>
+</suite>"""
+
+
+class FakeMedia(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.file_hash = hashlib.md5(data).hexdigest()
+        self.attachment_id = self.file_hash
+        self.fetches = 0
+
+    def get_display_file(self):
+        self.fetches += 1
+        return self.data, 'application/octet-stream'
+
+
+class CCZTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.media_objects = [
+            ('jr://file/commcare/media{}.png'.format(i), FakeMedia('image {}'.format(i).encode('utf-8')))
+            for i in range(20)
+        ]
+
+    def _get_media_files(self):
+        files, errors = iter_media_files(self.media_objects, max_workers=4, cache_dir=self.cache_dir)
+        files = list(files)
+        self.assertEqual(errors, [])
+        return files
+
+    def _write_zip(self, files):
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w') as z:
+            writer = CCZWriter(z, zipfile.ZIP_DEFLATED)
+            for path, data in files:
+                writer.write(path, data)
+        return writer, zipfile.ZipFile(output)
+
+    def test_media_files_in_order(self):
+        files = self._get_media_files()
+        self.assertEqual(
+            files,
+            [('commcare/media{}.png'.format(i), 'image {}'.format(i).encode('utf-8')) for i in range(20)]
+        )
+
+    def test_cached_media_files(self):
+        self._get_media_files()
+        files = self._get_media_files()
+        self.assertTrue(all(isinstance(data, CachedMediaFile) for path, data in files))
+        self.assertEqual([media.fetches for path, media in self.media_objects], [1] * 20)
+
+        writer, ccz = self._write_zip(files)
+        self.assertEqual(ccz.read('commcare/media7.png'), b'image 7')
+        self.assertEqual(ccz.getinfo('commcare/media7.png').compress_type, zipfile.ZIP_STORED)
+
+    def test_missing_media_errors(self):
+        writer, ccz = self._write_zip([
+            ('commcare/image.png', b'image'),
+            ('media_suite.xml', MEDIA_SUITE),
+        ])
+        self.assertEqual(writer.get_missing_media_errors(), ['Media file missing from CCZ: ./commcare/audio.mp3'])
+
+    def test_no_media_suite(self):
+        writer, ccz = self._write_zip([('commcare/image.png', b'image')])
+        self.assertEqual(writer.get_missing_media_errors(), ['Could not identify media_suite.xml in CCZ'])
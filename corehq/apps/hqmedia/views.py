@@ -45,13 +45,14 @@ from corehq.apps.case_importer.tracking.filestorage import TransientFileStore
 from corehq.apps.case_importer.util import open_spreadsheet_download_ref, get_spreadsheet, ALLOWED_EXTENSIONS
 from corehq.apps.domain.decorators import login_and_domain_required
 from corehq.apps.hqmedia.cache import BulkMultimediaStatusCache, BulkMultimediaStatusCacheNfs
+from corehq.apps.hqmedia.ccz import iter_media_files
 from corehq.apps.hqmedia.controller import (
     MultimediaBulkUploadController,
     MultimediaImageUploadController,
     MultimediaAudioUploadController,
     MultimediaVideoUploadController
 )
-from corehq.apps.hqmedia.models import CommCareImage, CommCareAudio, CommCareMultimedia, MULTIMEDIA_PREFIX, CommCareVideo
+from corehq.apps.hqmedia.models import CommCareImage, CommCareAudio, CommCareMultimedia, CommCareVideo
 from corehq.apps.hqmedia.tasks import (
     process_bulk_upload_zip,
     build_application_zip,
@@ -709,36 +710,6 @@ class RemoveLogoView(BaseMultimediaView):
         return HttpResponse()
 
 
-def iter_media_files(media_objects):
-    """
-    take as input the output of get_media_objects
-    and return an iterator of (path, data) tuples for the media files
-    as they should show up in the .zip
-    as well as a list of error messages
-
-    as a side effect of implementation,
-    errors will not include all error messages until the iterator is exhausted
-
-    """
-    from dimagi.utils.logging import notify_exception
-    errors = []
-
-    def _media_files():
-        for path, media in media_objects:
-            try:
-                data, _ = media.get_display_file()
-                folder = path.replace(MULTIMEDIA_PREFIX, "")
-                if not isinstance(data, six.text_type):
-                    yield os.path.join(folder), data
-            except NameError as e:
-                message = "%(path)s produced an ERROR: %(error)s" % {
-                    'path': path,
-                    'error': e,
-                }
-                errors.append(message)
-    return _media_files(), errors
-
-
 def iter_app_files(app, include_multimedia_files, include_index_files, build_profile_id=None, download_targeted_version=False):
     file_iterator = []
     errors = []
@@ -747,7 +718,9 @@ def iter_app_files(app, include_multimedia_files, include_index_files, build_pro
     if include_multimedia_files:
         media_objects = list(app.get_media_objects(build_profile_id=build_profile_id))
         multimedia_file_count = len(media_objects)
-        file_iterator, errors = iter_media_files(media_objects)
+        file_iterator, errors = iter_media_files(
+            media_objects, cache_dir=settings.SHARED_DRIVE_CONF.ccz_media_cache_dir
+        )
     if include_index_files:
         index_files, index_file_errors, index_file_count = iter_index_files(
             app, build_profile_id=build_profile_id, download_targeted_version=download_targeted_version
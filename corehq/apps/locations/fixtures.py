@@ -1,22 +1,30 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import hashlib
+import json
+import uuid
 from collections import defaultdict
+from io import BytesIO
 from itertools import groupby
 from xml.etree.cElementTree import Element, SubElement
 
 from django.contrib.postgres.fields.array import ArrayField
+from django.db import transaction
 from django.db.models import IntegerField, Q
 from django_cte import With
 from django_cte.raw import raw_cte_sql
 import six
 
+from casexml.apps.phone import xml as xml_util
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.utils import ITEMS_COMMENT_PREFIX
 from corehq import toggles
 from corehq.apps.app_manager.const import (
     DEFAULT_LOCATION_FIXTURE_OPTION, SYNC_FLAT_FIXTURES, SYNC_HIERARCHICAL_FIXTURE
 )
 from corehq.apps.custom_data_fields.dbaccessors import get_by_domain_and_type
+from corehq.apps.fixtures.fixturegenerators import GLOBAL_USER_ID
 from corehq.apps.fixtures.utils import get_index_schema_node
 from corehq.apps.locations.models import (
     LocationFixtureConfiguration,
@@ -24,6 +32,10 @@ from corehq.apps.locations.models import (
     LocationType,
     SQLLocation,
 )
+from corehq.util.datadog.gauges import datadog_counter
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
+
+LOCATION_FIXTURE_CACHE_TIMEOUT = 24 * 60 * 60
 
 
 class LocationSet(object):
@@ -123,18 +135,94 @@ class LocationFixtureProvider(FixtureProvider):
             return []
 
         data_fields = _get_location_data_fields(restore_user.domain)
+        if toggles.LOCATION_FIXTURE_CACHE.enabled(restore_user.domain):
+            return self._get_cached_xml_nodes(restore_state, locations_queryset, data_fields)
         return self.serializer.get_xml_nodes(self.id, restore_user, locations_queryset, data_fields)
 
+    def _get_cached_xml_nodes(self, restore_state, locations_queryset, data_fields):
+        """
+        Get the fixture of a user from the location fixture cache, as
+        bytes that RestoreContent can write to the restore as they are.
+
+        Users who sync the same locations get the same fixture, apart
+        from its user_id, so fixtures are cached with GLOBAL_USER_ID in
+        place of the user_id, which is replaced for each user.
+        """
+        restore_user = restore_state.restore_user
+        cache = get_redis_default_cache()
+        key = self._get_cache_key(restore_user.domain, locations_queryset, data_fields)
+        global_id = GLOBAL_USER_ID.encode('utf-8')
+        user_id = restore_user.user_id.encode('utf-8')
+        if not restore_state.overwrite_cache:
+            data = cache.get(key)
+            if data is not None:
+                datadog_counter('commcare.location_fixture_cache.hit')
+                return [data.replace(global_id, user_id)]
+        datadog_counter('commcare.location_fixture_cache.miss')
+
+        nodes = self.serializer.get_xml_nodes(
+            self.id, restore_user, locations_queryset, data_fields, user_id=GLOBAL_USER_ID)
+        io = BytesIO()
+        io.write(ITEMS_COMMENT_PREFIX)
+        io.write(six.text_type(len(nodes)).encode('utf-8'))
+        io.write(b'-->')
+        for node in nodes:
+            io.write(xml_util.tostring(node))
+        data = io.getvalue()
+        cache.set(key, data, timeout=LOCATION_FIXTURE_CACHE_TIMEOUT)
+        return [data.replace(global_id, user_id)]
+
+    def _get_cache_key(self, domain, locations_queryset, data_fields):
+        location_ids = sorted(locations_queryset.order_by().prefetch_related(None).values_list('id', flat=True))
+        fixture_hash = hashlib.md5(json.dumps([
+            self.id,
+            self.serializer.__class__.__name__,
+            location_ids,
+            [[field.slug, field.index_in_fixture] for field in data_fields],
+        ]).encode('utf-8')).hexdigest()
+        return 'location-fixture-{}-{}-{}'.format(domain, _get_cache_generation(domain), fixture_hash)
+
+
+def invalidate_location_fixture_cache(domain):
+    """
+    Stop using the cached location fixtures of a domain
+
+    Cached fixtures are keyed by the domain's cache generation, which
+    this replaces. It is replaced again when the current transaction is
+    committed, so that a fixture rendered before the change is committed
+    isn't cached under the new generation.
+    """
+    _set_cache_generation(domain)
+    transaction.on_commit(lambda: _set_cache_generation(domain))
+
+
+def _get_cache_generation(domain):
+    cache = get_redis_default_cache()
+    key = _get_cache_generation_key(domain)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _set_cache_generation(domain):
+    get_redis_default_cache().set(_get_cache_generation_key(domain), uuid.uuid4().hex, timeout=None)
+
+
+def _get_cache_generation_key(domain):
+    return 'location-fixture-generation-{}'.format(domain)
+
 
 class HierarchicalLocationSerializer(object):
 
     def should_sync(self, restore_user, app):
         return should_sync_hierarchical_fixture(restore_user.project, app)
 
-    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields):
+    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields, user_id=None):
         locations_db = LocationSet(locations_queryset)
 
-        root_node = Element('fixture', {'id': fixture_id, 'user_id': restore_user.user_id})
+        root_node = Element('fixture', {'id': fixture_id, 'user_id': user_id or restore_user.user_id})
         root_locations = locations_db.root_locations
 
         if root_locations:
@@ -154,7 +242,7 @@ class FlatLocationSerializer(object):
     def should_sync(self, restore_user, app):
         return should_sync_flat_fixture(restore_user.project, app)
 
-    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields):
+    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields, user_id=None):
 
         all_types = LocationType.objects.filter(domain=restore_user.domain).values_list(
             'code', flat=True
@@ -167,12 +255,12 @@ class FlatLocationSerializer(object):
 
         return [get_index_schema_node(fixture_id, attrs_to_index),
                 self._get_fixture_node(fixture_id, restore_user, locations_queryset,
-                                       location_type_attrs, data_fields)]
+                                       location_type_attrs, data_fields, user_id)]
 
     def _get_fixture_node(self, fixture_id, restore_user, locations_queryset,
-                          location_type_attrs, data_fields):
+                          location_type_attrs, data_fields, user_id=None):
         root_node = Element('fixture', {'id': fixture_id,
-                                        'user_id': restore_user.user_id,
+                                        'user_id': user_id or restore_user.user_id,
                                         'indexed': 'true'})
         outer_node = Element('locations')
         root_node.append(outer_node)
@@ -295,8 +383,9 @@ class RelatedLocationsFixtureProvider(FixtureProvider):
             # If a user doesn't have any locations, force empty the fixture
             return True, []
 
-        user_locations_with_descendants = SQLLocation.objects.get_descendants(
-            Q(domain=restore_user.domain, location_id__in=user_location_ids)
+        user_locations_with_descendants = SQLLocation.objects.get_descendants_by_path(
+            Q(domain=restore_user.domain, location_id__in=user_location_ids),
+            include_self=True,
         )
 
         location_relations = LocationRelation.objects.filter(
@@ -369,7 +458,9 @@ def get_location_fixture_queryset(user):
         # Retrieve all of the locations related to a user's location and child
         # location and add them to the flat fixture
         related_location_ids = LocationRelation.from_locations(
-            SQLLocation.objects.get_descendants(Q(domain=user.domain, id__in=user_location_ids))
+            SQLLocation.objects.get_descendants_by_path(
+                Q(domain=user.domain, id__in=user_location_ids), include_self=True
+            )
         )
         user_location_ids.extend(
             list(SQLLocation.objects.filter(location_id__in=related_location_ids).values_list('id', flat=True))
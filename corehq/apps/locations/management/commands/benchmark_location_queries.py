@@ -0,0 +1,71 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from six.moves import range
+
+from corehq.apps.locations.models import SQLLocation
+
+
+def _descendants_by_tree_walk(location_ids):
+    return SQLLocation.objects.get_queryset_descendants(
+        SQLLocation.objects.filter(location_id__in=location_ids),
+        include_self=True
+    )
+
+
+def _descendants_by_path(location_ids):
+    return SQLLocation.objects.get_descendants_by_path(
+        SQLLocation.objects.filter(location_id__in=location_ids),
+        include_self=True
+    )
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the time taken to query locations and their descendants by
+    walking the tree with a recursive CTE (get_queryset_descendants) with
+    using the id_path index (get_descendants_by_path, which is used by
+    get_locations_and_children and accessible_to_user).
+
+    Queries a random sample of single locations in the domain, and of
+    sets of locations, as for users assigned to several locations.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('--samples', type=int, default=20)
+        parser.add_argument('--locations-per-user', type=int, default=5)
+
+    def handle(self, domain, **options):
+        location_ids = list(SQLLocation.objects.filter(domain=domain).location_ids())
+        if not location_ids:
+            print("{} has no locations".format(domain))
+            return
+        samples = options['samples']
+        per_user = min(options['locations_per_user'], len(location_ids))
+        singles = random.sample(location_ids, min(samples, len(location_ids)))
+        print("{} locations in {}".format(len(location_ids), domain))
+        for name, location_id_sets in (
+            ('1 location', [[location_id] for location_id in singles]),
+            ('{} locations'.format(per_user), [random.sample(location_ids, per_user) for i in range(samples)]),
+        ):
+            results = {}
+            for query_name, query in (
+                ('tree walk', _descendants_by_tree_walk),
+                ('id_path', _descendants_by_path),
+            ):
+                start = time.time()
+                results[query_name] = [set(query(ids).values_list('id', flat=True)) for ids in location_id_sets]
+                elapsed = time.time() - start
+                print("{:<12} {:<10} {:8.2f} ms/query ({:.0f} locations/query)".format(
+                    name, query_name, elapsed / len(location_id_sets) * 1000,
+                    sum(len(ids) for ids in results[query_name]) / len(location_id_sets),
+                ))
+            if results['tree walk'] != results['id_path']:
+                print("{:<12} results differ: run check_location_id_paths".format(name))
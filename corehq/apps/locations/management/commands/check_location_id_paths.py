@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router
+
+from corehq.apps.locations.models import SQLLocation
+
+MISMATCHED_ID_PATHS_SQL = """
+WITH RECURSIVE paths AS (
+    SELECT
+        loc."id",
+        ARRAY[loc."id"] AS "id_path"
+    FROM "locations_sqllocation" loc
+    WHERE loc."parent_id" IS NULL AND loc."domain" = %(domain)s
+
+    UNION ALL
+
+    SELECT
+        loc."id",
+        array_append(paths."id_path", loc."id") AS "id_path"
+    FROM "locations_sqllocation" loc
+    INNER JOIN paths ON loc."parent_id" = paths."id"
+)
+SELECT loc."id", loc."id_path", paths."id_path"
+FROM "locations_sqllocation" loc
+LEFT JOIN paths ON loc."id" = paths."id"
+WHERE loc."domain" = %(domain)s AND loc."id_path" IS DISTINCT FROM paths."id_path"
+"""
+
+
+class Command(BaseCommand):
+    help = """
+    Check that the id_path of each location matches the ancestors found
+    by following parent_id from the location to the root, and optionally
+    fix the locations whose id_path does not.
+
+    Checks all domains with locations if none are given.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domains', nargs='*')
+        parser.add_argument('--fix', action='store_true', default=False)
+
+    def handle(self, domains, **options):
+        if not domains:
+            domains = (SQLLocation.objects.order_by('domain')
+                       .values_list('domain', flat=True).distinct())
+        for domain in domains:
+            mismatched = _get_mismatched_id_paths(domain)
+            if not mismatched:
+                continue
+            print("{}: {} locations with the wrong id_path".format(domain, len(mismatched)))
+            for pk, id_path, expected in mismatched:
+                if expected is None:
+                    print("    {} is not connected to a root location".format(pk))
+                else:
+                    print("    {}: {} should be {}".format(pk, id_path, expected))
+            if options['fix']:
+                _fix_id_paths(mismatched)
+                print("    fixed {} locations, {} remain".format(
+                    len(mismatched), len(_get_mismatched_id_paths(domain))
+                ))
+
+
+def _get_mismatched_id_paths(domain):
+    with connections[router.db_for_read(SQLLocation)].cursor() as cursor:
+        cursor.execute(MISMATCHED_ID_PATHS_SQL, {'domain': domain})
+        return cursor.fetchall()
+
+
+def _fix_id_paths(mismatched):
+    # id_path is set from the parent's id_path on update, so fix ancestors first
+    fixable = sorted(
+        ((pk, expected) for pk, id_path, expected in mismatched if expected is not None),
+        key=lambda pk_and_expected: len(pk_and_expected[1])
+    )
+    for pk, expected in fixable:
+        SQLLocation.objects.filter(id=pk).update(id_path=expected)
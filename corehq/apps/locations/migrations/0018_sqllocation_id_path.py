@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from corehq.sql_db.operations import RawSQLMigration, SQL
+
+migrator = RawSQLMigration(('corehq', 'apps', 'locations', 'sql_templates'), {})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0017_locationrelation_last_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sqllocation',
+            name='id_path',
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.IntegerField(), blank=True, null=True, size=None
+            ),
+        ),
+        migrator.get_migration('location_id_path.sql', SQL("""
+            DROP TRIGGER IF EXISTS locations_sqllocation_set_id_path ON "locations_sqllocation";
+            DROP TRIGGER IF EXISTS locations_sqllocation_insert_child_id_paths ON "locations_sqllocation";
+            DROP TRIGGER IF EXISTS locations_sqllocation_update_child_id_paths ON "locations_sqllocation";
+            DROP FUNCTION IF EXISTS set_location_id_path();
+            DROP FUNCTION IF EXISTS update_child_location_id_paths();
+        """)),
+        migrations.AddIndex(
+            model_name='sqllocation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['id_path'], name='locations_id_path_gin'),
+        ),
+    ]
@@ -9,8 +9,12 @@ import uuid
 from django_bulk_update.helper import bulk_update as bulk_update_helper
 
 import jsonfield
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import F, Func, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django_cte import CTEQuerySet
 from memoized import memoized
 import six
@@ -235,6 +239,7 @@ class LocationType(models.Model):
 
         cls._pre_bulk_save(objects)
         cls.objects.bulk_create(objects)
+        _invalidate_location_fixture_cache(objects[0].domain)
         return list(objects)
 
     @classmethod
@@ -248,6 +253,8 @@ class LocationType(models.Model):
             o.last_modified = now
         # the caller should call 'sync_administrative_status' for individual objects
         bulk_update_helper(objects)
+        if objects:
+            _invalidate_location_fixture_cache(objects[0].domain)
 
     @classmethod
     def bulk_delete(cls, objects):
@@ -263,6 +270,14 @@ class LocationQueriesMixin(object):
     def location_ids(self):
         return self.values_list('location_id', flat=True)
 
+    def order_by_path(self):
+        """Order locations by the names of their ancestors and their own name
+
+        This is the order of `get_queryset_descendants`, which puts each
+        location before its descendants.
+        """
+        return self.annotate(_name_path=name_path(F('id_path'))).order_by('_name_path', 'id')
+
     def accessible_to_user(self, domain, user):
         if user.has_permission(domain, 'access_all_locations'):
             return self.filter(domain=domain)
@@ -299,7 +314,7 @@ class LocationQuerySet(LocationQueriesMixin, CTEQuerySet):
 
     def accessible_to_user(self, domain, user):
         ids_query = super(LocationQuerySet, self).accessible_to_user(domain, user)
-        return self.filter(id__in=ids_query)
+        return self.filter(id__in=ids_query.order_by())
 
 
 class LocationManager(LocationQueriesMixin, AdjListManager):
@@ -341,15 +356,56 @@ class LocationManager(LocationQueriesMixin, AdjListManager):
     def get_locations_and_children(self, location_ids):
         """
         Takes a set of location ids and returns a django queryset of those
-        locations and their children.
+        locations and their children, ordered by path.
         """
-        return self.get_queryset_descendants(
+        return self.get_descendants_by_path(
             self.filter(location_id__in=location_ids),
             include_self=True
-        )
+        ).order_by_path()
+
+    def get_descendants_by_path(self, locations, include_self=False):
+        """Query the descendants of locations using the id_path index
+
+        Unlike `get_queryset_descendants`, this does not walk the tree, so
+        its cost does not grow with the size of the domain. Results are
+        not ordered, and descendants of locations that are not in this
+        manager's queryset are included (archiving a location archives
+        its descendants, so for `active_objects` this makes no
+        difference).
+
+        :param locations: A QuerySet or Q object matching the locations.
+        :returns: A `QuerySet` instance.
+        """
+        if isinstance(locations, Q):
+            locations = self.filter(locations)
+        pks = list(locations.order_by().values_list('id', flat=True))
+        if not pks:
+            return self.none()
+        descendants = self.filter(id_path__overlap=pks)
+        if not include_self:
+            descendants = descendants.annotate(
+                _ancestor_ids=ancestor_ids(F('id_path')),
+            ).filter(_ancestor_ids__overlap=pks)
+        return descendants
 
     def get_locations_and_children_ids(self, location_ids):
-        return list(self.get_locations_and_children(location_ids).location_ids())
+        return list(self.get_locations_and_children(location_ids).order_by().location_ids())
+
+
+class ancestor_ids(Func):
+    """The ids in an id_path, without the id of the location itself"""
+    template = "%(expressions)s[1:array_length(%(expressions)s, 1) - 1]"
+    output_field = ArrayField(models.IntegerField())
+
+
+class name_path(Func):
+    """The names of the locations in an id_path, from the root"""
+    template = (
+        "ARRAY(SELECT ancestor.name FROM locations_sqllocation ancestor "
+        "JOIN UNNEST(%(expressions)s) WITH ORDINALITY AS path(id, depth) ON ancestor.id = path.id "
+        "ORDER BY path.depth)"
+    )
+    output_field = ArrayField(models.CharField(max_length=255))
 
 
 class OnlyUnarchivedLocationManager(LocationManager):
@@ -388,6 +444,12 @@ class SQLLocation(AdjListModel):
     longitude = models.DecimalField(max_digits=20, decimal_places=10, null=True, blank=True)
     parent = models.ForeignKey('self', null=True, blank=True, related_name='children', on_delete=models.CASCADE)
 
+    # ids of the location's ancestors and the location itself, from the root.
+    # Set by database triggers whenever a location is inserted or its parent
+    # changes (see sql_templates/location_id_path.sql), so the value of a
+    # model instance that has been saved since it was loaded may be stale.
+    id_path = ArrayField(models.IntegerField(), null=True, blank=True)
+
     # Use getter and setter below to access this value
     # since stocks_all_products can cause an empty list to
     # be what is stored for a location that actually has
@@ -611,6 +673,7 @@ class SQLLocation(AdjListModel):
     class Meta(object):
         app_label = 'locations'
         unique_together = ('domain', 'site_code',)
+        indexes = [GinIndex(fields=['id_path'], name='locations_id_path_gin')]
 
     def __str__(self):
         return "{} ({})".format(self.name, self.domain)
@@ -932,3 +995,17 @@ class LocationRelation(models.Model):
         unique_together = [
             ('location_a', 'location_b')
         ]
+
+
+@receiver(post_save, sender=SQLLocation)
+@receiver(post_delete, sender=SQLLocation)
+@receiver(post_save, sender=LocationType)
+@receiver(post_delete, sender=LocationType)
+def invalidate_location_fixture_cache_on_change(sender, instance, *args, **kwargs):
+    _invalidate_location_fixture_cache(instance.domain)
+
+
+def _invalidate_location_fixture_cache(domain):
+    # bulk saves don't send signals, so they call this directly
+    from .fixtures import invalidate_location_fixture_cache
+    invalidate_location_fixture_cache(domain)
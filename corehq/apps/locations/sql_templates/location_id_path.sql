@@ -0,0 +1,81 @@
+DROP TRIGGER IF EXISTS locations_sqllocation_set_id_path ON "locations_sqllocation";
+DROP TRIGGER IF EXISTS locations_sqllocation_insert_child_id_paths ON "locations_sqllocation";
+DROP TRIGGER IF EXISTS locations_sqllocation_update_child_id_paths ON "locations_sqllocation";
+
+-- set id_path of existing locations
+WITH RECURSIVE paths AS (
+    SELECT
+        loc."id",
+        ARRAY[loc."id"] AS "id_path"
+    FROM "locations_sqllocation" loc
+    WHERE loc."parent_id" IS NULL
+
+    UNION ALL
+
+    SELECT
+        loc."id",
+        array_append(paths."id_path", loc."id") AS "id_path"
+    FROM "locations_sqllocation" loc
+    INNER JOIN paths ON loc."parent_id" = paths."id"
+)
+UPDATE "locations_sqllocation" loc
+SET "id_path" = paths."id_path"
+FROM paths
+WHERE loc."id" = paths."id";
+
+
+CREATE OR REPLACE FUNCTION set_location_id_path() RETURNS TRIGGER AS $$
+BEGIN
+    /*
+    Set id_path from the id_path of the parent location
+
+    This runs on every insert and update, not only when parent_id
+    changes, so that saving a model instance with a stale id_path can't
+    overwrite the correct value. id_path is NULL while the parent's
+    id_path is not known.
+    */
+    IF NEW."parent_id" IS NULL THEN
+        NEW."id_path" := ARRAY[NEW."id"];
+    ELSE
+        SELECT array_append(parent."id_path", NEW."id") INTO NEW."id_path"
+        FROM "locations_sqllocation" parent
+        WHERE parent."id" = NEW."parent_id" AND parent."id_path" IS NOT NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION update_child_location_id_paths() RETURNS TRIGGER AS $$
+BEGIN
+    /*
+    Update id_path of the children of a location whose id_path changed
+
+    The update of each child runs this again for its own children, so
+    moving a location updates its whole subtree, one level at a time.
+    This also runs after inserts, for children that were inserted
+    before their parent in the same transaction.
+    */
+    UPDATE "locations_sqllocation"
+    SET "id_path" = array_append(NEW."id_path", "id")
+    WHERE "parent_id" = NEW."id";
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE TRIGGER locations_sqllocation_set_id_path
+    BEFORE INSERT OR UPDATE ON "locations_sqllocation"
+    FOR EACH ROW
+    EXECUTE PROCEDURE set_location_id_path();
+
+CREATE TRIGGER locations_sqllocation_insert_child_id_paths
+    AFTER INSERT ON "locations_sqllocation"
+    FOR EACH ROW
+    EXECUTE PROCEDURE update_child_location_id_paths();
+
+CREATE TRIGGER locations_sqllocation_update_child_id_paths
+    AFTER UPDATE ON "locations_sqllocation"
+    FOR EACH ROW
+    WHEN (OLD."id_path" IS DISTINCT FROM NEW."id_path")
+    EXECUTE PROCEDURE update_child_location_id_paths();
@@ -15,7 +15,9 @@ from datetime import datetime, timedelta
 from django.test import TestCase
 from casexml.apps.phone.models import SyncLog
 from casexml.apps.phone.tests.utils import create_restore_user, call_fixture_generator
-from casexml.apps.phone.restore import RestoreParams
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.restore import RestoreParams, RestoreState
+from casexml.apps.phone.utils import get_cached_items_with_count
 from corehq.apps.domain.shortcuts import create_domain
 from corehq.apps.domain.models import Domain
 from corehq.apps.commtrack.tests.util import bootstrap_domain
@@ -33,7 +35,8 @@ from .util import (
 )
 from ..fixtures import _location_to_fixture, LocationSet, should_sync_locations, location_fixture_generator, \
     flat_location_fixture_generator, should_sync_flat_fixture, should_sync_hierarchical_fixture, \
-    _get_location_data_fields, get_location_fixture_queryset, related_locations_fixture_generator
+    _get_location_data_fields, get_location_fixture_queryset, related_locations_fixture_generator, \
+    HierarchicalLocationSerializer, invalidate_location_fixture_cache
 from ..models import SQLLocation, LocationType, make_location, LocationFixtureConfiguration, LocationRelation
 import six
 
@@ -443,6 +446,97 @@ class ForkedHierarchiesTest(TestCase, FixtureHasLocationsMixin):
             self.assertFalse(location_name in fixture)
 
 
+@mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
+@flag_enabled('HIERARCHICAL_LOCATION_FIXTURE')
+@flag_enabled('LOCATION_FIXTURE_CACHE')
+class LocationFixtureCacheTest(LocationHierarchyTestCase, FixtureHasLocationsMixin):
+    location_type_names = ['state', 'county', 'city']
+    location_structure = TEST_LOCATION_STRUCTURE
+
+    def setUp(self):
+        super(LocationFixtureCacheTest, self).setUp()
+        self.user = create_restore_user(self.domain, 'user', '123')
+        self.other_user = create_restore_user(self.domain, 'other_user', '123')
+        for user in (self.user, self.other_user):
+            user._couch_user.set_location(self.locations['Suffolk'])
+        invalidate_location_fixture_cache(self.domain)
+
+    def tearDown(self):
+        self.user._couch_user.delete()
+        self.other_user._couch_user.delete()
+        super(LocationFixtureCacheTest, self).tearDown()
+
+    def _get_fixture(self, user, generator=location_fixture_generator):
+        # a new restore user, since the locations to sync are memoized
+        fixture, = call_fixture_generator(generator, user._couch_user.to_ota_restore_user())
+        self.assertIsInstance(fixture, bytes)
+        xml, num_items = get_cached_items_with_count(fixture)
+        return xml, num_items
+
+    def test_fixture_shared_between_users(self):
+        with mock.patch.object(HierarchicalLocationSerializer, 'get_xml_nodes',
+                               wraps=location_fixture_generator.serializer.get_xml_nodes) as get_xml_nodes:
+            fixture, num_items = self._get_fixture(self.user)
+            other_fixture, other_num_items = self._get_fixture(self.other_user)
+        self.assertEqual(get_xml_nodes.call_count, 1)
+
+        locations = ['Massachusetts', 'Suffolk', 'Boston', 'Revere']
+        self.assertEqual(num_items, 1)
+        self.assertXmlEqual(self._assemble_expected_fixture('simple_fixture', locations), fixture)
+        self.assertEqual(other_num_items, 1)
+        self.assertXmlEqual(
+            self._assemble_expected_fixture('simple_fixture', locations).replace(
+                self.user.user_id, self.other_user.user_id),
+            other_fixture
+        )
+
+    def test_flat_fixture(self):
+        fixture, num_items = self._get_fixture(self.user, flat_location_fixture_generator)
+        other_fixture, other_num_items = self._get_fixture(self.other_user, flat_location_fixture_generator)
+        # the index schema and the fixture
+        self.assertEqual(num_items, 2)
+        self.assertEqual(other_num_items, 2)
+        self.assertEqual(other_fixture, fixture.replace(
+            self.user.user_id.encode('utf-8'), self.other_user.user_id.encode('utf-8')))
+
+    def test_different_locations_not_shared(self):
+        self._get_fixture(self.user)
+        self.other_user._couch_user.set_location(self.locations['Middlesex'])
+
+        fixture, num_items = self._get_fixture(self.other_user)
+        self.assertIn(self.locations['Cambridge'].location_id.encode('utf-8'), fixture)
+        self.assertNotIn(self.locations['Boston'].location_id.encode('utf-8'), fixture)
+
+    def test_location_change_invalidates_cache(self):
+        self._get_fixture(self.user)
+        boston = self.locations['Boston']
+        boston.name = 'Beantown'
+        boston.save()
+        self.addCleanup(self._rename, boston, 'Boston')
+
+        fixture, num_items = self._get_fixture(self.other_user)
+        self.assertIn(b'<name>Beantown</name>', fixture)
+
+    def test_overwrite_cache(self):
+        self._get_fixture(self.user)
+        # a change that doesn't send a signal
+        SQLLocation.objects.filter(id=self.locations['Boston'].id).update(name='Beantown')
+        self.addCleanup(self._rename, self.locations['Boston'], 'Boston')
+
+        restore_state = RestoreState(
+            Domain(name=self.domain),
+            self.other_user._couch_user.to_ota_restore_user(),
+            RestoreParams(version=V2),
+            overwrite_cache=True,
+        )
+        fixture, = location_fixture_generator(restore_state)
+        self.assertIn(b'<name>Beantown</name>', fixture)
+
+    def _rename(self, location, name):
+        location.name = name
+        location.save()
+
+
 @mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
 class LocationFixturesDataTest(LocationHierarchyTestCase, FixtureHasLocationsMixin):
     location_type_names = ['state', 'county', 'city']
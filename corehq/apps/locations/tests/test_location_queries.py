@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 import pickle
 
 from ..models import SQLLocation
-from .util import LocationHierarchyTestCase
+from .util import LocationHierarchyPerTest, LocationHierarchyTestCase
 from corehq.apps.users.models import WebUser
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
 from django.test.utils import override_settings
@@ -171,3 +171,59 @@ class TestLocationScopedQueryset(BaseTestLocationQuerysetMethods):
             .accessible_to_user(self.domain, self.web_user)
         )
         self.assertItemsEqual([], no_locs)
+
+
+class TestLocationIdPath(LocationHierarchyPerTest):
+    location_type_names = BaseTestLocationQuerysetMethods.location_type_names
+    location_structure = BaseTestLocationQuerysetMethods.location_structure
+
+    def assertIdPath(self, name, path_names):
+        self.assertEqual(
+            SQLLocation.objects.get(domain=self.domain, name=name).id_path,
+            [self.locations[path_name].id for path_name in path_names]
+        )
+
+    def _move(self, name, new_parent_name):
+        location = self.locations[name]
+        location.parent = self.locations[new_parent_name]
+        location.save()
+
+    def test_id_paths(self):
+        self.assertIdPath('Massachusetts', ['Massachusetts'])
+        self.assertIdPath('Cambridge', ['Massachusetts', 'Middlesex', 'Cambridge'])
+        self.assertIdPath('Los Angeles', ['California', 'Los Angeles'])
+
+    def test_move(self):
+        self._move('Middlesex', 'California')
+        self.assertIdPath('Middlesex', ['California', 'Middlesex'])
+        self.assertIdPath('Cambridge', ['California', 'Middlesex', 'Cambridge'])
+        self.assertIdPath('Boston', ['Massachusetts', 'Suffolk', 'Boston'])
+
+    def test_move_with_queryset_update(self):
+        (SQLLocation.objects.filter(id=self.locations['Middlesex'].id)
+         .update(parent=self.locations['California']))
+        self.assertIdPath('Somerville', ['California', 'Middlesex', 'Somerville'])
+
+    def test_save_stale_location(self):
+        cambridge = SQLLocation.objects.get(domain=self.domain, name='Cambridge')
+        self._move('Middlesex', 'California')
+        cambridge.site_code = 'cambridge-ma'
+        cambridge.save()
+        self.assertIdPath('Cambridge', ['California', 'Middlesex', 'Cambridge'])
+
+    def test_get_descendants_by_path(self):
+        for include_self in [True, False]:
+            locations = SQLLocation.objects.filter(domain=self.domain, name__in=['Massachusetts', 'Middlesex'])
+            self.assertItemsEqual(
+                SQLLocation.objects.get_descendants_by_path(locations, include_self=include_self),
+                SQLLocation.objects.get_queryset_descendants(locations, include_self=include_self),
+            )
+
+    def test_get_descendants_by_path_after_move(self):
+        self._move('Middlesex', 'California')
+        self.assertItemsEqual(
+            [loc.name for loc in SQLLocation.objects.get_locations_and_children(
+                [self.locations['California'].location_id]
+            )],
+            ['California', 'Los Angeles', 'Middlesex', 'Cambridge', 'Somerville']
+        )
@@ -60,6 +60,16 @@ class TestGetLocationsAndChildren(MassachusettsTestCase):
             ['Middlesex', 'Cambridge', 'Somerville', 'Boston']
         )
 
+    def test_get_locations_and_children_order(self):
+        names = ['Suffolk', 'Middlesex']
+        result = SQLLocation.objects.get_locations_and_children(
+            [self.locations[name].location_id for name in names]
+        )
+        self.assertEqual(
+            [loc.name for loc in result],
+            ['Middlesex', 'Cambridge', 'Somerville', 'Suffolk', 'Boston']
+        )
+
     def test_get_locations_and_children_with_empty_list(self):
         result = SQLLocation.objects.get_locations_and_children([])
         self.assertItemsEqual(list(result), [])
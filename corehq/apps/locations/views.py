@@ -1056,7 +1056,7 @@ def child_locations_for_select2(request, domain):
         locs = locs.filter(name__icontains=query)
 
     # 10 results per page
-    paginator = Paginator(locs, 10)
+    paginator = Paginator(locs.order_by_path(), 10)
     return JsonResponse({
         'results': list(map(loc_to_payload, paginator.page(page))),
         'total_count': paginator.count,
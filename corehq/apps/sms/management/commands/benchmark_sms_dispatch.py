@@ -0,0 +1,128 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from six.moves import range
+
+from corehq.apps.sms.management.commands.run_sms_queue import SMSEnqueuingOperation
+from corehq.apps.sms.models import OUTGOING, QueuedSMS
+from dimagi.utils.chunked import chunked
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the throughput and latency of spawning tasks for a broadcast
+    with the polling dispatcher (redis lock per SMS) and the claiming
+    dispatcher (SELECT ... FOR UPDATE SKIP LOCKED in batches).
+
+    Queues a throwaway broadcast in the given domain for each strategy and
+    runs a number of dispatchers against it concurrently. Tasks are
+    counted instead of being sent to celery, and the queued SMS are
+    deleted afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('--messages', type=int, default=100000)
+        parser.add_argument('--dispatchers', type=int, default=4,
+                            help='Number of dispatchers running at once')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of SMS claimed at once')
+
+    def handle(self, domain, **options):
+        print("{messages} messages, {dispatchers} dispatchers".format(**options))
+        for strategy in ('poll', 'claim'):
+            QueuedSMS.objects.filter(domain=domain).delete()
+            try:
+                self._queue_broadcast(domain, options['messages'])
+                self._run_benchmark(strategy, options)
+            finally:
+                QueuedSMS.objects.filter(domain=domain).delete()
+
+    def _queue_broadcast(self, domain, messages):
+        now = datetime.utcnow()
+        for chunk in chunked(range(messages), 1000):
+            QueuedSMS.objects.bulk_create([
+                QueuedSMS(
+                    domain=domain,
+                    date=now,
+                    direction=OUTGOING,
+                    phone_number='+1{:09d}'.format(i),
+                    text='Benchmark broadcast',
+                    datetime_to_process=now,
+                )
+                for i in chunk
+            ])
+
+    def _run_benchmark(self, strategy, options):
+        recorder = _EnqueueRecorder()
+        dispatchers = [
+            threading.Thread(target=_run_dispatcher, args=(strategy, recorder, options['batch_size']))
+            for i in range(options['dispatchers'])
+        ]
+        start = time.time()
+        for dispatcher in dispatchers:
+            dispatcher.start()
+        for dispatcher in dispatchers:
+            dispatcher.join()
+        elapsed = time.time() - start
+
+        latencies = sorted(enqueued - start for enqueued in recorder.enqueued.values())
+        print("\n{}".format(strategy))
+        print("    enqueued {} tasks for {} SMS in {:.2f}s ({:.0f} SMS/s)".format(
+            recorder.tasks, len(recorder.enqueued), elapsed, len(recorder.enqueued) / elapsed
+        ))
+        if latencies:
+            print("    latency p50 {:.2f}s, p99 {:.2f}s, max {:.2f}s".format(
+                latencies[len(latencies) // 2],
+                latencies[int(len(latencies) * 0.99)],
+                latencies[-1],
+            ))
+
+
+class _EnqueueRecorder(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tasks = 0
+        self.enqueued = {}
+
+    def record(self, queued_sms_list):
+        now = time.time()
+        with self.lock:
+            for queued_sms in queued_sms_list:
+                self.tasks += 1
+                self.enqueued.setdefault(queued_sms.pk, now)
+
+
+class _BenchmarkOperation(SMSEnqueuingOperation):
+
+    def __init__(self, recorder):
+        super(_BenchmarkOperation, self).__init__()
+        self.recorder = recorder
+
+    def enqueue(self, queued_sms):
+        enqueue_lock = self.get_enqueue_lock(queued_sms)
+        if enqueue_lock.acquire(blocking=False):
+            self.recorder.record([queued_sms])
+
+
+def _run_dispatcher(strategy, recorder, batch_size):
+    try:
+        if strategy == 'poll':
+            _BenchmarkOperation(recorder).create_tasks()
+        else:
+            while True:
+                queued_sms = QueuedSMS.claim_due_sms(batch_size)
+                if not queued_sms:
+                    break
+                recorder.record(queued_sms)
+    finally:
+        connection.close()
@@ -1,14 +1,23 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
+from __future__ import division
+from datetime import datetime
 from corehq.apps.domain_migration_flags.api import any_migrations_in_progress
 from corehq.apps.sms.models import QueuedSMS
-from corehq.apps.sms.tasks import send_to_sms_queue
+from corehq.apps.sms.tasks import bulk_send_to_sms_queue, send_to_sms_queue
 from corehq.sql_db.util import handle_connection_failure
+from corehq.util.datadog.gauges import datadog_counter, datadog_gauge, datadog_histogram
 from dimagi.utils.couch import get_redis_lock
 from dimagi.utils.logging import notify_exception
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from time import sleep
 
+# Minimum number of seconds to wait between claims when the batch was
+# not full, so that SMS which are due but can't be claimed right now
+# (e.g. for domains being migrated) don't cause a busy loop
+MIN_DISPATCH_WAIT = 0.5
+
 
 def skip_domain(domain):
     return any_migrations_in_progress(domain)
@@ -21,6 +30,9 @@ class SMSEnqueuingOperation(BaseCommand):
     consumes from the sms_queue. This is ok because this process uses
     locks to ensure items are only enqueued once, and it's what is desired
     in order to more efficiently spawn the needed celery tasks.
+
+    With --claim, instances claim due SMS from the database in batches
+    instead, which keeps them from contending for the same SMS.
     """
     help = "Spawns tasks to process queued SMS"
 
@@ -49,7 +61,76 @@ class SMSEnqueuingOperation(BaseCommand):
         if enqueue_lock.acquire(blocking=False):
             send_to_sms_queue(queued_sms)
 
+    @handle_connection_failure()
+    def claim_and_enqueue(self, batch_size):
+        """
+        Claims a batch of due SMS, spawns their tasks and returns the
+        number of SMS claimed.
+        """
+        start = datetime.utcnow()
+        queued_sms = QueuedSMS.claim_due_sms(batch_size, utcnow=start, skip_domain=skip_domain)
+        if queued_sms:
+            bulk_send_to_sms_queue(queued_sms)
+            self.record_dispatch_metrics(queued_sms, start)
+        return len(queued_sms)
+
+    def record_dispatch_metrics(self, queued_sms, start):
+        now = datetime.utcnow()
+        datadog_counter('commcare.sms.queue.dispatched', len(queued_sms))
+        elapsed = (now - start).total_seconds()
+        if elapsed:
+            datadog_gauge('commcare.sms.queue.dispatch_rate', len(queued_sms) / elapsed)
+        for sms in queued_sms:
+            datadog_histogram(
+                'commcare.sms.queue.dispatch_latency',
+                (now - sms.datetime_to_process).total_seconds()
+            )
+
+    @handle_connection_failure()
+    def get_dispatch_wait(self):
+        """
+        Returns the number of seconds until the next SMS is due, bounded
+        by MIN_DISPATCH_WAIT and SMS_QUEUE_DISPATCH_MAX_WAIT.
+        """
+        max_wait = settings.SMS_QUEUE_DISPATCH_MAX_WAIT
+        utcnow = datetime.utcnow()
+        next_datetime = QueuedSMS.get_next_datetime_to_process(utcnow=utcnow)
+        if next_datetime is None:
+            return max_wait
+        wait = (next_datetime - utcnow).total_seconds()
+        return min(max(wait, MIN_DISPATCH_WAIT), max_wait)
+
+    def dispatch(self):
+        """
+        Runs the queue by claiming due SMS in batches rather than polling
+        every SMS and locking each one in redis. A full batch means there
+        is likely more work waiting, so claim again right away; otherwise
+        sleep until the next SMS is due.
+        """
+        batch_size = settings.SMS_QUEUE_DISPATCH_BATCH_SIZE
+        while True:
+            try:
+                if self.claim_and_enqueue(batch_size) >= batch_size:
+                    continue
+                wait = self.get_dispatch_wait()
+            except:
+                notify_exception(None, message="Could not dispatch queued SMS")
+                wait = settings.SMS_QUEUE_DISPATCH_MAX_WAIT
+            sleep(wait)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--claim',
+            action='store_true',
+            default=False,
+            help="Claim due SMS in batches from the database instead of "
+                 "polling and locking each SMS in redis",
+        )
+
     def handle(self, **options):
+        if options['claim']:
+            return self.dispatch()
+
         while True:
             try:
                 self.create_tasks()
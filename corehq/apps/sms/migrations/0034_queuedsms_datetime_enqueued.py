@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from __future__ import absolute_import
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0033_starfishbackend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedsms',
+            name='datetime_enqueued',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
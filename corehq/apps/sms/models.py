@@ -336,6 +336,12 @@ class SMS(SMSBase):
 
 
 class QueuedSMS(SMSBase):
+    # Set when a dispatcher claims this SMS and hands it to celery. The
+    # SMS can be claimed again once it is rescheduled for a later
+    # datetime_to_process, or once the claim has gone stale.
+    datetime_enqueued = models.DateTimeField(null=True)
+
+    CLAIM_TIMEOUT = timedelta(hours=3)
 
     class Meta(object):
         db_table = 'sms_queued'
@@ -346,6 +352,61 @@ class QueuedSMS(SMSBase):
             datetime_to_process__lte=datetime.utcnow(),
         )
 
+    @classmethod
+    def _claimable_sms(cls, utcnow):
+        return cls.objects.filter(
+            models.Q(datetime_enqueued__isnull=True) |
+            models.Q(datetime_enqueued__lt=models.F('datetime_to_process')) |
+            models.Q(datetime_enqueued__lt=utcnow - cls.CLAIM_TIMEOUT)
+        )
+
+    @classmethod
+    def claim_due_sms(cls, batch_size, utcnow=None, skip_domain=None):
+        """
+        Claims up to batch_size SMS which are due to be processed and
+        returns them. Rows locked by another dispatcher are skipped
+        rather than waited on, so any number of dispatchers can claim
+        from the queue concurrently without handing out the same SMS twice.
+
+        :param skip_domain: optional function which takes a domain and returns
+        True if SMS for that domain should be left in the queue unclaimed
+        """
+        utcnow = utcnow or datetime.utcnow()
+        due_sms = cls._claimable_sms(utcnow).filter(datetime_to_process__lte=utcnow)
+        if skip_domain:
+            # exclude skipped domains before taking a batch, so that
+            # their SMS can't fill every batch and hold up other domains
+            domains = due_sms.exclude(domain__isnull=True).order_by().values_list('domain', flat=True).distinct()
+            skipped_domains = [domain for domain in domains if domain and skip_domain(domain)]
+            if skipped_domains:
+                due_sms = due_sms.exclude(domain__in=skipped_domains)
+
+        with transaction.atomic():
+            queued_sms = list(
+                due_sms
+                .select_for_update(skip_locked=True)
+                .order_by('datetime_to_process')[:batch_size]
+            )
+            cls.objects.filter(pk__in=[sms.pk for sms in queued_sms]).update(datetime_enqueued=utcnow)
+
+        for sms in queued_sms:
+            sms.datetime_enqueued = utcnow
+        return queued_sms
+
+    @classmethod
+    def get_next_datetime_to_process(cls, utcnow=None):
+        """
+        Returns the datetime_to_process of the next SMS that will become
+        claimable, or None if there is nothing left in the queue to claim.
+        """
+        utcnow = utcnow or datetime.utcnow()
+        return (
+            cls._claimable_sms(utcnow)
+            .order_by('datetime_to_process')
+            .values_list('datetime_to_process', flat=True)
+            .first()
+        )
+
 
 class SQLLastReadMessage(UUIDGeneratorMixin, models.Model):
 
@@ -407,14 +407,26 @@ def process_sms(queued_sms_pk):
             send_to_sms_queue(msg)
 
 
-def send_to_sms_queue(queued_sms):
+def send_to_sms_queue(queued_sms, producer=None):
     options = {}
     if queued_sms.direction == OUTGOING and queued_sms.domain in settings.CUSTOM_PROJECT_SMS_QUEUES:
         options['queue'] = settings.CUSTOM_PROJECT_SMS_QUEUES[queued_sms.domain]
+    if producer is not None:
+        options['producer'] = producer
 
     process_sms.apply_async([queued_sms.pk], **options)
 
 
+def bulk_send_to_sms_queue(queued_sms_list):
+    """
+    Same as send_to_sms_queue, but publishes all the tasks over a single
+    broker connection instead of acquiring one per SMS.
+    """
+    with process_sms.app.producer_or_acquire() as producer:
+        for queued_sms in queued_sms_list:
+            send_to_sms_queue(queued_sms, producer=producer)
+
+
 @no_result_task(serializer='pickle', queue='background_queue', default_retry_delay=10 * 60,
                 max_retries=10, bind=True)
 def store_billable(self, msg):
@@ -14,6 +14,7 @@ from corehq.apps.users.models import CommCareUser
 from datetime import datetime, timedelta
 from dimagi.utils.couch.cache.cache_core import get_redis_client
 from django.conf import settings
+from django.test import TestCase
 from django.test.utils import override_settings
 from mock import Mock, patch
 from six.moves import range
@@ -389,3 +390,75 @@ class QueueingTestCase(BaseSMSTest):
         self.assertEqual(reporting_sms.backend_api, self.backend.get_api_id())
         self.assertEqual(reporting_sms.couch_id, couch_id)
         self.assertBillableExists(couch_id)
+
+
+class ClaimQueuedSMSTestCase(TestCase):
+
+    def setUp(self):
+        super(ClaimQueuedSMSTestCase, self).setUp()
+        self.now = datetime(2018, 10, 1, 12, 0)
+
+    def tearDown(self):
+        QueuedSMS.objects.all().delete()
+        super(ClaimQueuedSMSTestCase, self).tearDown()
+
+    def create_queued_sms(self, domain, minutes):
+        sms = QueuedSMS(
+            domain=domain,
+            date=self.now,
+            direction='O',
+            phone_number='999123',
+            text='message',
+            datetime_to_process=self.now + timedelta(minutes=minutes),
+        )
+        sms.save()
+        return sms
+
+    def claim(self, batch_size, now=None, skip_domain=None):
+        return [
+            sms.pk for sms in
+            QueuedSMS.claim_due_sms(batch_size, utcnow=now or self.now, skip_domain=skip_domain)
+        ]
+
+    def test_claim_in_batches(self):
+        first = self.create_queued_sms('claim-domain', -3)
+        second = self.create_queued_sms('claim-domain', -2)
+        third = self.create_queued_sms('claim-domain', -1)
+        future = self.create_queued_sms('claim-domain', 5)
+
+        self.assertEqual(self.claim(2), [first.pk, second.pk])
+        self.assertEqual(self.claim(2), [third.pk])
+        self.assertEqual(self.claim(2), [])
+        self.assertEqual(QueuedSMS.get_next_datetime_to_process(utcnow=self.now), future.datetime_to_process)
+        self.assertEqual(self.claim(2, now=self.now + timedelta(minutes=5)), [future.pk])
+        self.assertIsNone(QueuedSMS.get_next_datetime_to_process(utcnow=self.now + timedelta(minutes=5)))
+
+    def test_claim_rescheduled_and_stale(self):
+        rescheduled = self.create_queued_sms('claim-domain', -2)
+        stale = self.create_queued_sms('claim-domain', -1)
+        self.assertEqual(self.claim(10), [rescheduled.pk, stale.pk])
+
+        # processing failed and the SMS was requeued for later
+        rescheduled.datetime_to_process = self.now + timedelta(minutes=5)
+        rescheduled.save()
+        later = self.now + timedelta(minutes=5)
+        self.assertEqual(self.claim(10, now=later), [rescheduled.pk])
+
+        # the task for this SMS never ran
+        self.assertEqual(self.claim(10, now=self.now + QueuedSMS.CLAIM_TIMEOUT + timedelta(minutes=1)),
+                         [stale.pk])
+
+    def test_skip_domain(self):
+        self.create_queued_sms('migrating-domain', -2)
+        sms = self.create_queued_sms('claim-domain', -1)
+
+        self.assertEqual(self.claim(10, skip_domain=lambda domain: domain == 'migrating-domain'), [sms.pk])
+        self.assertEqual(self.claim(10, skip_domain=lambda domain: domain == 'migrating-domain'), [])
+        self.assertEqual(len(self.claim(10)), 1)
+
+    def test_skip_domain_does_not_fill_batch(self):
+        self.create_queued_sms('migrating-domain', -3)
+        self.create_queued_sms('migrating-domain', -2)
+        sms = self.create_queued_sms('claim-domain', -1)
+
+        self.assertEqual(self.claim(2, skip_domain=lambda domain: domain == 'migrating-domain'), [sms.pk])
@@ -11,12 +11,12 @@ from casexml.apps.case.cleanup import rebuild_case_from_actions
 from casexml.apps.case.models import CommCareCase, CommCareCaseAction
 from casexml.apps.case.xform import get_case_updates
 from corehq.apps.tzmigration.api import set_tz_migration_started, \
-    set_tz_migration_complete, force_phone_timezones_should_be_processed
+    set_tz_migration_complete
 from corehq.apps.tzmigration.planning import PlanningDB
 from corehq.blobs import CODES
 from corehq.blobs.mixin import BlobHelper
 from corehq.form_processor.parsers.ledgers import get_stock_actions
-from corehq.form_processor.utils import convert_xform_to_json, adjust_datetimes
+from corehq.form_processor.utils import convert_xform_to_json_with_adjusted_datetimes
 from corehq.form_processor.utils.metadata import scrub_meta
 from corehq.util.dates import iso_string_to_datetime
 from corehq.util.python_compatibility import soft_assert_type_text
@@ -104,9 +104,7 @@ def _get_submission_xml(xform, db):
 
 
 def _get_new_form_json(xml, xform_id):
-    form_json = convert_xform_to_json(xml)
-    with force_phone_timezones_should_be_processed():
-        adjust_datetimes(form_json)
+    form_json = convert_xform_to_json_with_adjusted_datetimes(xml, process_timezones=True)
     # this is actually in-place because of how jsonobject works
     scrub_meta(XFormInstance.wrap({'form': form_json, '_id': xform_id}))
     return form_json
@@ -0,0 +1,416 @@
+"""
+Compiles configured UCR expressions, filters and indicators into plain closures.
+
+The objects built by the expression, filter and indicator factories are evaluated
+by walking the tree of spec objects on every call. This module turns such a tree
+into nested closures once, with the spec properties already looked up and simple
+cases (e.g. constant references and property names) specialized.
+
+Anything without a compiler here is left as is and evaluated by its own ``__call__``
+(or ``get_values`` for indicators), so compiled trees always produce the same
+results as the interpreted ones.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from corehq.apps.userreports.expressions.getters import (
+    DictGetter,
+    NestedDictGetter,
+    TransformedGetter,
+    transform_from_datatype,
+)
+from corehq.apps.userreports.expressions.specs import (
+    ArrayIndexExpressionSpec,
+    CoalesceExpressionSpec,
+    ConditionalExpressionSpec,
+    ConstantGetterSpec,
+    DictExpressionSpec,
+    IdentityExpressionSpec,
+    IterationNumberExpressionSpec,
+    IteratorExpressionSpec,
+    NestedExpressionSpec,
+    PropertyNameGetterSpec,
+    PropertyPathGetterSpec,
+    RootDocExpressionSpec,
+    SwitchExpressionSpec,
+)
+from corehq.apps.userreports.filters import (
+    ANDFilter,
+    CustomFilter,
+    NamedFilter,
+    NOTFilter,
+    ORFilter,
+    SinglePropertyValueFilter,
+)
+from corehq.apps.userreports.indicators import (
+    BooleanIndicator,
+    ColumnValue,
+    CompoundIndicator,
+    RawIndicator,
+    SmallBooleanIndicator,
+)
+from corehq.apps.userreports.operators import equal
+
+
+def compile_expression(expression):
+    """
+    :param expression: an expression returned by ``ExpressionFactory.from_spec``
+        or any other ``fn(item, context=None)`` callable.
+    :return: a ``fn(item, context=None)`` callable returning the same values
+    """
+    compiler = _EXPRESSION_COMPILERS.get(type(expression))
+    if compiler is None:
+        return expression
+    return compiler(expression)
+
+
+def compile_filter(filter_):
+    """
+    :param filter_: a filter returned by ``FilterFactory.from_spec``
+    :return: a ``fn(item, context=None)`` callable returning the same values
+    """
+    compiler = _FILTER_COMPILERS.get(type(filter_))
+    if compiler is None:
+        return filter_
+    return compiler(filter_)
+
+
+def compile_indicator(indicator):
+    """
+    :param indicator: an indicator returned by ``IndicatorFactory.from_spec``
+    :return: a ``fn(item, context)`` callable returning the same list of ``ColumnValue``
+        objects as ``indicator.get_values``
+    """
+    compiler = _INDICATOR_COMPILERS.get(type(indicator))
+    if compiler is None:
+        return indicator.get_values
+    return compiler(indicator)
+
+
+def _identity(expression):
+    def fn(item, context=None):
+        return item
+    return fn
+
+
+def _iteration_number(expression):
+    def fn(item, context=None):
+        return context.iteration
+    return fn
+
+
+def _constant(expression):
+    value = expression.constant
+
+    def fn(item, context=None):
+        return value
+    return fn
+
+
+def _property_name(expression):
+    transform = _get_transform(expression.datatype)
+    name_expression = expression._property_name_expression
+    if type(name_expression) is ConstantGetterSpec:
+        name = name_expression.constant
+
+        def get(item, context):
+            return item.get(name) if isinstance(item, dict) else None
+    else:
+        name_fn = compile_expression(name_expression)
+
+        def get(item, context):
+            return item.get(name_fn(item, context)) if isinstance(item, dict) else None
+
+    if transform is None:
+        def fn(item, context=None):
+            return get(item, context)
+    else:
+        def fn(item, context=None):
+            return transform(get(item, context))
+    return fn
+
+
+def _property_path(expression):
+    return _compile_path_lookup(expression.property_path, _get_transform(expression.datatype))
+
+
+def _compile_path_lookup(path, transform=None):
+    transform = transform or (lambda value: value)
+    path = list(path)
+    if not path:
+        # safe_recursive_lookup returns None for empty paths
+        def fn(item, context=None):
+            return transform(None)
+        return fn
+
+    def fn(item, context=None):
+        if not isinstance(item, dict):
+            return transform(None)
+        value = item
+        try:
+            for key in path:
+                value = value[key]
+        except (KeyError, TypeError, ValueError):
+            return transform(None)
+        return transform(value)
+    return fn
+
+
+def _conditional(expression):
+    test = compile_filter(expression._test_function)
+    if_true = compile_expression(expression._true_expression)
+    if_false = compile_expression(expression._false_expression)
+
+    def fn(item, context=None):
+        if test(item, context):
+            return if_true(item, context)
+        return if_false(item, context)
+    return fn
+
+
+def _switch(expression):
+    switch_on = compile_expression(expression._switch_on_expression)
+    cases = {
+        case: compile_expression(case_expression)
+        for case, case_expression in expression._case_expressions.items()
+    }
+    default = compile_expression(expression._default_expression)
+
+    def fn(item, context=None):
+        switch_value = switch_on(item, context)
+        try:
+            case_fn = cases.get(switch_value, default)
+        except TypeError:
+            # unhashable values can't be equal to any of the cases
+            case_fn = default
+        return case_fn(item, context)
+    return fn
+
+
+def _array_index(expression):
+    array_fn = compile_expression(expression._array_expression)
+    index_fn = compile_expression(expression._index_expression)
+
+    def fn(item, context=None):
+        array_value = array_fn(item, context)
+        if not isinstance(array_value, list):
+            return None
+
+        index_value = index_fn(item, context)
+        if not isinstance(index_value, int):
+            return None
+
+        try:
+            return array_value[index_value]
+        except IndexError:
+            return None
+    return fn
+
+
+def _root_doc(expression):
+    expression_fn = compile_expression(expression._expression_fn)
+
+    def fn(item, context=None):
+        if context is None:
+            return None
+        return expression_fn(context.root_doc, context)
+    return fn
+
+
+def _nested(expression):
+    argument_fn = compile_expression(expression._argument_expression)
+    value_fn = compile_expression(expression._value_expression)
+
+    def fn(item, context=None):
+        return value_fn(argument_fn(item, context), context)
+    return fn
+
+
+def _dict(expression):
+    properties = [
+        (property_name, compile_expression(property_expression))
+        for property_name, property_expression in expression._compiled_properties.items()
+    ]
+
+    def fn(item, context=None):
+        return {property_name: property_fn(item, context) for property_name, property_fn in properties}
+    return fn
+
+
+def _iterator(expression):
+    expression_fns = [compile_expression(e) for e in expression._expression_fns]
+    test = compile_filter(expression._test)
+
+    def fn(item, context=None):
+        values = []
+        for expression_fn in expression_fns:
+            value = expression_fn(item, context)
+            if test(value):
+                values.append(value)
+        return values
+    return fn
+
+
+def _coalesce(expression):
+    expression_fn = compile_expression(expression._expression)
+    default_fn = compile_expression(expression._default_expression)
+
+    def fn(item, context=None):
+        value = expression_fn(item, context)
+        default_value = default_fn(item, context)
+        if value is None or value == '':
+            return default_value
+        return value
+    return fn
+
+
+def _transformed_getter(getter):
+    getter_fn = compile_expression(getter.getter)
+    transform = getter.transform
+    if not transform:
+        return getter_fn
+
+    def fn(item, context=None):
+        return transform(getter_fn(item, context))
+    return fn
+
+
+def _dict_getter(getter):
+    property_name = getter.property_name
+
+    def fn(item, context=None):
+        if not isinstance(item, dict):
+            return None
+        return item.get(property_name)
+    return fn
+
+
+def _nested_dict_getter(getter):
+    return _compile_path_lookup(getter.property_path)
+
+
+def _get_transform(datatype):
+    transform = transform_from_datatype(datatype)
+    # transform_from_datatype returns an identity function for unknown datatypes
+    return transform if datatype else None
+
+
+def _not_filter(filter_):
+    inner = compile_filter(filter_._filter)
+
+    def fn(item, context=None):
+        return not inner(item, context)
+    return fn
+
+
+def _and_filter(filter_):
+    filters = [compile_filter(f) for f in filter_.filters]
+
+    def fn(item, context=None):
+        for f in filters:
+            if not f(item, context):
+                return False
+        return True
+    return fn
+
+
+def _or_filter(filter_):
+    filters = [compile_filter(f) for f in filter_.filters]
+
+    def fn(item, context=None):
+        for f in filters:
+            if f(item, context):
+                return True
+        return False
+    return fn
+
+
+def _custom_filter(filter_):
+    return filter_._filter
+
+
+def _named_filter(filter_):
+    return compile_filter(filter_.filter)
+
+
+def _single_property_value_filter(filter_):
+    expression_fn = compile_expression(filter_.expression)
+    operator = filter_.operator
+    reference_expression = filter_.reference_expression
+    if type(reference_expression) is not ConstantGetterSpec:
+        reference_fn = compile_expression(reference_expression)
+
+        def fn(item, context=None):
+            return operator(expression_fn(item, context), reference_fn(item, context))
+        return fn
+
+    reference = reference_expression.constant
+    if operator is equal:
+        def fn(item, context=None):
+            return expression_fn(item, context) == reference
+    else:
+        def fn(item, context=None):
+            return operator(expression_fn(item, context), reference)
+    return fn
+
+
+def _raw_indicator(indicator):
+    column = indicator.column
+    getter = compile_expression(indicator.getter)
+
+    def get_values(item, context=None):
+        return [ColumnValue(column, getter(item, context))]
+    return get_values
+
+
+def _boolean_indicator(indicator):
+    column = indicator.column
+    filter_fn = compile_filter(indicator.filter)
+
+    def get_values(item, context=None):
+        return [ColumnValue(column, 1 if filter_fn(item, context) else 0)]
+    return get_values
+
+
+def _compound_indicator(indicator):
+    indicator_fns = [compile_indicator(i) for i in indicator.indicators]
+
+    def get_values(item, context=None):
+        return [value for indicator_fn in indicator_fns for value in indicator_fn(item, context)]
+    return get_values
+
+
+_EXPRESSION_COMPILERS = {
+    IdentityExpressionSpec: _identity,
+    IterationNumberExpressionSpec: _iteration_number,
+    ConstantGetterSpec: _constant,
+    PropertyNameGetterSpec: _property_name,
+    PropertyPathGetterSpec: _property_path,
+    ConditionalExpressionSpec: _conditional,
+    SwitchExpressionSpec: _switch,
+    ArrayIndexExpressionSpec: _array_index,
+    RootDocExpressionSpec: _root_doc,
+    NestedExpressionSpec: _nested,
+    DictExpressionSpec: _dict,
+    IteratorExpressionSpec: _iterator,
+    CoalesceExpressionSpec: _coalesce,
+    TransformedGetter: _transformed_getter,
+    DictGetter: _dict_getter,
+    NestedDictGetter: _nested_dict_getter,
+}
+
+_FILTER_COMPILERS = {
+    NOTFilter: _not_filter,
+    ANDFilter: _and_filter,
+    ORFilter: _or_filter,
+    CustomFilter: _custom_filter,
+    NamedFilter: _named_filter,
+    SinglePropertyValueFilter: _single_property_value_filter,
+}
+
+_INDICATOR_COMPILERS = {
+    RawIndicator: _raw_indicator,
+    BooleanIndicator: _boolean_indicator,
+    SmallBooleanIndicator: _boolean_indicator,
+    CompoundIndicator: _compound_indicator,
+}
@@ -45,6 +45,23 @@ VALID_REFERENCED_DOC_TYPES = [
     'XFormInstance',
 ]
 
+# How rows are written to a data source's table
+# delete the existing rows for the docs then insert the new ones
+UCR_WRITE_STRATEGY_DELETE_INSERT = 'delete_insert'
+# INSERT ... ON CONFLICT DO UPDATE only the rows that changed, then delete stale rows
+UCR_WRITE_STRATEGY_UPSERT = 'upsert'
+UCR_WRITE_STRATEGIES = [UCR_WRITE_STRATEGY_DELETE_INSERT, UCR_WRITE_STRATEGY_UPSERT]
+
+# batches with at least this many rows are written with COPY instead of INSERT
+UCR_COPY_ROWS_THRESHOLD = 1000
+
+# max number of related documents cached while processing a pillow chunk (each
+# subcase counts as one). This limits the number of documents, not their size, so
+# it is kept small: it is plenty for the related docs of a chunk of
+# DEFAULT_PROCESSOR_CHUNK_SIZE changes, and keeps the cache to tens of MB even
+# for large case documents.
+RELATED_DOC_CACHE_SIZE = 500
+
 ASYNC_INDICATOR_QUEUE_TIME = timedelta(minutes=5)
 ASYNC_INDICATOR_CHUNK_SIZE = 100
 
@@ -25,7 +25,7 @@ from corehq.form_processor.interfaces.processor import FormProcessorInterface
 from corehq.util.python_compatibility import soft_assert_type_text
 from dimagi.ext.jsonobject import JsonObject, StringProperty, ListProperty, DictProperty
 from pillowtop.dao.exceptions import DocumentNotFoundError
-from .utils import eval_statements
+from .utils import ParsedStatement
 
 
 class IdentityExpressionSpec(JsonObject):
@@ -394,13 +394,18 @@ class RelatedDocExpressionSpec(JsonObject):
     @staticmethod
     @ucr_context_cache(vary_on=('related_doc_type', 'doc_id',))
     def _get_document(related_doc_type, doc_id, context):
-        document_store = get_document_store_for_doc_type(
-            context.root_doc['domain'], related_doc_type,
-            load_source="related_doc_expression")
-        try:
-            doc = document_store.get_document(doc_id)
-        except DocumentNotFoundError:
-            return None
+        if context.related_doc_cache is not None:
+            doc = context.related_doc_cache.get_document(related_doc_type, doc_id)
+            if doc is None:
+                return None
+        else:
+            document_store = get_document_store_for_doc_type(
+                context.root_doc['domain'], related_doc_type,
+                load_source="related_doc_expression")
+            try:
+                doc = document_store.get_document(doc_id)
+            except DocumentNotFoundError:
+                return None
         if context.root_doc['domain'] != doc.get('domain'):
             return None
         return doc
@@ -409,7 +414,7 @@ class RelatedDocExpressionSpec(JsonObject):
         assert context.root_doc['domain']
         doc = self._get_document(self.related_doc_type, doc_id, context)
         # explicitly use a new evaluation context since this is a new document
-        return self._value_expression(doc, EvaluationContext(doc, 0))
+        return self._value_expression(doc, EvaluationContext(doc, 0, context.related_doc_cache))
 
     def __str__(self):
         return "{}[{}]/{}".format(self.related_doc_type,
@@ -467,13 +472,23 @@ class EvalExpressionSpec(JsonObject):
 
     def configure(self, context_variables):
         self._context_variables = context_variables
+        self._transform = transform_from_datatype(self.datatype)
+        try:
+            self._parsed_statement = ParsedStatement(self.statement)
+        except SyntaxError:
+            # invalid statements have always evaluated to None
+            self._parsed_statement = None
+        except (IndexError, AttributeError):
+            raise BadSpecError('Evaluator statement must be an expression: {}'.format(self.statement))
 
     def __call__(self, item, context=None):
+        if self._parsed_statement is None:
+            return None
         var_dict = self.get_variables(item, context)
         try:
-            untransformed_value = eval_statements(self.statement, var_dict)
-            return transform_from_datatype(self.datatype)(untransformed_value)
-        except (InvalidExpression, SyntaxError, TypeError, ZeroDivisionError):
+            untransformed_value = self._parsed_statement.eval(var_dict)
+            return self._transform(untransformed_value)
+        except (InvalidExpression, TypeError, ZeroDivisionError):
             return None
 
     def get_variables(self, item, context):
@@ -527,6 +542,8 @@ class FormsExpressionSpec(JsonObject):
 
     @ucr_context_cache(vary_on=('case_id',))
     def _get_case_forms(self, case_id, context):
+        if context.related_doc_cache is not None:
+            return context.related_doc_cache.get_case_forms(case_id)
         domain = context.root_doc['domain']
         return FormProcessorInterface(domain).get_case_forms(case_id)
 
@@ -565,6 +582,8 @@ class SubcasesExpressionSpec(JsonObject):
 
     @ucr_context_cache(vary_on=('case_id',))
     def _get_subcases(self, case_id, context):
+        if context.related_doc_cache is not None:
+            return context.related_doc_cache.get_subcases(case_id)
         domain = context.root_doc['domain']
         return [c.to_json() for c in CaseAccessors(domain).get_reverse_indexed_cases([case_id])]
 
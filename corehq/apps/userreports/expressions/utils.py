@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 import copy
 import ast
+import threading
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
@@ -53,13 +54,54 @@ def eval_statements(statement, variable_context):
         statement: a simple python-like math statement
         variable_context: a dict with variable names as key and assigned values as dict values
     """
-    # variable values should be numbers
-    var_types = set(type(value) for value in variable_context.values())
-    if not var_types.issubset({float, Decimal, date, datetime, type(None), bool}.union(set(six.integer_types))):
-        raise InvalidExpression('Context contains disallowed types')
+    return ParsedStatement(statement).eval(variable_context)
 
-    evaluator = EvalNoMethods(operators=SAFE_OPERATORS, names=variable_context, functions=FUNCTIONS)
-    return evaluator.eval(statement)
+
+class ParsedStatement(object):
+    """A math statement that is parsed once and can then be evaluated
+    against any number of variable contexts.
+
+    Each thread sets up its own evaluator once and only binds the
+    variables to it for each evaluation.
+
+    raises SyntaxError if the statement can't be parsed
+    """
+
+    def __init__(self, statement):
+        self.statement = statement
+        self._node = ast.parse(statement.strip()).body[0].value
+        self._local = threading.local()
+
+    def eval(self, variable_context):
+        # variable values should be numbers
+        var_types = set(type(value) for value in variable_context.values())
+        if not var_types.issubset(_ALLOWED_VARIABLE_TYPES):
+            raise InvalidExpression('Context contains disallowed types')
+
+        evaluator = self._get_evaluator()
+        evaluator.names = variable_context
+        return _eval_parsed(evaluator, self.statement, self._node)
+
+    def _get_evaluator(self):
+        try:
+            return self._local.evaluator
+        except AttributeError:
+            self._local.evaluator = EvalNoMethods(operators=SAFE_OPERATORS, names={}, functions=FUNCTIONS)
+            return self._local.evaluator
+
+
+if 'previously_parsed' in six.get_function_code(six.get_unbound_function(SimpleEval.eval)).co_varnames:
+    def _eval_parsed(evaluator, statement, node):
+        return evaluator.eval(statement, previously_parsed=node)
+else:
+    def _eval_parsed(evaluator, statement, node):
+        # older versions of simpleeval (like 0.9.8) only evaluate strings, so
+        # do what `eval` does after parsing, using the private `_eval`
+        evaluator.expr = statement
+        return evaluator._eval(node)
+
+
+_ALLOWED_VARIABLE_TYPES = {float, Decimal, date, datetime, type(None), bool}.union(set(six.integer_types))
 
 
 SUM = 'sum'
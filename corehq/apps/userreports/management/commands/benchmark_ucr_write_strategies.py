@@ -0,0 +1,132 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from six.moves import range
+
+from corehq.apps.userreports.const import UCR_WRITE_STRATEGIES
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.util import get_indicator_adapter
+from dimagi.utils.chunked import chunked
+
+
+class Command(BaseCommand):
+    help = """
+    Compare row throughput and table bloat of the UCR write strategies.
+
+    Creates a throwaway data source table for each strategy, saves every
+    doc once and then re-saves all docs for a number of rounds, changing
+    a fraction of their rows each time.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('--docs', type=int, default=10000)
+        parser.add_argument('--rows-per-doc', type=int, default=5)
+        parser.add_argument('--rounds', type=int, default=3,
+                            help='Number of times every doc is re-saved')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of docs saved at once')
+        parser.add_argument('--change-ratio', type=float, default=0.1,
+                            help='Fraction of rows that change between rounds')
+
+    def handle(self, domain, **options):
+        random.seed(0)
+        docs = [_get_doc(domain, options['rows_per_doc']) for i in range(options['docs'])]
+        print("{docs} docs, {rows} rows per doc, batches of {batch_size} docs".format(
+            docs=options['docs'], rows=options['rows_per_doc'], batch_size=options['batch_size']
+        ))
+        for strategy in UCR_WRITE_STRATEGIES:
+            adapter = get_indicator_adapter(_get_config(domain, strategy))
+            adapter.rebuild_table()
+            try:
+                with adapter.engine.begin() as connection:
+                    # autovacuum would hide the bloat we're trying to measure
+                    connection.execute('ALTER TABLE "{}" SET (autovacuum_enabled = false)'.format(
+                        adapter.get_table().name
+                    ))
+                self._run_benchmark(strategy, adapter, docs, options)
+            finally:
+                adapter.drop_table()
+
+    def _run_benchmark(self, strategy, adapter, docs, options):
+        print("\n{}".format(strategy))
+        for round_number in range(options['rounds'] + 1):
+            if round_number:
+                _change_docs(docs, options['change_ratio'])
+            rows_written = 0
+            start = time.time()
+            for batch in chunked(docs, options['batch_size']):
+                rows = [row for doc in batch for row in adapter.get_all_values(doc)]
+                adapter.save_rows(rows)
+                rows_written += len(rows)
+            duration = time.time() - start
+            print("\tround {}: {:.0f} rows/s".format(round_number, rows_written / duration))
+
+        # give the stats collector time to catch up
+        time.sleep(1)
+        with adapter.engine.begin() as connection:
+            table_name = adapter.get_table().name
+            live, dead = connection.execute(
+                "SELECT n_live_tup, n_dead_tup FROM pg_stat_user_tables WHERE relname = %s", table_name
+            ).fetchone()
+            size = connection.execute("SELECT pg_total_relation_size(%s)", '"{}"'.format(table_name)).scalar()
+        print("\tlive tuples: {}, dead tuples: {}, table size: {:.1f} MB".format(live, dead, size / 1024 / 1024))
+
+
+def _get_config(domain, write_strategy):
+    config = DataSourceConfiguration(
+        domain=domain,
+        referenced_doc_type='XFormInstance',
+        table_id='benchmark_{}_{}'.format(write_strategy, uuid.uuid4().hex[:8]),
+        display_name='UCR write strategy benchmark',
+        configured_filter={},
+        base_item_expression={
+            "type": "property_path",
+            "property_path": ["form", "rows"]
+        },
+        configured_indicators=[
+            {
+                "type": "expression",
+                "expression": {"type": "property_name", "property_name": column_id},
+                "column_id": column_id,
+                "datatype": datatype,
+            }
+            for column_id, datatype in [('name', 'string'), ('count', 'integer'), ('value', 'decimal')]
+        ],
+    )
+    config.sql_settings.write_strategy = write_strategy
+    return config
+
+
+def _get_doc(domain, rows_per_doc):
+    return {
+        '_id': uuid.uuid4().hex,
+        'domain': domain,
+        'doc_type': 'XFormInstance',
+        'form': {
+            'rows': [_get_row() for i in range(rows_per_doc)]
+        }
+    }
+
+
+def _get_row():
+    return {
+        'name': uuid.uuid4().hex,
+        'count': random.randint(0, 1000),
+        'value': random.random(),
+    }
+
+
+def _change_docs(docs, change_ratio):
+    for doc in docs:
+        rows = doc['form']['rows']
+        for i in range(len(rows)):
+            if random.random() < change_ratio:
+                rows[i] = _get_row()
@@ -27,11 +27,18 @@ from corehq.apps.cachehq.mixins import (
 from corehq.apps.userreports.app_manager.data_source_meta import (
     REPORT_BUILDER_DATA_SOURCE_TYPE_VALUES,
 )
+from corehq.apps.userreports.compiler import (
+    compile_expression,
+    compile_filter,
+    compile_indicator,
+)
 from corehq.apps.userreports.const import (
     DATA_SOURCE_TYPE_AGGREGATE,
     DATA_SOURCE_TYPE_STANDARD,
     FILTER_INTERPOLATION_DOC_TYPES,
     UCR_SQL_BACKEND,
+    UCR_WRITE_STRATEGIES,
+    UCR_WRITE_STRATEGY_DELETE_INSERT,
     VALID_REFERENCED_DOC_TYPES,
 )
 from corehq.apps.userreports.dbaccessors import (
@@ -120,6 +127,7 @@ class SQLSettings(DocumentSchema):
     partition_config = SchemaListProperty(SQLPartition)
     citus_config = SchemaProperty(CitusConfig)
     primary_key = ListProperty()
+    write_strategy = StringProperty(choices=UCR_WRITE_STRATEGIES, default=UCR_WRITE_STRATEGY_DELETE_INSERT)
 
 
 class DataSourceBuildInformation(DocumentSchema):
@@ -231,7 +239,7 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
         if eval_context is None:
             eval_context = EvaluationContext(document)
 
-        filter_fn = self._get_main_filter()
+        filter_fn = self._get_compiled_main_filter()
         return filter_fn(document, eval_context)
 
     def deleted_filter(self, document):
@@ -269,6 +277,10 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
     def _get_main_filter(self):
         return self._get_filter([self.referenced_doc_type])
 
+    @memoized
+    def _get_compiled_main_filter(self):
+        return compile_filter(self._get_main_filter())
+
     @memoized
     def _get_deleted_filter(self):
         return self._get_filter(get_deleted_doc_types(self.referenced_doc_type), include_configured=False)
@@ -402,6 +414,20 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
             return ExpressionFactory.from_spec(self.base_item_expression, context=self.get_factory_context())
         return None
 
+    @property
+    @memoized
+    def related_doc_lookups(self):
+        from corehq.apps.userreports.related_docs import get_related_doc_lookups
+        return get_related_doc_lookups(self)
+
+    @memoized
+    def _get_compiled_base_item_expression(self):
+        return compile_expression(self.parsed_expression)
+
+    @memoized
+    def _get_compiled_indicators(self):
+        return compile_indicator(self.indicators)
+
     @memoized
     def get_columns(self):
         return self.indicators.get_columns()
@@ -419,7 +445,7 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
             if not self.base_item_expression:
                 return [document]
             else:
-                result = self.parsed_expression(document, eval_context)
+                result = self._get_compiled_base_item_expression()(document, eval_context)
                 if result is None:
                     return []
                 elif isinstance(result, list):
@@ -450,9 +476,10 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
                     )
                 return []
 
+        get_values = self._get_compiled_indicators()
         rows = []
         for item in self.get_items(doc, eval_context):
-            indicators = self.indicators.get_values(item, eval_context)
+            indicators = get_values(item, eval_context)
             rows.append(indicators)
             eval_context.increment_iteration()
 
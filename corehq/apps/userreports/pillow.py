@@ -18,23 +18,23 @@ from corehq.apps.userreports.exceptions import (
 )
 from corehq.apps.userreports.models import AsyncIndicator
 from corehq.apps.userreports.rebuild import get_table_diffs, get_tables_rebuild_migrate, migrate_tables
+from corehq.apps.userreports.related_docs import RelatedDocumentCache, prefetch_related_docs
 from corehq.apps.userreports.specs import EvaluationContext
 from corehq.apps.userreports.sql import get_indicator_table, get_metadata
 from corehq.apps.userreports.sql.util import table_exists
 from corehq.apps.userreports.tasks import rebuild_indicators
 from corehq.apps.userreports.util import get_indicator_adapter, get_legacy_table_name
 from corehq.sql_db.connections import connection_manager
-from corehq.util.datadog.gauges import datadog_histogram
+from corehq.util.datadog.gauges import datadog_counter, datadog_histogram
 from corehq.util.soft_assert import soft_assert
 from corehq.util.timer import TimingContext
 from pillowtop.checkpoints.manager import KafkaPillowCheckpoint
 from pillowtop.const import DEFAULT_PROCESSOR_CHUNK_SIZE
-from pillowtop.dao.exceptions import DocumentMismatchError
 from pillowtop.exceptions import PillowConfigError
 from pillowtop.logger import pillow_logging
 from pillowtop.pillow.interface import ConstructedPillow
 from pillowtop.processors import BulkPillowProcessor
-from pillowtop.utils import ensure_matched_revisions, ensure_document_exists
+from pillowtop.utils import ensure_matched_revisions, ensure_document_exists, bulk_fetch_changes_docs
 
 REBUILD_CHECK_INTERVAL = 60 * 60  # in seconds
 LONG_UCR_LOGGING_THRESHOLD = 0.5
@@ -262,11 +262,30 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
         to_update = {change for change in changes_chunk if not change.deleted}
         retry_changes, docs = self.get_docs_for_changes(to_update, domain)
         change_exceptions = []
+        # number of doc_exists queries avoided by deleting in bulk instead
+        existence_checks_saved = 0
 
+        related_doc_cache = RelatedDocumentCache(domain)
+        # each data source's filter is evaluated once per doc, both to choose what
+        #   to prefetch and to process the doc
+        docs_to_process = []
         for doc in docs:
-            eval_context = EvaluationContext(doc)
+            eval_context = EvaluationContext(doc, related_doc_cache=related_doc_cache)
+            passing_adapters = {adapter for adapter in adapters if adapter.config.filter(doc, eval_context)}
+            docs_to_process.append((doc, eval_context, passing_adapters))
+
+        try:
+            prefetch_related_docs(related_doc_cache, [
+                (doc, [adapter.config for adapter in passing_adapters if not adapter.run_asynchronous])
+                for doc, eval_context, passing_adapters in docs_to_process
+            ])
+        except Exception:
+            # the cache loads anything that wasn't prefetched on demand
+            pillow_logging.exception("Error prefetching related docs for domain %s", domain)
+
+        for doc, eval_context, passing_adapters in docs_to_process:
             for adapter in adapters:
-                if adapter.config.filter(doc, eval_context):
+                if adapter in passing_adapters:
                     if adapter.run_asynchronous:
                         async_configs_by_doc_id[doc['_id']].append(adapter.config._id)
                     else:
@@ -275,9 +294,19 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
                         except Exception as e:
                             change_exceptions.append((changes_by_id[doc["_id"]], e))
                         eval_context.reset_iteration()
-                elif adapter.config.deleted_filter(doc) or adapter.doc_exists(doc):
+                else:
+                    # docs that no longer pass the filter are deleted in bulk below,
+                    #   which is a no-op for docs that aren't in the table, so it isn't
+                    #   necessary to check for their existence one by one
+                    if not adapter.config.deleted_filter(doc):
+                        existence_checks_saved += 1
                     to_delete_by_adapter[adapter].append(doc['_id'])
 
+        if existence_checks_saved:
+            datadog_counter('commcare.change_feed.ucr_existence_checks_saved', existence_checks_saved, tags=[
+                'domain:{}'.format(domain)
+            ])
+
         # bulk delete by adapter
         to_delete = [c.id for c in changes_chunk if c.deleted]
         for adapter in adapters:
@@ -303,38 +332,7 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
 
     @staticmethod
     def get_docs_for_changes(changes, domain):
-        # break up by doctype
-        changes_by_doctype = defaultdict(list)
-        for change in changes:
-            assert change.metadata.domain == domain
-            changes_by_doctype[change.metadata.data_source_name].append(change)
-
-        # query
-        docs = []
-        for _, _changes in six.iteritems(changes_by_doctype):
-            doc_store = _changes[0].document_store
-            doc_ids_to_query = [change.id for change in _changes if change.should_fetch_document()]
-            new_docs = list(doc_store.iter_documents(doc_ids_to_query))
-            docs_queried_prior = [change.document for change in _changes if not change.should_fetch_document()]
-            docs.extend(new_docs + docs_queried_prior)
-
-        # catch missing docs
-        retry_changes = set()
-        docs_by_id = {doc['_id']: doc for doc in docs}
-        for change in changes:
-            if change.id not in docs_by_id:
-                # we need to capture DocumentMissingError which is not possible in bulk
-                #   so let pillow fall back to serial mode to capture the error for missing docs
-                retry_changes.add(change)
-                continue
-            else:
-                # set this, so that subsequent doc lookups are avoided
-                change.set_document(docs_by_id[change.id])
-            try:
-                ensure_matched_revisions(change, docs_by_id.get(change.id))
-            except DocumentMismatchError:
-                retry_changes.add(change)
-        return retry_changes, docs
+        return bulk_fetch_changes_docs(changes, domain)
 
     def process_change(self, change):
         self.bootstrap_if_needed()
@@ -0,0 +1,198 @@
+"""
+Chunk-level caching of the documents that ``related_doc``, ``get_subcases`` and
+``get_case_forms`` expressions look up.
+
+Expressions cache these lookups in their ``EvaluationContext``, which only lives
+as long as a single document is processed. When the pillow processes a chunk of
+changes it creates a ``RelatedDocumentCache`` for the chunk, prefetches the lookups
+that the data sources will make for the chunk's documents that pass their filters
+with one bulk query per document type, and passes the cache to every
+``EvaluationContext`` it creates.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from collections import OrderedDict, defaultdict, namedtuple
+
+import six
+
+from corehq.apps.change_feed.data_sources import get_document_store_for_doc_type
+from corehq.apps.userreports.const import RELATED_DOC_CACHE_SIZE
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.form_processor.interfaces.processor import FormProcessorInterface
+from couchforms.models import all_known_formlike_doc_types
+from pillowtop.dao.exceptions import DocumentNotFoundError
+
+LOAD_SOURCE = "related_doc_expression"
+
+RELATED_DOC = 'related_doc'
+SUBCASES = 'get_subcases'
+
+RelatedDocLookup = namedtuple('RelatedDocLookup', 'lookup_type doc_type id_expression')
+
+
+class RelatedDocumentCache(object):
+    """
+    Read-through cache of related documents shared by all documents in a pillow chunk.
+
+    Holds at most ``max_size`` documents, evicting the least recently used lookups first.
+    """
+
+    def __init__(self, domain, max_size=RELATED_DOC_CACHE_SIZE):
+        self.domain = domain
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._size = 0
+
+    def get_document(self, doc_type, doc_id):
+        key = (RELATED_DOC, doc_type, doc_id)
+        if key in self._cache:
+            return self._get(key)
+
+        document_store = get_document_store_for_doc_type(self.domain, doc_type, load_source=LOAD_SOURCE)
+        try:
+            doc = document_store.get_document(doc_id)
+        except DocumentNotFoundError:
+            doc = None
+        self._set(key, doc)
+        return doc
+
+    def get_subcases(self, case_id):
+        key = (SUBCASES, case_id)
+        if key in self._cache:
+            return self._get(key)
+
+        subcases = [c.to_json() for c in CaseAccessors(self.domain).get_reverse_indexed_cases([case_id])]
+        self._set(key, subcases)
+        return subcases
+
+    def get_case_forms(self, case_id):
+        key = ('get_case_forms', case_id)
+        if key in self._cache:
+            return self._get(key)
+
+        forms = FormProcessorInterface(self.domain).get_case_forms(case_id)
+        self._set(key, forms)
+        return forms
+
+    def prefetch_documents(self, doc_type, doc_ids):
+        doc_ids = [
+            doc_id for doc_id in doc_ids
+            if (RELATED_DOC, doc_type, doc_id) not in self._cache
+        ][:self.max_size]
+        if not doc_ids:
+            return
+
+        document_store = get_document_store_for_doc_type(self.domain, doc_type, load_source=LOAD_SOURCE)
+        docs_by_id = {doc['_id']: doc for doc in document_store.iter_documents(doc_ids)}
+        for doc_id in doc_ids:
+            self._set((RELATED_DOC, doc_type, doc_id), docs_by_id.get(doc_id))
+
+    def prefetch_subcases(self, case_ids):
+        case_ids = [case_id for case_id in case_ids if (SUBCASES, case_id) not in self._cache][:self.max_size]
+        if not case_ids:
+            return
+
+        subcases_by_case_id = {case_id: [] for case_id in case_ids}
+        for subcase in CaseAccessors(self.domain).get_reverse_indexed_cases(case_ids):
+            subcase_json = subcase.to_json()
+            referenced_ids = {index.referenced_id for index in subcase.indices}
+            for case_id in referenced_ids & set(subcases_by_case_id):
+                subcases_by_case_id[case_id].append(subcase_json)
+        for case_id, subcases in six.iteritems(subcases_by_case_id):
+            self._set((SUBCASES, case_id), subcases)
+
+    def _get(self, key):
+        value = self._cache.pop(key)
+        self._cache[key] = value
+        return value
+
+    def _set(self, key, value):
+        if key in self._cache:
+            self._size -= _size_of(self._cache.pop(key))
+        self._cache[key] = value
+        self._size += _size_of(value)
+        while self._size > self.max_size and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._size -= _size_of(evicted)
+
+
+def _size_of(value):
+    return len(value) if isinstance(value, list) else 1
+
+
+def get_related_doc_lookups(config):
+    """
+    :return: a list of ``RelatedDocLookup`` for the ``related_doc`` and ``get_subcases``
+        expressions in the data source config that can be prefetched.
+    """
+    specs = []
+    _find_lookup_specs(
+        [config.configured_filter, config.configured_indicators, config.base_item_expression,
+         config.named_expressions, config.named_filters],
+        specs
+    )
+
+    lookups = []
+    factory_context = config.get_factory_context()
+    for spec in specs:
+        if spec['type'] == RELATED_DOC:
+            doc_type = spec.get('related_doc_type')
+            if doc_type in all_known_formlike_doc_types():
+                # forms are only loaded with their attachments one at a time
+                continue
+            id_expression = spec['doc_id_expression']
+        else:
+            doc_type = None
+            id_expression = spec['case_id_expression']
+        lookups.append(RelatedDocLookup(
+            spec['type'], doc_type, ExpressionFactory.from_spec(id_expression, factory_context)
+        ))
+    return lookups
+
+
+def _find_lookup_specs(spec, found):
+    if isinstance(spec, dict):
+        if spec.get('type') in (RELATED_DOC, SUBCASES):
+            found.append(spec)
+        for value in spec.values():
+            _find_lookup_specs(value, found)
+    elif isinstance(spec, list):
+        for value in spec:
+            _find_lookup_specs(value, found)
+
+
+def prefetch_related_docs(cache, configs_by_doc):
+    """
+    Evaluates the related document ids that each document's configs look up and
+    loads them into ``cache`` with one query per document type.
+
+    :param configs_by_doc: pairs of a document and the configs it should be
+        prefetched for, i.e. the configs whose filter the document passes.
+
+    Lookups that aren't made on the document itself (e.g. inside repeats) evaluate
+    to nothing here and are loaded on demand by the cache instead.
+    """
+    ids_by_doc_type = defaultdict(set)
+    subcase_ids = set()
+    for doc, configs in configs_by_doc:
+        context = EvaluationContext(doc, related_doc_cache=cache)
+        for config in configs:
+            for lookup in config.related_doc_lookups:
+                try:
+                    doc_id = lookup.id_expression(doc, context)
+                except Exception:
+                    continue
+                if not doc_id or not isinstance(doc_id, six.string_types):
+                    continue
+                if lookup.lookup_type == RELATED_DOC:
+                    ids_by_doc_type[lookup.doc_type].add(doc_id)
+                else:
+                    subcase_ids.add(doc_id)
+
+    for doc_type, doc_ids in six.iteritems(ids_by_doc_type):
+        cache.prefetch_documents(doc_type, sorted(doc_ids))
+    if subcase_ids:
+        cache.prefetch_subcases(sorted(subcase_ids))
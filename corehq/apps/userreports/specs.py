@@ -27,9 +27,11 @@ class EvaluationContext(object):
     as the root document and the iteration number.
     """
 
-    def __init__(self, root_doc, iteration=0):
+    def __init__(self, root_doc, iteration=0, related_doc_cache=None):
         self.root_doc = root_doc
         self.iteration = iteration
+        # RelatedDocumentCache shared across the documents in a pillow chunk
+        self.related_doc_cache = related_doc_cache
         self.inserted_timestamp = datetime.utcnow()
         self.cache = {}
         self.iteration_cache = {}
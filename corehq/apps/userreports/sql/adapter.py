@@ -1,19 +1,23 @@
 from __future__ import absolute_import, unicode_literals
 
 import hashlib
+import io
 import logging
 
 from django.utils.translation import ugettext as _
 
 import psycopg2
+import six
 import sqlalchemy
 from architect import install
 from memoized import memoized
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.schema import Index, PrimaryKeyConstraint
 
 from corehq.apps.userreports.adapter import IndicatorAdapter
+from corehq.apps.userreports.const import UCR_COPY_ROWS_THRESHOLD, UCR_WRITE_STRATEGY_UPSERT
 from corehq.apps.userreports.exceptions import (
     ColumnNotFoundError,
     TableRebuildError,
@@ -210,7 +214,10 @@ class IndicatorSqlAdapter(IndicatorAdapter):
 
     def save_rows(self, rows):
         """
-        Saves rows to a data source after deleting the old rows
+        Saves rows to a data source, replacing the old rows for the same docs.
+
+        How the rows are written depends on the data source's
+        ``sql_settings.write_strategy``. Large batches are written with COPY.
         """
         if not rows:
             return
@@ -222,7 +229,30 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         ]
         doc_ids = set(row['doc_id'] for row in formatted_rows)
         table = self.get_table()
-        delete = table.delete(table.c.doc_id.in_(doc_ids))
+        with self.session_context() as session:
+            if self._use_upsert():
+                self._upsert_rows(session, table, doc_ids, formatted_rows)
+            else:
+                session.execute(table.delete(table.c.doc_id.in_(doc_ids)))
+                self._insert_rows(session, table, formatted_rows)
+
+    def _use_upsert(self):
+        # partitions are implemented with insert triggers which don't support ON CONFLICT
+        return (
+            self.config.sql_settings.write_strategy == UCR_WRITE_STRATEGY_UPSERT
+            and not self.config.sql_settings.partition_config
+        )
+
+    def _use_copy(self, table, rows):
+        return len(rows) >= UCR_COPY_ROWS_THRESHOLD and not any(
+            isinstance(column.type, postgresql.ARRAY) for column in table.columns
+        )
+
+    def _insert_rows(self, session, table, rows):
+        if self._use_copy(table, rows):
+            copy_rows(session, table, rows)
+            return
+
         # Using session.bulk_insert_mappings below might seem more inline
         #   with sqlalchemy API, but it results in
         #   appending an empty row which results in a postgres
@@ -231,10 +261,43 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         #   the plain INSERT INTO VALUES statement resulting from below line
         #   because bulk_insert_mappings is meant for multi-table insertion
         #   so it has overhead of format conversions and multiple statements
-        insert = table.insert().values(formatted_rows)
-        with self.session_context() as session:
-            session.execute(delete)
-            session.execute(insert)
+        session.execute(table.insert().values(rows))
+
+    def _upsert_rows(self, session, table, doc_ids, rows):
+        pk_columns = [table.c[column_name] for column_name in self.config.pk_columns]
+        update_columns = [column for column in table.columns if column.name not in self.config.pk_columns]
+
+        if self._use_copy(table, rows):
+            staging_table = get_staging_table(table)
+            staging_table.create(session.connection())
+            copy_rows(session, staging_table, rows)
+            insert = postgresql.insert(table).from_select(
+                [column.name for column in staging_table.columns], staging_table.select()
+            )
+        else:
+            insert = postgresql.insert(table).values(rows)
+
+        # inserted_at is always different so only compare the other columns
+        compare_columns = [column for column in update_columns if column.name != 'inserted_at']
+        if compare_columns:
+            insert = insert.on_conflict_do_update(
+                index_elements=pk_columns,
+                set_={column.name: insert.excluded[column.name] for column in update_columns},
+                # don't rewrite rows that haven't changed to avoid creating dead tuples
+                where=sqlalchemy.tuple_(*compare_columns).op('IS DISTINCT FROM')(
+                    sqlalchemy.tuple_(*[insert.excluded[column.name] for column in compare_columns])
+                ),
+            )
+        else:
+            insert = insert.on_conflict_do_nothing(index_elements=pk_columns)
+        session.execute(insert)
+
+        # remove rows that the docs no longer produce e.g. a repeat that was removed
+        new_keys = {tuple(row[column.name] for column in pk_columns) for row in rows}
+        session.execute(table.delete().where(sqlalchemy.and_(
+            table.c.doc_id.in_(doc_ids),
+            sqlalchemy.not_(sqlalchemy.tuple_(*pk_columns).in_(new_keys)),
+        )))
 
     def bulk_save(self, docs):
         rows = []
@@ -243,6 +306,9 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         self.save_rows(rows)
 
     def bulk_delete(self, doc_ids):
+        if not doc_ids:
+            return
+
         table = self.get_table()
         delete = table.delete(table.c.doc_id.in_(doc_ids))
         with self.session_context() as session:
@@ -310,6 +376,52 @@ def get_indicator_table(indicator_config, metadata, override_table_name=None):
     )
 
 
+def get_staging_table(table):
+    """
+    Temporary table with the same columns as ``table`` that is dropped at the end
+    of the current transaction.
+    """
+    return sqlalchemy.Table(
+        '{}_staging'.format(table.name)[:63],
+        sqlalchemy.MetaData(),
+        *[sqlalchemy.Column(column.name, column.type) for column in table.columns],
+        prefixes=['TEMPORARY'],
+        postgresql_on_commit='DROP'
+    )
+
+
+def copy_rows(session, table, rows):
+    """
+    Write rows into table with COPY which is much faster than INSERT for large batches
+    """
+    column_names = [column.name for column in table.columns]
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_to_copy_value(row.get(name)) for name in column_names))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert('COPY "{}" ({}) FROM STDIN'.format(
+        table.name, ', '.join('"{}"'.format(name) for name in column_names)
+    ), buffer)
+
+
+def _to_copy_value(value):
+    # see "Text Format" in https://www.postgresql.org/docs/current/sql-copy.html
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (
+        six.text_type(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
 def _custom_index_name(table_name, column_ids):
     base_name = "ix_{}_{}".format(table_name, ','.join(column_ids))
     base_hash = hashlib.md5(base_name.encode('utf-8')).hexdigest()
@@ -66,14 +66,26 @@ def _get_config_by_id(indicator_config_id):
 def _build_indicators(config, document_store, relevant_ids):
     adapter = get_indicator_adapter(config, raise_errors=True, load_source='build_indicators')
 
+    rows_by_doc = []
     for doc in document_store.iter_documents(relevant_ids):
         if config.asynchronous:
             AsyncIndicator.update_record(
                 doc.get('_id'), config.referenced_doc_type, config.domain, [config._id]
             )
         else:
-            # save is a noop if the filter doesn't match
-            adapter.best_effort_save(doc)
+            # there are no rows if the filter doesn't match
+            try:
+                rows_by_doc.append((doc, adapter.get_all_values(doc)))
+            except Exception as e:
+                adapter.handle_exception(doc, e)
+
+    # save the whole batch at once so that large batches can be written with COPY
+    try:
+        adapter.save_rows([row for doc, rows in rows_by_doc for row in rows])
+    except Exception:
+        # fall back to saving doc by doc so that errors are handled per doc
+        for doc, rows in rows_by_doc:
+            adapter._best_effort_save_rows(rows, doc)
 
 
 @task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True)
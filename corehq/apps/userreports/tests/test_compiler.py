@@ -0,0 +1,218 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import json
+import os
+from io import open
+
+import six
+from django.test import SimpleTestCase
+from mock import MagicMock, patch
+
+from corehq.apps.userreports.compiler import compile_expression, compile_filter, compile_indicator
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.models import DataSourceConfiguration, StaticDataSourceConfiguration
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.tests.utils import domain_lite, get_sample_data_source
+
+USERREPORTS_DIR = os.path.dirname(os.path.dirname(__file__))
+
+EXAMPLE_DATA_SOURCES = [
+    os.path.join(USERREPORTS_DIR, 'examples', 'dimagi', 'dimagi-case-data-source.json'),
+    os.path.join(USERREPORTS_DIR, 'examples', 'gsid', 'gsid-form-data-source.json'),
+    os.path.join(USERREPORTS_DIR, 'tests', 'data', 'configs', 'sample_data_source.json'),
+    os.path.join(USERREPORTS_DIR, 'tests', 'data', 'configs', 'data_source_with_repeat.json'),
+    os.path.join(USERREPORTS_DIR, 'tests', 'data', 'configs', 'parent_child_data_source.json'),
+]
+
+
+def _get_example_data_sources():
+    for path in EXAMPLE_DATA_SOURCES:
+        with open(path, encoding='utf-8') as f:
+            yield path, DataSourceConfiguration.wrap(json.loads(f.read()))
+
+
+def _get_static_data_sources():
+    for config in StaticDataSourceConfiguration.all():
+        yield '{}:{}'.format(config.domain, config.table_id), config
+
+
+def _collect_spec_references(spec, paths, values):
+    """
+    Walks a data source spec collecting every document path it looks at
+    and every literal value it compares against or returns.
+    """
+    if isinstance(spec, dict):
+        if spec.get('type') == 'property_name' and isinstance(spec.get('property_name'), six.string_types):
+            paths.add((spec['property_name'],))
+        elif spec.get('type') == 'property_path' and spec.get('property_path'):
+            paths.add(tuple(spec['property_path']))
+        for key in ('property_value', 'constant'):
+            if key in spec:
+                _collect_values(spec[key], values)
+        if spec.get('type') == 'switch':
+            _collect_values(list(spec.get('cases', {})), values)
+        for value in spec.values():
+            _collect_spec_references(value, paths, values)
+    elif isinstance(spec, list):
+        for value in spec:
+            _collect_spec_references(value, paths, values)
+
+
+def _collect_values(value, values):
+    if isinstance(value, list):
+        for v in value:
+            _collect_values(v, values)
+    elif not isinstance(value, dict) and value not in values:
+        values.append(value)
+
+
+def _set_path(doc, path, value):
+    for key in path[:-1]:
+        if not isinstance(doc.get(key), dict):
+            doc[key] = {}
+        doc = doc[key]
+    doc[path[-1]] = value
+
+
+def _get_sample_docs(config):
+    """
+    Builds documents that exercise the paths referenced in the config, filled in with
+    the values the config tests for, as well as missing and wrongly typed values.
+    """
+    paths = set()
+    values = [None, '', 0, 1, '1', 'yes', '2018-01-01', [], [{}]]
+    _collect_spec_references(config.to_json(), paths, values)
+    paths = sorted(paths, key=len)
+
+    def _base_doc():
+        return {
+            '_id': 'sample-doc-id',
+            'domain': config.domain,
+            'doc_type': config.referenced_doc_type,
+        }
+
+    docs = [_base_doc()]
+    for offset in range(len(values)):
+        doc = _base_doc()
+        for i, path in enumerate(paths):
+            value = values[(offset + i) % len(values)]
+            if value is not None:
+                _set_path(doc, path, value)
+        docs.append(doc)
+
+    # repeats need lists of dicts with the nested properties set
+    for doc in list(docs[1:4]):
+        nested = _base_doc()
+        for path in paths:
+            _set_path(nested, path, [dict(doc)])
+        docs.append(nested)
+    return docs
+
+
+def _evaluate(fn, *args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        return type(e)
+
+
+def _evaluate_values(fn, item, context):
+    values = _evaluate(fn, item, context)
+    if isinstance(values, list):
+        return [(value.column.id, value.value) for value in values]
+    return values
+
+
+@patch('corehq.apps.callcenter.data_source.get_call_center_domains', MagicMock(return_value=[domain_lite('cc1')]))
+class CompiledDataSourceTest(SimpleTestCase):
+    """
+    Checks that compiled filters, expressions and indicators produce exactly the same
+    results as evaluating the configured objects directly, for every data source in the repo.
+    """
+
+    def _contexts(self, doc):
+        interpreted, compiled = EvaluationContext(doc), EvaluationContext(doc)
+        compiled.inserted_timestamp = interpreted.inserted_timestamp
+        return interpreted, compiled
+
+    def _check_data_source(self, name, config):
+        main_filter = config._get_main_filter()
+        compiled_filter = compile_filter(main_filter)
+        base_item_expression = config.parsed_expression
+        indicators = config.indicators
+        compiled_indicators = compile_indicator(indicators)
+
+        for doc in _get_sample_docs(config):
+            interpreted_context, compiled_context = self._contexts(doc)
+            self.assertEqual(
+                _evaluate(main_filter, doc, interpreted_context),
+                _evaluate(compiled_filter, doc, compiled_context),
+                '{}: filter mismatch for {}'.format(name, doc),
+            )
+
+            items = [doc]
+            if base_item_expression is not None:
+                interpreted_context, compiled_context = self._contexts(doc)
+                interpreted_items = _evaluate(base_item_expression, doc, interpreted_context)
+                self.assertEqual(
+                    interpreted_items,
+                    _evaluate(compile_expression(base_item_expression), doc, compiled_context),
+                    '{}: base item expression mismatch for {}'.format(name, doc),
+                )
+                items = interpreted_items if isinstance(interpreted_items, list) else [doc]
+
+            interpreted_context, compiled_context = self._contexts(doc)
+            for item in items:
+                self.assertEqual(
+                    _evaluate_values(indicators.get_values, item, interpreted_context),
+                    _evaluate_values(compiled_indicators, item, compiled_context),
+                    '{}: indicator mismatch for {}'.format(name, item),
+                )
+                interpreted_context.increment_iteration()
+                compiled_context.increment_iteration()
+
+    def test_example_data_sources(self):
+        for name, config in _get_example_data_sources():
+            self._check_data_source(name, config)
+
+    def test_static_data_sources(self):
+        for name, config in _get_static_data_sources():
+            self._check_data_source(name, config)
+
+    def test_get_all_values(self):
+        config = get_sample_data_source()
+        for doc in _get_sample_docs(config):
+            context = EvaluationContext(doc)
+            expected = []
+            for item in config.get_items(doc, context):
+                expected.append([
+                    (value.column.id, value.value)
+                    for value in config.indicators.get_values(item, context)
+                ])
+                context.increment_iteration()
+            context.iteration = 0
+            actual = [
+                [(value.column.id, value.value) for value in row]
+                for row in config.get_all_values(doc, context)
+            ]
+            self.assertEqual(expected, actual)
+
+
+class CompilerFallbackTest(SimpleTestCase):
+
+    def test_unknown_expression_is_returned_unchanged(self):
+        def expression(item, context=None):
+            return item
+        self.assertIs(expression, compile_expression(expression))
+
+    def test_switch_with_unhashable_value(self):
+        expression = ExpressionFactory.from_spec({
+            'type': 'switch',
+            'switch_on': {'type': 'property_name', 'property_name': 'value'},
+            'cases': {'a': {'type': 'constant', 'constant': 'matched'}},
+            'default': {'type': 'constant', 'constant': 'default'},
+        })
+        compiled = compile_expression(expression)
+        for doc in ({'value': 'a'}, {'value': 'b'}, {'value': ['a']}, {'value': {'a': 1}}, {}):
+            self.assertEqual(expression(doc), compiled(doc))
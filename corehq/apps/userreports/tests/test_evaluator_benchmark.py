@@ -0,0 +1,55 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import timeit
+
+from django.test import SimpleTestCase
+from nose.plugins.attrib import attr
+
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.expressions.utils import EvalNoMethods, FUNCTIONS, SAFE_OPERATORS
+from corehq.apps.userreports.specs import EvaluationContext
+
+STATEMENT = "(a * b + c) / d if a > b else (c - a) * d"
+DOC = {'a': 7, 'b': 3, 'c': 12, 'd': 4}
+ITERATIONS = 2000
+
+
+class EvaluatorThroughputBenchmark(SimpleTestCase):
+    """
+    Compares evaluating an evaluator expression by parsing its statement for
+    every document (as it was done before statements were parsed in ``configure``)
+    with evaluating the pre-parsed statement.
+
+    Timings depend on the machine, so this only prints them.
+    """
+
+    def setUp(self):
+        self.expression = ExpressionFactory.from_spec({
+            'type': 'evaluator',
+            'statement': STATEMENT,
+            'context_variables': {
+                name: {'type': 'property_name', 'property_name': name}
+                for name in DOC
+            },
+        })
+        self.context = EvaluationContext(DOC)
+
+    def _parse_every_doc(self):
+        variables = self.expression.get_variables(DOC, self.context)
+        evaluator = EvalNoMethods(operators=SAFE_OPERATORS, names=variables, functions=FUNCTIONS)
+        return evaluator.eval(STATEMENT)
+
+    def _parsed_once(self):
+        return self.expression(DOC, self.context)
+
+    @attr("slow")
+    def test_throughput(self):
+        self.assertEqual(self._parse_every_doc(), self._parsed_once())
+
+        before = min(timeit.repeat(self._parse_every_doc, number=ITERATIONS, repeat=3))
+        after = min(timeit.repeat(self._parsed_once, number=ITERATIONS, repeat=3))
+        print("\nevaluator throughput: {:.0f} docs/s parsing every doc, {:.0f} docs/s parsed once ({:.1f}x)"
+              .format(ITERATIONS / before, ITERATIONS / after, before / after))
@@ -19,7 +19,7 @@ from corehq.apps.userreports.expressions.specs import (
     PropertyNameGetterSpec,
     PropertyPathGetterSpec,
 )
-from corehq.apps.userreports.expressions.specs import eval_statements
+from corehq.apps.userreports.expressions.utils import eval_statements
 from corehq.apps.userreports.specs import EvaluationContext, FactoryContext
 from corehq.apps.users.models import CommCareUser
 from corehq.apps.groups.models import Group
@@ -1056,7 +1056,10 @@ def test_valid_eval_expression(self, source_doc, statement, context, expected_va
     ({}, "2 + 3", 42),
     ({}, "2 + 3", []),
     # statement must be string
-    ({}, 2 + 3, {"a": 2, "b": 3})
+    ({}, 2 + 3, {"a": 2, "b": 3}),
+    # statement must be an expression
+    ({}, "   ", {}),
+    ({}, "pass", {}),
 ])
 def test_invalid_eval_expression(self, source_doc, statement, context):
     with self.assertRaises(BadSpecError):
@@ -1141,6 +1144,23 @@ class TestEvaluatorTypes(SimpleTestCase):
         self.assertEqual(type(ExpressionFactory.from_spec(spec)({})), int)
 
 
+class TestEvaluatorVariables(SimpleTestCase):
+
+    def test_variables_are_not_kept_between_docs(self):
+        expression = ExpressionFactory.from_spec({
+            "type": "evaluator",
+            "statement": "a + b",
+            "context_variables": {
+                "a": {"type": "property_name", "property_name": "a"},
+                "b": {"type": "property_name", "property_name": "b"},
+            }
+        })
+        self.assertEqual(expression({"a": 1, "b": 2}), 3)
+        self.assertEqual(expression({"a": 3, "b": 4}), 7)
+        # b is None and must not be taken from the previous doc
+        self.assertEqual(expression({"a": 1}), None)
+
+
 @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=False)
 class TestFormsExpressionSpec(TestCase):
 
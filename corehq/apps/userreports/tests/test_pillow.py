@@ -22,6 +22,7 @@ from corehq.apps.userreports.models import DataSourceConfiguration, AsyncIndicat
 from corehq.apps.userreports.pillow import REBUILD_CHECK_INTERVAL, \
     ConfigurableReportTableManagerMixin, \
     ConfigurableReportPillowProcessor
+from corehq.apps.userreports.sql.adapter import IndicatorSqlAdapter
 from corehq.apps.userreports.tasks import rebuild_indicators, queue_async_indicators
 from corehq.apps.userreports.tests.utils import get_sample_data_source, get_sample_doc_and_indicators, \
     doc_to_change, get_data_source_with_related_doc_type
@@ -420,6 +421,25 @@ class IndicatorPillowTest(TestCase):
 
         self.assertEqual(0, self.adapter.get_query_object().count())
 
+    @mock.patch('corehq.apps.userreports.specs.datetime')
+    def test_process_filter_no_longer_pass_chunked(self, datetime_mock):
+        datetime_mock.utcnow.return_value = self.fake_time_now
+        sample_doc, expected_indicators = get_sample_doc_and_indicators(self.fake_time_now)
+        processor = ConfigurableReportPillowProcessor(data_source_providers=[MockDataSourceProvider()])
+        processor.bootstrap(configs=[self.config])
+
+        processor.process_changes_chunk([doc_to_change(sample_doc)])
+        self._check_sample_doc_state(expected_indicators)
+
+        sample_doc['type'] = 'wrong_type'
+        with mock.patch.object(IndicatorSqlAdapter, 'doc_exists') as doc_exists:
+            retry_changes, change_exceptions = processor.process_changes_chunk([doc_to_change(sample_doc)])
+
+        self.assertEqual((set(), []), (retry_changes, change_exceptions))
+        # the doc should be deleted in bulk without checking if it exists first
+        self.assertFalse(doc_exists.called)
+        self.assertEqual(0, self.adapter.get_query_object().count())
+
     @mock.patch('corehq.apps.userreports.specs.datetime')
     @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
     def test_check_if_doc_exist(self, datetime_mock):
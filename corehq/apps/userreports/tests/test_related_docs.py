@@ -0,0 +1,143 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+from django.test import SimpleTestCase
+from mock import MagicMock, patch
+
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.related_docs import (
+    RELATED_DOC,
+    SUBCASES,
+    RelatedDocumentCache,
+    prefetch_related_docs,
+)
+from corehq.apps.userreports.specs import EvaluationContext
+from pillowtop.dao.exceptions import DocumentNotFoundError
+
+DOMAIN = 'related-docs-test'
+
+
+class FakeDocumentStore(object):
+
+    def __init__(self, docs):
+        self.docs = {doc['_id']: doc for doc in docs}
+        self.get_document = MagicMock(side_effect=self._get_document)
+        self.iter_documents = MagicMock(side_effect=self._iter_documents)
+
+    def _get_document(self, doc_id):
+        try:
+            return self.docs[doc_id]
+        except KeyError:
+            raise DocumentNotFoundError()
+
+    def _iter_documents(self, ids):
+        return [self.docs[doc_id] for doc_id in ids if doc_id in self.docs]
+
+
+def _get_config():
+    return DataSourceConfiguration(
+        domain=DOMAIN,
+        referenced_doc_type='CommCareCase',
+        table_id='related_docs',
+        configured_filter={},
+        configured_indicators=[{
+            'type': 'expression',
+            'column_id': 'parent_name',
+            'datatype': 'string',
+            'expression': {
+                'type': 'related_doc',
+                'related_doc_type': 'CommCareCase',
+                'doc_id_expression': {'type': 'property_name', 'property_name': 'parent_id'},
+                'value_expression': {'type': 'property_name', 'property_name': 'name'},
+            },
+        }, {
+            'type': 'expression',
+            'column_id': 'subcases',
+            'datatype': 'array',
+            'expression': {
+                'type': 'get_subcases',
+                'case_id_expression': {'type': 'property_name', 'property_name': '_id'},
+            },
+        }],
+    )
+
+
+class RelatedDocumentCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.parents = [
+            {'_id': 'parent-{}'.format(i), 'domain': DOMAIN, 'name': 'parent {}'.format(i)}
+            for i in range(3)
+        ]
+        self.store = FakeDocumentStore(self.parents)
+        patcher = patch('corehq.apps.userreports.related_docs.get_document_store_for_doc_type',
+                        return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_read_through(self):
+        cache = RelatedDocumentCache(DOMAIN)
+        self.assertEqual(self.parents[0], cache.get_document('CommCareCase', 'parent-0'))
+        self.assertEqual(self.parents[0], cache.get_document('CommCareCase', 'parent-0'))
+        self.assertIsNone(cache.get_document('CommCareCase', 'missing'))
+        self.assertIsNone(cache.get_document('CommCareCase', 'missing'))
+        self.assertEqual(2, self.store.get_document.call_count)
+
+    def test_prefetch_documents(self):
+        cache = RelatedDocumentCache(DOMAIN)
+        cache.prefetch_documents('CommCareCase', ['parent-0', 'parent-1', 'missing'])
+        self.assertEqual(1, self.store.iter_documents.call_count)
+        self.assertEqual(self.parents[1], cache.get_document('CommCareCase', 'parent-1'))
+        self.assertIsNone(cache.get_document('CommCareCase', 'missing'))
+        self.assertEqual(0, self.store.get_document.call_count)
+
+    def test_max_size(self):
+        cache = RelatedDocumentCache(DOMAIN, max_size=2)
+        cache.prefetch_documents('CommCareCase', ['parent-0', 'parent-1'])
+        # parent-0 was used most recently so parent-1 gets evicted
+        cache.get_document('CommCareCase', 'parent-0')
+        cache.get_document('CommCareCase', 'parent-2')
+        self.assertEqual(1, self.store.get_document.call_count)
+
+        cache.get_document('CommCareCase', 'parent-0')
+        self.assertEqual(1, self.store.get_document.call_count)
+        cache.get_document('CommCareCase', 'parent-1')
+        self.assertEqual(2, self.store.get_document.call_count)
+
+    def test_prefetch_related_docs_for_config(self):
+        config = _get_config()
+        self.assertEqual(
+            [RELATED_DOC, SUBCASES],
+            [lookup.lookup_type for lookup in config.related_doc_lookups]
+        )
+
+        docs = [
+            {'_id': 'child-{}'.format(i), 'domain': DOMAIN, 'doc_type': 'CommCareCase', 'parent_id': parent['_id']}
+            for i, parent in enumerate(self.parents)
+        ]
+        cache = RelatedDocumentCache(DOMAIN)
+        with patch.object(RelatedDocumentCache, 'prefetch_subcases') as prefetch_subcases:
+            prefetch_related_docs(cache, [(doc, [config]) for doc in docs])
+        prefetch_subcases.assert_called_once_with(['child-0', 'child-1', 'child-2'])
+        self.assertEqual(1, self.store.iter_documents.call_count)
+
+        expression = ExpressionFactory.from_spec(config.configured_indicators[0]['expression'])
+        for doc, parent in zip(docs, self.parents):
+            context = EvaluationContext(doc, related_doc_cache=cache)
+            self.assertEqual(parent['name'], expression(doc, context))
+        self.assertEqual(0, self.store.get_document.call_count)
+
+    def test_prefetch_related_docs_only_for_given_configs(self):
+        config = _get_config()
+        docs = [
+            {'_id': 'child-{}'.format(i), 'domain': DOMAIN, 'doc_type': 'CommCareCase', 'parent_id': parent['_id']}
+            for i, parent in enumerate(self.parents)
+        ]
+        cache = RelatedDocumentCache(DOMAIN)
+        with patch.object(RelatedDocumentCache, 'prefetch_documents') as prefetch_documents, \
+                patch.object(RelatedDocumentCache, 'prefetch_subcases') as prefetch_subcases:
+            # only the first doc passes the config's filter
+            prefetch_related_docs(cache, [(docs[0], [config]), (docs[1], []), (docs[2], [])])
+        prefetch_documents.assert_called_once_with('CommCareCase', ['parent-0'])
+        prefetch_subcases.assert_called_once_with(['child-0'])
@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+
+from django.test import TestCase
+from mock import patch
+
+from corehq.apps.userreports.const import UCR_WRITE_STRATEGY_DELETE_INSERT, UCR_WRITE_STRATEGY_UPSERT
+from corehq.apps.userreports.tests.test_data_source_repeats import RepeatDataSourceTestMixin, _test_doc
+from corehq.apps.userreports.util import get_indicator_adapter
+
+
+class WriteStrategyTestMixin(RepeatDataSourceTestMixin):
+    write_strategy = None
+
+    def setUp(self):
+        super(WriteStrategyTestMixin, self).setUp()
+        self.config.sql_settings.write_strategy = self.write_strategy
+        self.adapter = get_indicator_adapter(self.config)
+        self.adapter.rebuild_table()
+        now = datetime.datetime.utcnow().replace(microsecond=0)
+        one_hour = datetime.timedelta(hours=1)
+        self.logs = [
+            {"start_time": now, "end_time": now + one_hour, "person": "al"},
+            {"start_time": now + one_hour, "end_time": now + (one_hour * 2), "person": "chris"},
+            {"start_time": now + (one_hour * 2), "end_time": now + (one_hour * 3), "person": "katie"},
+        ]
+
+    def tearDown(self):
+        self.adapter.drop_table()
+        super(WriteStrategyTestMixin, self).tearDown()
+
+    def _get_people(self):
+        return sorted(row.person for row in self.adapter.get_query_object())
+
+    def test_save(self):
+        self.adapter.save(_test_doc(form={'time_logs': self.logs}))
+        self.assertEqual(['al', 'chris', 'katie'], self._get_people())
+
+    def test_update(self):
+        self.adapter.save(_test_doc(form={'time_logs': self.logs}))
+        self.logs[1]['person'] = 'bob'
+        self.adapter.save(_test_doc(form={'time_logs': self.logs}))
+        self.assertEqual(['al', 'bob', 'katie'], self._get_people())
+
+    def test_removed_repeat(self):
+        self.adapter.save(_test_doc(form={'time_logs': self.logs}))
+        self.adapter.save(_test_doc(form={'time_logs': self.logs[:1]}))
+        self.assertEqual(['al'], self._get_people())
+
+    @patch('corehq.apps.userreports.sql.adapter.UCR_COPY_ROWS_THRESHOLD', 1)
+    def test_save_with_copy(self):
+        self.logs[0]['person'] = 'tab\tnew\nline\\'
+        self.adapter.save(_test_doc(form={'time_logs': self.logs}))
+        self.adapter.save(_test_doc(form={'time_logs': self.logs[:2]}))
+        self.assertEqual(['chris', 'tab\tnew\nline\\'], self._get_people())
+
+
+class DeleteInsertWriteStrategyTest(WriteStrategyTestMixin, TestCase):
+    write_strategy = UCR_WRITE_STRATEGY_DELETE_INSERT
+
+
+class UpsertWriteStrategyTest(WriteStrategyTestMixin, TestCase):
+    write_strategy = UCR_WRITE_STRATEGY_UPSERT
+
+    def test_unchanged_rows_not_rewritten(self):
+        self.adapter.save(_test_doc(form={'time_logs': self.logs}))
+        inserted_at = {row.person: row.inserted_at for row in self.adapter.get_query_object()}
+
+        self.logs[1]['person'] = 'bob'
+        self.adapter.save(_test_doc(form={'time_logs': self.logs}))
+        updated_inserted_at = {row.person: row.inserted_at for row in self.adapter.get_query_object()}
+
+        self.assertEqual(inserted_at['al'], updated_inserted_at['al'])
+        self.assertEqual(inserted_at['katie'], updated_inserted_at['katie'])
+        self.assertGreater(updated_inserted_at['bob'], inserted_at['chris'])
@@ -1,10 +1,13 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import copy
 import logging
+import threading
 import time
 from io import open
+from six.moves.queue import Empty, Full, Queue
 from six.moves.urllib.parse import unquote
 
 from dimagi.utils.chunked import chunked
@@ -251,9 +254,15 @@ def iter_es_docs(index_name, ids):
                 yield result['_source']
 
 
-def iter_es_docs_from_query(query):
+def iter_es_docs_from_query(query, max_workers=1):
     """Returns all docs which match query
+
+    With max_workers > 1 the documents are scrolled directly from that many
+    shards at once instead of being fetched by id after a single scroll.
     """
+    if max_workers > 1:
+        return query.scroll(max_workers=max_workers)
+
     scroll_result = query.scroll_ids()
 
     def iter_export_docs():
@@ -284,6 +293,20 @@ def scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE):
         raise ESError(e)
 
 
+def parallel_scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE, max_workers=4):
+    es_meta = ES_META[index_name]
+    try:
+        return parallel_scan(
+            get_es_instance(es_instance_alias),
+            index=es_meta.index,
+            doc_type=es_meta.type,
+            query=q,
+            max_workers=max_workers,
+        )
+    except ElasticsearchException as e:
+        raise ESError(e)
+
+
 class ScanResult(object):
 
     def __init__(self, count, iterator):
@@ -357,6 +380,119 @@ def scan(client, query=None, scroll='5m', **kwargs):
     return ScanResult(count, fetch_all(initial_resp))
 
 
+# Number of scroll pages the workers of parallel_scan can get ahead of the
+# consumer, per worker. Workers block once the queue is full.
+PARALLEL_SCAN_PAGES_PER_WORKER = 2
+
+
+def parallel_scan(client, index, doc_type=None, query=None, scroll='5m', max_workers=4):
+    """
+    Like scan, but scrolls each shard of the index separately, up to
+    max_workers shards at a time. Elasticsearch 1.x has no sliced scroll,
+    so the shards are used as the slices: every doc lives in exactly one
+    shard, and ``preference=_shards:N`` restricts a search to shard N.
+
+    Pages of hits are merged through a bounded queue, so a slow consumer
+    holds back the workers rather than having every page buffered in memory.
+    Hits are yielded in no particular order.
+    """
+    shards = _get_shard_numbers(client, index)
+    count_query = {'query': query['query']} if query and 'query' in query else None
+    count = client.count(index=index, doc_type=doc_type, body=count_query)['count']
+
+    def scan_shard(shard):
+        return scan(
+            client, query=query, scroll=scroll, index=index, doc_type=doc_type,
+            preference='_shards:{}'.format(shard),
+        )
+
+    num_workers = max(1, min(max_workers, len(shards)))
+    pages = _iter_merged_pages(
+        [_get_shard_pages(scan_shard, shard) for shard in shards],
+        num_workers,
+        num_workers * PARALLEL_SCAN_PAGES_PER_WORKER,
+    )
+    return ScanResult(count, (hit for page in pages for hit in page))
+
+
+def _get_shard_numbers(client, index):
+    shards = client.search_shards(index=index)['shards']
+    return sorted({shard_copy['shard'] for shard_copies in shards for shard_copy in shard_copies})
+
+
+def _get_shard_pages(scan_shard, shard):
+    """Returns a function that yields the hits of the shard's scroll a page at a time"""
+    def iter_pages():
+        page = []
+        for hit in scan_shard(shard):
+            page.append(hit)
+            if len(page) >= SCROLL_PAGE_SIZE_LIMIT:
+                yield page
+                page = []
+        if page:
+            yield page
+    return iter_pages
+
+
+class _SliceDone(object):
+    pass
+
+
+class _SliceFailed(object):
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def _iter_merged_pages(slices, max_workers, max_queued_pages):
+    """
+    Runs each of the slices (functions returning an iterable of pages) on
+    one of max_workers threads and yields the pages as they come in.
+    Stops the workers if the consumer stops early or a slice fails.
+    """
+    queue = Queue(maxsize=max_queued_pages)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def run_slice(iter_pages):
+        try:
+            for page in iter_pages():
+                if not put(page):
+                    return
+        except Exception as e:
+            put(_SliceFailed(e))
+        else:
+            put(_SliceDone())
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    for iter_pages in slices:
+        pool.submit(run_slice, iter_pages)
+    try:
+        remaining = len(slices)
+        while remaining:
+            try:
+                item = queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if isinstance(item, _SliceDone):
+                remaining -= 1
+            elif isinstance(item, _SliceFailed):
+                raise item.exception
+            else:
+                yield item
+    finally:
+        stopped.set()
+        pool.shutdown(wait=False)
+
+
 def es_histogram(histo_type, domains=None, startdate=None, enddate=None, interval="day", filters=[]):
     from corehq.apps.es.es_query import HQESQuery
     date_field = DATE_FIELDS[histo_type]
@@ -16,6 +16,15 @@ ASYNC_RETRY_AFTER = 5
 
 ASYNC_RESTORE_CACHE_KEY_PREFIX = "async-restore-task"
 RESTORE_CACHE_KEY_PREFIX = "ota-restore"
+CASE_XML_CACHE_KEY_PREFIX = "restore-case-xml"
+
+# how long serialized case blocks are shared between restores (in seconds)
+CASE_XML_CACHE_TIMEOUT = 24 * 60 * 60
+
+# number of threads used to query shards concurrently in livequery sync.
+# Must be at least 2: the next batch of cases is loaded by a worker thread
+# that waits on the per-shard queries run by the other workers.
+LIVEQUERY_FETCH_WORKERS = 4
 
 # case sync algorithms
 CLEAN_OWNERS = 'clean_owners'
@@ -24,18 +24,27 @@ Example case graphs with outcomes:
 from __future__ import absolute_import
 from __future__ import unicode_literals
 import logging
+import threading
 from collections import defaultdict
+from contextlib import contextmanager
 from itertools import chain, islice
 
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connections
+
 from casexml.apps.case.const import CASE_INDEX_EXTENSION as EXTENSION
 from casexml.apps.phone.data_providers.case.load_testing import (
-    get_xml_for_response,
+    get_xml_for_updates,
 )
-from casexml.apps.phone.const import ASYNC_RETRY_AFTER
+from casexml.apps.phone.const import ASYNC_RETRY_AFTER, LIVEQUERY_FETCH_WORKERS
 from casexml.apps.phone.data_providers.case.stock import get_stock_payload
 from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates
 from casexml.apps.phone.tasks import ASYNC_RESTORE_SENT
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.form_processor.models import CommCareCaseSQL
+from corehq.form_processor.utils.sql import fetchall_as_namedtuple
+from corehq.sql_db.util import split_list_by_db_partition
+from corehq.toggles import LIVEQUERY_PARALLEL_FETCH
 from corehq.util.datadog.utils import case_load_counter
 
 
@@ -189,7 +198,10 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
     owner_ids = list(restore_state.owner_ids)
 
     debug("sync %s for %r", restore_state.current_sync_log._id, owner_ids)
-    with timing_context("livequery"):
+    with timing_context("livequery"), fetch_executor(restore_state.domain) as executor:
+        if executor is not None:
+            accessor = ShardedCaseAccessor(accessor, executor)
+
         with timing_context("get_case_ids_by_owners"):
             owned_ids = accessor.get_case_ids_by_owners(owner_ids, closed=False)
             debug("owned: %r", owned_ids)
@@ -240,11 +252,14 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
 
         with timing_context("compile_response(%s cases)" % len(sync_ids)):
             iaccessor = PrefetchIndexCaseAccessor(accessor, indices)
+            batches = batch_cases(iaccessor, sync_ids)
+            if executor is not None:
+                batches = prefetch_batches(executor, batches)
             compile_response(
                 timing_context,
                 restore_state,
                 response,
-                batch_cases(iaccessor, sync_ids),
+                batches,
                 init_progress(async_task, len(sync_ids)),
             )
 
@@ -279,6 +294,143 @@ class PrefetchIndexCaseAccessor(object):
         return self.accessor.get_cases(case_ids, **kw)
 
 
+@contextmanager
+def fetch_executor(domain):
+    """Thread pool used to query shards concurrently
+
+    Yields `None` if parallel fetching is not enabled for the domain.
+    """
+    if not LIVEQUERY_PARALLEL_FETCH.enabled(domain):
+        yield None
+        return
+    executor = FetchExecutor(max_workers=LIVEQUERY_FETCH_WORKERS)
+    try:
+        yield executor
+    finally:
+        executor.shutdown(wait=True)
+
+
+class FetchExecutor(ThreadPoolExecutor):
+    """Thread pool that closes its workers' database connections on shutdown
+
+    Django does not close connections opened outside of the request
+    thread. Each worker keeps the connections it opens while the pool
+    is in use, so they are reused across calls, and they are closed
+    once all workers have stopped.
+    """
+
+    def __init__(self, max_workers):
+        super(FetchExecutor, self).__init__(max_workers=max_workers)
+        self._worker_connections = {}  # worker thread -> database wrappers
+        self._connections_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        return super(FetchExecutor, self).submit(self._call, fn, *args, **kwargs)
+
+    def _call(self, fn, *args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._connections_lock:
+                self._worker_connections[threading.current_thread()] = connections.all()
+
+    def shutdown(self, wait=True):
+        super(FetchExecutor, self).shutdown(wait=wait)
+        if not wait:
+            return
+        with self._connections_lock:
+            worker_connections = list(self._worker_connections.values())
+            self._worker_connections = {}
+        for connection in chain.from_iterable(worker_connections):
+            # the thread that opened the connection has stopped
+            connection.allow_thread_sharing = True
+            connection.close()
+
+
+class ShardedCaseAccessor(object):
+    """Case accessor that queries shard databases directly and concurrently
+
+    Each shard gets its own query with the case ids that live on it,
+    bypassing the plproxy functions (which would split the ids again
+    and query the shards one after another). The results are merged so
+    callers get the same results as they would from the plproxy query.
+    """
+
+    def __init__(self, accessor, executor):
+        self.domain = accessor.domain
+        self.accessor = accessor
+        self.executor = executor
+
+    def get_case_ids_by_owners(self, owner_ids, closed=None):
+        return self.accessor.get_case_ids_by_owners(owner_ids, closed=closed)
+
+    def get_related_indices(self, case_ids, exclude_indices):
+        # Reverse indices live on the shard of the referencing case, so
+        # every shard must be queried with all case ids. plproxy already
+        # does that in a single query (RUN ON ALL).
+        return self.accessor.get_related_indices(case_ids, exclude_indices)
+
+    def get_closed_and_deleted_ids(self, case_ids):
+        def get_closed_and_deleted_ids(db, shard_case_ids):
+            return _get_closed_and_deleted_ids(db, self.domain, shard_case_ids)
+
+        return list(chain.from_iterable(
+            self._map_shards(get_closed_and_deleted_ids, case_ids)))
+
+    def get_modified_case_ids(self, case_ids, sync_log):
+        def get_modified_case_ids(db, shard_case_ids):
+            return _get_modified_case_ids(db, self.domain, shard_case_ids, sync_log)
+
+        return list(chain.from_iterable(self._map_shards(get_modified_case_ids, case_ids)))
+
+    def get_cases(self, case_ids, ordered=False, prefetched_indices=None):
+        cases = list(chain.from_iterable(self._map_shards(_get_cases, case_ids)))
+        if ordered:
+            position = {case_id: i for i, case_id in enumerate(case_ids)}
+            cases.sort(key=lambda case: position[case.case_id])
+        if prefetched_indices:
+            cases_by_id = {case.case_id: case for case in cases}
+            indices_by_case = defaultdict(list)
+            for index in prefetched_indices:
+                indices_by_case[index.case_id].append(index)
+            for case_id, case_indices in indices_by_case.items():
+                cases_by_id[case_id].cached_indices = case_indices
+        return cases
+
+    def _map_shards(self, func, case_ids):
+        """Call `func` with each shard database alias and its case ids
+
+        :returns: List of results, one per shard.
+        """
+        shards = split_list_by_db_partition(case_ids)
+        if len(shards) < 2:
+            return [func(db, ids) for db, ids in shards]
+        return list(self.executor.map(func, *zip(*shards)))
+
+
+def _get_cases(db, case_ids):
+    return list(CommCareCaseSQL.objects.raw(
+        'SELECT * FROM get_cases_by_id(%s)', [case_ids], using=db))
+
+
+def _get_closed_and_deleted_ids(db, domain, case_ids):
+    with connections[db].cursor() as cursor:
+        cursor.execute(
+            'SELECT case_id, closed, deleted FROM get_closed_and_deleted_ids(%s, %s)',
+            [domain, case_ids]
+        )
+        return list(fetchall_as_namedtuple(cursor))
+
+
+def _get_modified_case_ids(db, domain, case_ids, sync_log):
+    with connections[db].cursor() as cursor:
+        cursor.execute(
+            'SELECT case_id FROM get_modified_case_ids(%s, %s, %s, %s)',
+            [domain, case_ids, sync_log.date, sync_log._id]
+        )
+        return [row.case_id for row in fetchall_as_namedtuple(cursor)]
+
+
 def batch_cases(accessor, case_ids):
     def take(n, iterable):
         # https://docs.python.org/2/library/itertools.html#recipes
@@ -294,6 +446,21 @@ def batch_cases(accessor, case_ids):
         yield accessor.get_cases(next_ids)
 
 
+def prefetch_batches(executor, batches):
+    """Load the next batch in a worker thread while the current one is used
+
+    Yields the same batches in the same order as `batches`.
+    """
+    batches = iter(batches)
+    future = executor.submit(next, batches, None)
+    while True:
+        batch = future.result()
+        if batch is None:
+            break
+        future = executor.submit(next, batches, None)
+        yield batch
+
+
 def init_progress(async_task, total):
     if not async_task:
         return lambda done: None
@@ -328,8 +495,8 @@ def compile_response(timing_context, restore_state, response, batches, update_pr
 
         with timing_context("get_xml_for_response (%s updates)" % len(updates)):
             response.extend(item
-                for update in updates
-                for item in get_xml_for_response(update, restore_state))
+                for items in get_xml_for_updates(updates, restore_state)
+                for item in items)
 
         done += len(cases)
         update_progress(done)
@@ -39,3 +39,27 @@ def get_xml_for_response(update, restore_state):
         if original_update.case.type == USERCASE_TYPE:
             break
     return elements
+
+
+def get_xml_for_updates(updates, restore_state):
+    """
+    Get the XML for a batch of case updates, using the case XML cache if it is
+    enabled for the restore.
+
+    :returns: a list with the list of XML elements for each update
+    """
+    cache = restore_state.case_xml_cache
+    if cache is None or restore_state.loadtest_factor > 1:
+        return [get_xml_for_response(update, restore_state) for update in updates]
+
+    cached_xml = cache.get_many(updates)
+    elements = []
+    to_cache = []
+    for update in updates:
+        xml = cached_xml.get(update.case.case_id)
+        if xml is None:
+            xml = tostring(get_case_element(update.case, update.required_updates, restore_state.version))
+            to_cache.append((update, xml))
+        elements.append([xml])
+    cache.set_many(to_cache)
+    return elements
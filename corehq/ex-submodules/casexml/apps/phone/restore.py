@@ -1,9 +1,9 @@
 from __future__ import absolute_import
 
 from __future__ import unicode_literals
+import io
 import logging
 import os
-import shutil
 import tempfile
 import uuid
 from io import BytesIO
@@ -25,10 +25,10 @@ from casexml.apps.phone.exceptions import (
     InvalidSyncLogException, SyncLogUserMismatch,
     BadStateException, RestoreException
 )
-from casexml.apps.phone.restore_caching import AsyncRestoreTaskIdCache, RestorePayloadPathCache
+from casexml.apps.phone.restore_caching import AsyncRestoreTaskIdCache, CaseXMLCache, RestorePayloadPathCache
 from casexml.apps.phone.tasks import get_async_restore_payload, ASYNC_RESTORE_SENT
 from casexml.apps.phone.utils import get_cached_items_with_count
-from corehq.toggles import EXTENSION_CASES_SYNC_ENABLED, LIVEQUERY_SYNC
+from corehq.toggles import EXTENSION_CASES_SYNC_ENABLED, LIVEQUERY_SYNC, RESTORE_CASE_XML_CACHE
 from corehq.util.datadog.utils import bucket_value, maybe_add_domain_tag
 from corehq.util.python_compatibility import soft_assert_type_text
 from corehq.util.timer import TimingContext
@@ -120,7 +120,9 @@ class RestoreContent(object):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.response_body.close()
+        # the body belongs to the file object once get_fileobj has been called
+        if self.response_body is not None:
+            self.response_body.close()
 
     def append(self, xml_element):
         self.num_items += 1
@@ -135,29 +137,90 @@ class RestoreContent(object):
         for element in iterable:
             self.append(element)
 
-    def _write_to_file(self, fileobj):
+    def _get_start_tag(self):
         # Add 1 to num_items to account for message element
         items = (self.items_template % ('%s' % (self.num_items + 1)).encode('utf-8')) if self.items else b''
-        fileobj.write(self.start_tag_template % {
+        return self.start_tag_template % {
             b"items": items,
             b"username": self.username.encode("utf8"),
             b"nature": ResponseNature.OTA_RESTORE_SUCCESS.encode("utf8"),
-        })
+        }
 
-        self.response_body.seek(0)
-        shutil.copyfileobj(self.response_body, fileobj)
+    def get_fileobj(self):
+        """Get the full response as a file object
 
-        fileobj.write(self.closing_tag)
+        The body is written to disk only once: the start tag (which
+        includes the item count) and closing tag are read around it
+        rather than copying everything into another file.
+        """
+        fileobj = ChainedFile([
+            BytesIO(self._get_start_tag()),
+            self.response_body,
+            BytesIO(self.closing_tag),
+        ])
+        self.response_body = None
+        return fileobj
+
+
+class ChainedFile(io.RawIOBase):
+    """Read-only, seekable file object over the concatenated content of
+    other seekable file objects, which are closed along with it.
+    """
 
-    def get_fileobj(self):
-        fileobj = tempfile.TemporaryFile('w+b')
-        try:
-            self._write_to_file(fileobj)
-            fileobj.seek(0)
-            return fileobj
-        except:
-            fileobj.close()
-            raise
+    def __init__(self, fileobjs):
+        super(ChainedFile, self).__init__()
+        self._fileobjs = fileobjs
+        self._sizes = []
+        for fileobj in fileobjs:
+            fileobj.seek(0, os.SEEK_END)
+            self._sizes.append(fileobj.tell())
+        self._size = sum(self._sizes)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError("invalid whence: {}".format(whence))
+        if position < 0:
+            raise ValueError("negative seek position {}".format(position))
+        self._position = position
+        return position
+
+    def readinto(self, buf):
+        total = 0
+        start = 0
+        for fileobj, size in zip(self._fileobjs, self._sizes):
+            end = start + size
+            while total < len(buf) and start <= self._position < end:
+                fileobj.seek(self._position - start)
+                data = fileobj.read(min(len(buf) - total, end - self._position))
+                if not data:
+                    break
+                buf[total:total + len(data)] = data
+                total += len(data)
+                self._position += len(data)
+            start = end
+        return total
+
+    def close(self):
+        if not self.closed:
+            for fileobj in self._fileobjs:
+                fileobj.close()
+        super(ChainedFile, self).close()
 
 
 class RestoreResponse(object):
@@ -471,6 +534,13 @@ class RestoreState(object):
     def loadtest_factor(self):
         return self.restore_user.loadtest_factor
 
+    @property
+    @memoized
+    def case_xml_cache(self):
+        if RESTORE_CASE_XML_CACHE.enabled(self.domain):
+            return CaseXMLCache(self.version)
+        return None
+
 
 class RestoreConfig(object):
     """
@@ -682,6 +752,11 @@ class RestoreConfig(object):
                 with self.timing_context(provider.__class__.__name__):
                     provider.extend_response(self.restore_state, content)
 
+            case_xml_cache = self.restore_state.case_xml_cache
+            if case_xml_cache is not None:
+                self.timing_context.add_count('case_xml_cache.hits', case_xml_cache.hits)
+                self.timing_context.add_count('case_xml_cache.misses', case_xml_cache.misses)
+
             return content.get_fileobj()
 
     def set_cached_payload_if_necessary(self, fileobj, duration, is_async):
@@ -769,6 +844,9 @@ class RestoreConfig(object):
                         timer.name,
                     ],
                 )
+        for timer in timing.to_list():
+            for name, count in timer.counts.items():
+                datadog_counter('commcare.restores.{}'.format(name), count, tags=tags)
         tags.append('duration:%s' % bucket_value(timing.duration, timer_buckets, 's'))
 
         if settings.ENTERPRISE_MODE and self.params.app and self.params.app.copy_of:
@@ -3,8 +3,15 @@ from __future__ import unicode_literals
 import hashlib
 import logging
 import datetime
-from casexml.apps.phone.const import RESTORE_CACHE_KEY_PREFIX, ASYNC_RESTORE_CACHE_KEY_PREFIX
-from corehq.toggles import ENABLE_LOADTEST_USERS
+from casexml.apps.case import const
+from casexml.apps.case.xml import V1, V2, V3
+from casexml.apps.phone.const import (
+    RESTORE_CACHE_KEY_PREFIX,
+    ASYNC_RESTORE_CACHE_KEY_PREFIX,
+    CASE_XML_CACHE_KEY_PREFIX,
+    CASE_XML_CACHE_TIMEOUT,
+)
+from corehq.toggles import ENABLE_LOADTEST_USERS, RESTORE_CASE_XML_CACHE
 from corehq.util.quickcache import quickcache
 from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
 
@@ -99,3 +106,82 @@ class RestorePayloadPathCache(_RestoreCache):
 class AsyncRestoreTaskIdCache(_RestoreCache):
     timeout = 24 * 60 * 60
     prefix = ASYNC_RESTORE_CACHE_KEY_PREFIX
+
+
+class CaseXMLCache(object):
+    """Serialized case blocks shared between restores
+
+    A case block only depends on the case, the restore version and the
+    actions (create/update/close) the phone needs, so blocks are cached
+    per (case_id, version, actions) along with the case's
+    ``server_modified_on``. A cached block is only used if the case has
+    not been modified since it was rendered, and the form processor
+    clears a case's blocks whenever it saves the case.
+    """
+    timeout = CASE_XML_CACHE_TIMEOUT
+
+    def __init__(self, version):
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, updates):
+        """
+        :param updates: list of ``CaseSyncUpdate`` objects
+        :returns: dict of case_id -> cached case block bytes
+        """
+        keys = {
+            update.case.case_id: _get_case_xml_cache_key(update.case.case_id, self.version, update.required_updates)
+            for update in updates
+        }
+        cached = get_redis_default_cache().get_many(list(keys.values()))
+        xml_by_case_id = {}
+        for update in updates:
+            case_id = update.case.case_id
+            value = cached.get(keys[case_id])
+            if value is not None and value[0] == _get_modified_on(update.case):
+                xml_by_case_id[case_id] = value[1]
+        self.hits += len(xml_by_case_id)
+        self.misses += len(updates) - len(xml_by_case_id)
+        return xml_by_case_id
+
+    def set_many(self, xml_by_update):
+        """
+        :param xml_by_update: list of (``CaseSyncUpdate``, case block bytes) tuples
+        """
+        values = {}
+        for update, xml in xml_by_update:
+            modified_on = _get_modified_on(update.case)
+            if modified_on:
+                key = _get_case_xml_cache_key(update.case.case_id, self.version, update.required_updates)
+                values[key] = (modified_on, xml)
+        if values:
+            get_redis_default_cache().set_many(values, timeout=self.timeout)
+
+
+def invalidate_case_xml_cache(domain, case_ids):
+    if not case_ids or not RESTORE_CASE_XML_CACHE.enabled(domain):
+        return
+    get_redis_default_cache().delete_many([
+        _get_case_xml_cache_key(case_id, version, updates)
+        for case_id in case_ids
+        for version in (V1, V2, V3)
+        for updates in _ALL_REQUIRED_UPDATES
+    ])
+
+
+# every combination of actions CaseSyncUpdate can require
+_ALL_REQUIRED_UPDATES = [
+    [const.CASE_ACTION_UPDATE],
+    [const.CASE_ACTION_CREATE, const.CASE_ACTION_UPDATE],
+    [const.CASE_ACTION_UPDATE, const.CASE_ACTION_CLOSE],
+    [const.CASE_ACTION_CREATE, const.CASE_ACTION_UPDATE, const.CASE_ACTION_CLOSE],
+]
+
+
+def _get_case_xml_cache_key(case_id, version, required_updates):
+    return '{}:{}:{}:{}'.format(CASE_XML_CACHE_KEY_PREFIX, case_id, version, '+'.join(required_updates))
+
+
+def _get_modified_on(case):
+    return case.server_modified_on.isoformat() if case.server_modified_on else None
@@ -0,0 +1,58 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import uuid
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase
+
+from casexml.apps.case import const
+from casexml.apps.case.models import CommCareCase
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.data_providers.case.utils import CaseSyncUpdate
+from casexml.apps.phone.restore_caching import CaseXMLCache, invalidate_case_xml_cache
+from corehq.util.test_utils import flag_enabled
+
+
+class CaseXMLCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.case = CommCareCase(
+            _id=uuid.uuid4().hex,
+            domain='case-xml-cache',
+            server_modified_on=datetime(2019, 1, 1),
+        )
+        self.update = CaseSyncUpdate(self.case, None, required_updates=[const.CASE_ACTION_UPDATE])
+        self.addCleanup(self._invalidate)
+
+    @flag_enabled('RESTORE_CASE_XML_CACHE')
+    def _invalidate(self):
+        invalidate_case_xml_cache(self.case.domain, [self.case.case_id])
+
+    def test_miss_then_hit(self):
+        cache = CaseXMLCache(V2)
+        self.assertEqual({}, cache.get_many([self.update]))
+        cache.set_many([(self.update, b'<case/>')])
+        self.assertEqual({self.case.case_id: b'<case/>'}, cache.get_many([self.update]))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_keyed_on_version_and_updates(self):
+        CaseXMLCache(V2).set_many([(self.update, b'<case/>')])
+        create_update = CaseSyncUpdate(
+            self.case, None, required_updates=[const.CASE_ACTION_CREATE, const.CASE_ACTION_UPDATE]
+        )
+        self.assertEqual({}, CaseXMLCache(V2).get_many([create_update]))
+        self.assertEqual({}, CaseXMLCache('1.0').get_many([self.update]))
+
+    def test_modified_case_is_not_served(self):
+        cache = CaseXMLCache(V2)
+        cache.set_many([(self.update, b'<case/>')])
+        self.case.server_modified_on += timedelta(seconds=1)
+        self.assertEqual({}, cache.get_many([self.update]))
+
+    @flag_enabled('RESTORE_CASE_XML_CACHE')
+    def test_invalidate(self):
+        cache = CaseXMLCache(V2)
+        cache.set_many([(self.update, b'<case/>')])
+        invalidate_case_xml_cache(self.case.domain, [self.case.case_id])
+        self.assertEqual({}, cache.get_many([self.update]))
@@ -0,0 +1,263 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import uuid
+from collections import namedtuple
+from threading import Event
+from xml.etree import cElementTree as ElementTree
+
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from casexml.apps.case.mock import CaseIndex, CaseStructure
+from casexml.apps.case.xml import V2_NAMESPACE
+from casexml.apps.phone.const import LIVEQUERY, LIVEQUERY_FETCH_WORKERS
+from casexml.apps.phone.data_providers.case.livequery import (
+    ShardedCaseAccessor,
+    fetch_executor,
+    prefetch_batches,
+)
+from casexml.apps.phone.tests.utils import create_restore_user
+from casexml.apps.phone.utils import MockDevice
+from corehq.apps.domain.models import Domain
+from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
+from corehq.form_processor.tests.utils import FormProcessorTestUtils, only_run_with_partitioned_database
+from corehq.sql_db.util import split_list_by_db_partition
+from corehq.util.test_utils import flag_enabled
+
+Index = namedtuple('Index', 'case_id identifier referenced_id')
+
+
+def split_by_shard(case_ids):
+    """Put case ids starting with 'a' on one shard and the rest on another"""
+    shards = {}
+    for case_id in case_ids:
+        shards.setdefault('p1' if case_id.startswith('a') else 'p2', []).append(case_id)
+    return sorted(shards.items())
+
+
+class FakeAccessor(object):
+    domain = 'livequery-parallel'
+
+    def __init__(self, indices):
+        self.indices = indices
+        self.calls = []
+
+    def get_related_indices(self, case_ids, exclude_indices):
+        self.calls.append(sorted(case_ids))
+        return [ix for ix in self.indices
+            if ix.case_id in case_ids or ix.referenced_id in case_ids]
+
+
+class FakeCase(object):
+
+    def __init__(self, case_id):
+        self.case_id = case_id
+
+
+class FakeShards(object):
+    """Stand-in for the shard-level queries, which record their calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_cases(self, db, case_ids):
+        self.calls.append((db, sorted(case_ids)))
+        return [FakeCase(case_id) for case_id in reversed(case_ids)]
+
+    def get_closed_and_deleted_ids(self, db, domain, case_ids):
+        self.calls.append((db, sorted(case_ids)))
+        return [(case_id, True, False) for case_id in case_ids if case_id.endswith('closed')]
+
+
+@patch('casexml.apps.phone.data_providers.case.livequery.split_list_by_db_partition', split_by_shard)
+class ShardedCaseAccessorTest(SimpleTestCase):
+
+    def setUp(self):
+        self.indices = [
+            Index('a1', 'host', 'b1'),
+            Index('b2', 'parent', 'b1'),
+            Index('a2', 'parent', 'a1'),
+        ]
+        self.accessor = FakeAccessor(self.indices)
+        self.shards = FakeShards()
+        for name in ['get_cases', 'get_closed_and_deleted_ids']:
+            patcher = patch(
+                'casexml.apps.phone.data_providers.case.livequery._' + name,
+                getattr(self.shards, name),
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @flag_enabled('LIVEQUERY_PARALLEL_FETCH')
+    def test_get_related_indices(self):
+        with fetch_executor(FakeAccessor.domain) as executor:
+            sharded = ShardedCaseAccessor(self.accessor, executor)
+            related = sharded.get_related_indices(['a1', 'b1'], set())
+        # reverse indices may live on any shard: query all of them at once
+        self.assertEqual(self.accessor.calls, [['a1', 'b1']])
+        self.assertEqual(sorted(related), sorted(self.indices))
+
+    @flag_enabled('LIVEQUERY_PARALLEL_FETCH')
+    def test_get_closed_and_deleted_ids(self):
+        with fetch_executor(FakeAccessor.domain) as executor:
+            sharded = ShardedCaseAccessor(self.accessor, executor)
+            rows = sharded.get_closed_and_deleted_ids(['a-closed', 'a2', 'b-closed'])
+        self.assertEqual(sorted(self.shards.calls), [('p1', ['a-closed', 'a2']), ('p2', ['b-closed'])])
+        self.assertEqual(sorted(rows), [('a-closed', True, False), ('b-closed', True, False)])
+
+    @flag_enabled('LIVEQUERY_PARALLEL_FETCH')
+    def test_get_cases(self):
+        with fetch_executor(FakeAccessor.domain) as executor:
+            sharded = ShardedCaseAccessor(self.accessor, executor)
+            cases = sharded.get_cases(['b2', 'a1', 'a2', 'b1'], ordered=True, prefetched_indices=self.indices)
+        self.assertEqual(sorted(self.shards.calls), [('p1', ['a1', 'a2']), ('p2', ['b1', 'b2'])])
+        self.assertEqual([case.case_id for case in cases], ['b2', 'a1', 'a2', 'b1'])
+        self.assertEqual({case.case_id: getattr(case, 'cached_indices', []) for case in cases}, {
+            'a1': [self.indices[0]],
+            'a2': [self.indices[2]],
+            'b1': [],
+            'b2': [self.indices[1]],
+        })
+
+    def test_single_shard_does_not_use_executor(self):
+        sharded = ShardedCaseAccessor(self.accessor, executor=None)
+        cases = sharded.get_cases(['a1', 'a2'])
+        self.assertEqual(sorted(case.case_id for case in cases), ['a1', 'a2'])
+
+
+class PrefetchBatchesTest(SimpleTestCase):
+
+    @flag_enabled('LIVEQUERY_PARALLEL_FETCH')
+    def test_prefetch_batches(self):
+        second_batch_loaded = Event()
+
+        def batches():
+            for i in range(3):
+                if i == 1:
+                    second_batch_loaded.set()
+                yield [i]
+
+        with fetch_executor('livequery-parallel') as executor:
+            result = []
+            for batch in prefetch_batches(executor, batches()):
+                if batch == [0]:
+                    # the next batch is loaded while the current one is used
+                    self.assertTrue(second_batch_loaded.wait(5))
+                result.append(batch)
+        self.assertEqual(result, [[0], [1], [2]])
+
+
+class FetchExecutorTest(SimpleTestCase):
+
+    @flag_enabled('LIVEQUERY_PARALLEL_FETCH')
+    def test_worker_connections_are_closed_on_shutdown(self):
+        closed = []
+
+        class FakeConnection(object):
+            allow_thread_sharing = False
+
+            def close(self):
+                closed.append(self.allow_thread_sharing)
+
+        with patch('casexml.apps.phone.data_providers.case.livequery.connections') as connections:
+            connections.all.side_effect = lambda: [FakeConnection()]
+            with fetch_executor('livequery-parallel') as executor:
+                self.assertEqual(list(executor.map(lambda x: x * 2, range(20))), list(range(0, 40, 2)))
+                self.assertEqual(closed, [])
+        # one connection per worker thread, not per call
+        self.assertTrue(closed)
+        self.assertLessEqual(len(closed), LIVEQUERY_FETCH_WORKERS)
+        self.assertTrue(all(closed))
+
+
+@only_run_with_partitioned_database
+@override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
+class ParallelFetchRestoreTest(TestCase):
+    """Restores must be the same with and without parallel fetching"""
+
+    @classmethod
+    def setUpClass(cls):
+        super(ParallelFetchRestoreTest, cls).setUpClass()
+        delete_all_users()
+        cls.project = Domain(name='livequery-parallel')
+        cls.project.save()
+        cls.user = create_restore_user(cls.project.name, 'parallel-fetch')
+
+    @classmethod
+    def tearDownClass(cls):
+        delete_all_users()
+        cls.project.delete()
+        super(ParallelFetchRestoreTest, cls).tearDownClass()
+
+    def setUp(self):
+        super(ParallelFetchRestoreTest, self).setUp()
+        FormProcessorTestUtils.delete_all_cases()
+        FormProcessorTestUtils.delete_all_xforms()
+        FormProcessorTestUtils.delete_all_sync_logs()
+        self.addCleanup(FormProcessorTestUtils.delete_all_cases)
+        self.addCleanup(FormProcessorTestUtils.delete_all_xforms)
+        self.addCleanup(FormProcessorTestUtils.delete_all_sync_logs)
+
+    def get_device(self):
+        return MockDevice(self.project, self.user, {"case_sync": LIVEQUERY})
+
+    def test_restore_is_the_same(self):
+        other_owner = uuid.uuid4().hex
+        structures = []
+        for i in range(10):
+            # owned case with a parent owned by someone else
+            structures.append(CaseStructure(
+                attrs={'create': True, 'owner_id': self.user.user_id},
+                indices=[CaseIndex(
+                    CaseStructure(attrs={'create': True, 'owner_id': other_owner}),
+                    relationship='child',
+                )],
+            ))
+            # owned extension of a host owned by someone else, which has
+            # another extension owned by someone else
+            host = CaseStructure(attrs={'create': True, 'owner_id': other_owner})
+            structures.append(CaseStructure(
+                attrs={'create': True, 'owner_id': self.user.user_id},
+                indices=[CaseIndex(host, relationship='extension')],
+            ))
+            structures.append(CaseStructure(
+                attrs={'create': True, 'owner_id': other_owner},
+                indices=[CaseIndex(host, relationship='extension', identifier='other_host')],
+                walk_related=False,  # host is created with the first extension
+            ))
+            # closed owned extension
+            structures.append(CaseStructure(
+                attrs={'create': True, 'close': True, 'owner_id': self.user.user_id},
+                indices=[CaseIndex(
+                    CaseStructure(attrs={'create': True, 'owner_id': other_owner}),
+                    relationship='extension',
+                )],
+            ))
+        self.get_device().post_changes(structures)
+        case_ids = [case_id for s in structures for case_id in [s.case_id, s.indices[0].related_id]]
+        self.assertGreater(len(split_list_by_db_partition(case_ids)), 1)
+
+        serial_device = self.get_device()
+        parallel_device = self.get_device()
+        self.assertRestoresEqual(serial_device, parallel_device, restore=True)
+
+        # incremental sync of a case that was modified since the last sync
+        self.get_device().post_changes(case_id=structures[0].case_id, update={'property': 'changed'})
+        self.assertRestoresEqual(serial_device, parallel_device)
+
+    def assertRestoresEqual(self, serial_device, parallel_device, restore=False):
+        def sync(device):
+            result = (device.restore if restore else device.sync)(overwrite_cache=True)
+            return {
+                case.get('case_id'): ElementTree.tostring(case)
+                for case in result.xml.findall('{%s}case' % V2_NAMESPACE)
+            }
+
+        serial_cases = sync(serial_device)
+        with flag_enabled('LIVEQUERY_PARALLEL_FETCH'):
+            parallel_cases = sync(parallel_device)
+        self.assertTrue(serial_cases)
+        self.assertEqual(sorted(parallel_cases), sorted(serial_cases))
+        self.assertEqual(parallel_cases, serial_cases)
@@ -1,6 +1,8 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import os
+
 import six
 from django.test import TestCase
 from django.test.testcases import SimpleTestCase
@@ -78,3 +80,18 @@ class TestRestoreContent(SimpleTestCase):
             response.append(body.encode('utf-8'))
             with response.get_fileobj() as fileobj:
                 self.assertEqual(expected, fileobj.read().decode('utf-8'))
+
+    def test_fileobj_is_seekable(self):
+        user = 'user1'
+        body = '<elem>data0</elem>' * 1000
+        expected = self._expected(user, body, items=1001).encode('utf-8')
+        with RestoreContent(user, True) as response:
+            response.extend([b'<elem>data0</elem>'] * 1000)
+            with response.get_fileobj() as fileobj:
+                fileobj.seek(0, os.SEEK_END)
+                self.assertEqual(len(expected), fileobj.tell())
+                fileobj.seek(0)
+                chunks = iter(lambda: fileobj.read(100), b'')
+                self.assertEqual(expected, b''.join(chunks))
+                fileobj.seek(len(expected) - len(b'</OpenRosaResponse>'))
+                self.assertEqual(b'</OpenRosaResponse>', fileobj.read())
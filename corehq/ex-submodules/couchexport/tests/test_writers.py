@@ -11,7 +11,7 @@ from django.test import SimpleTestCase
 from lxml import html, etree
 from mock import patch, Mock
 
-from couchexport.export import export_from_tables
+from couchexport.export import export_from_tables, get_writer
 from couchexport.models import Format
 from couchexport.writers import (
     MAX_XLS_COLUMNS,
@@ -92,6 +92,20 @@ class CsvFileWriterTests(SimpleTestCase):
         file_start = writer.get_file().read(6)
         self.assertEqual(file_start, BOM_UTF8 + b'100')
 
+    def test_csv_file_writer_write_rows(self):
+        rows = [['ham', 'spam', 'eggs'], ['hám', b'sp\xc3\xa1m', 100]]
+        row_writer = CsvFileWriter()
+        row_writer.open('Spam')
+        for row in rows:
+            row_writer.write_row(row)
+        row_writer.finish()
+
+        block_writer = CsvFileWriter()
+        block_writer.open('Spam')
+        block_writer.write_rows(rows)
+        block_writer.finish()
+        self.assertEqual(block_writer.get_file().read(), row_writer.get_file().read())
+
 
 class HtmlExportWriterTests(SimpleTestCase):
 
@@ -115,6 +129,24 @@ class HtmlExportWriterTests(SimpleTestCase):
                           ['<td>spam</td>', '<td>spam</td>', '<td/>', '<td>spam</td>'],
                           ['<td>spam</td>', '<td>spam</td>', '<td/>', '<td>spam</td>']])
 
+    def test_write_rows(self):
+        writer = get_writer(Format.HTML)
+        with closing(io.BytesIO()) as file_:
+            writer.open([('Spam', [('Breakfast', 'Amuse-Bouche')])], file_)
+            writer.write_rows('Spam', [('spam', None), ('eggs', 'ham')])
+            writer.write_rows('Spam', [('bacon', 'spam')])
+            writer.close()
+            root = html.fromstring(file_.getvalue())
+
+        self.assertEqual(
+            [th.text for th in root.xpath('./body/table/thead/tr/th')],
+            ['Breakfast', 'Amuse-Bouche']
+        )
+        self.assertEqual(
+            [[td.text for td in tr.xpath('./td')] for tr in root.xpath('./body/table/tbody/tr')],
+            [['spam', None], ['eggs', 'ham'], ['bacon', 'spam']]
+        )
+
 
 class Excel2007ExportWriterTests(SimpleTestCase):
 
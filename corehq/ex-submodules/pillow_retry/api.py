@@ -15,6 +15,10 @@ from pillowtop.utils import get_pillow_by_name
 
 
 def process_pillow_retry(error_doc):
+    if error_doc.pillow == const.CHANGE_PUBLISHER_RETRY_NAME:
+        _republish_change(error_doc)
+        return
+
     pillow_name_or_class = error_doc.pillow
     try:
         pillow = get_pillow_by_name(pillow_name_or_class)
@@ -48,19 +52,7 @@ def process_pillow_retry(error_doc):
         if isinstance(pillow.get_change_feed(), CouchChangeFeed):
             pillow.process_change(change)
         else:
-            if change_metadata.data_source_type in ('couch', 'sql'):
-                data_source_type = change_metadata.data_source_type
-            else:
-                # legacy metadata will have other values for non-sql
-                # can remove this once all legacy errors have been processed
-                data_source_type = 'sql'
-            producer.send_change(
-                get_topic_for_doc_type(
-                    change_metadata.document_type,
-                    data_source_type
-                ),
-                change_metadata
-            )
+            _send_change(change_metadata)
             delete_all_for_doc = True
     except Exception:
         ex_type, ex_value, ex_tb = sys.exc_info()
@@ -71,3 +63,31 @@ def process_pillow_retry(error_doc):
             PillowError.objects.filter(doc_id=error_doc.doc_id).delete()
         else:
             error_doc.delete()
+
+
+def _republish_change(error_doc):
+    """Publish a change that previously failed to be published to kafka"""
+    try:
+        _send_change(error_doc.change_object.metadata)
+    except Exception:
+        ex_type, ex_value, ex_tb = sys.exc_info()
+        error_doc.add_attempt(ex_value, ex_tb)
+        error_doc.save()
+    else:
+        error_doc.delete()
+
+
+def _send_change(change_metadata):
+    if change_metadata.data_source_type in ('couch', 'sql'):
+        data_source_type = change_metadata.data_source_type
+    else:
+        # legacy metadata will have other values for non-sql
+        # can remove this once all legacy errors have been processed
+        data_source_type = 'sql'
+    producer.send_change(
+        get_topic_for_doc_type(
+            change_metadata.document_type,
+            data_source_type
+        ),
+        change_metadata
+    )
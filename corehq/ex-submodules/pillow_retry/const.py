@@ -13,3 +13,7 @@ PILLOW_RETRY_QUEUE_MAX_PROCESSING_ATTEMPTS = 3
 # once after being reset. This is to prevent numerous retries of errors that aren't
 # getting fixed
 PILLOW_RETRY_MULTI_ATTEMPTS_CUTOFF = PILLOW_RETRY_QUEUE_MAX_PROCESSING_ATTEMPTS * 3
+
+# Name recorded as the pillow of errors for changes that could not be published
+# to kafka. Processing such an error publishes the change again.
+CHANGE_PUBLISHER_RETRY_NAME = 'kafka-change-publisher'
@@ -85,15 +85,19 @@ class PillowError(models.Model):
 
     @classmethod
     def get_or_create(cls, change, pillow):
+        return cls.get_or_create_for_pillow_name(change, pillow.pillow_id)
+
+    @classmethod
+    def get_or_create_for_pillow_name(cls, change, pillow_name):
         change.document = None
         doc_id = change.id
         try:
-            error = cls.objects.get(doc_id=doc_id, pillow=pillow.pillow_id)
+            error = cls.objects.get(doc_id=doc_id, pillow=pillow_name)
         except cls.DoesNotExist:
             now = datetime.utcnow()
             error = PillowError(
                 doc_id=doc_id,
-                pillow=pillow.pillow_id,
+                pillow=pillow_name,
                 date_created=now,
                 date_last_attempt=now,
                 date_next_attempt=now,
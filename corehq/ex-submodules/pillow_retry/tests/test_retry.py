@@ -14,10 +14,11 @@ from corehq.apps.change_feed.pillow import get_change_feed_pillow_for_db
 from corehq.pillows.mappings.case_mapping import CASE_INDEX_INFO
 from corehq.util.elastic import ensure_index_deleted
 from corehq.util.test_utils import trap_extra_setup
+from pillow_retry import const
 from pillow_retry.api import process_pillow_retry
 from pillow_retry.models import PillowError
 from pillowtop.feed.couch import populate_change_metadata
-from pillowtop.feed.interface import Change
+from pillowtop.feed.interface import Change, ChangeMeta
 from pillowtop.pillow.interface import ConstructedPillow
 from pillowtop.processors.sample import CountingProcessor
 from testapps.test_pillowtop.utils import process_pillow_changes
@@ -160,3 +161,27 @@ class KakfaPillowRetryProcessingTest(TestCase, TestMixin):
             self.assertEqual(0, len(errors))
 
             self.assertEqual(1, self.processor.count)
+
+
+class ChangePublisherRetryTest(TestCase):
+
+    def test_republish_change(self):
+        from corehq.apps.change_feed.producer import _queue_change_for_retry
+        change_meta = ChangeMeta(
+            document_id='form1',
+            data_source_type='sql',
+            data_source_name='form-sql',
+            document_type='XFormInstance',
+            domain='pillow-retry',
+        )
+        _queue_change_for_retry(topics.FORM_SQL, change_meta, TestException('publish failed'))
+        error, = PillowError.objects.filter(pillow=const.CHANGE_PUBLISHER_RETRY_NAME)
+        self.assertEqual(error.doc_id, 'form1')
+        self.assertEqual(error.current_attempt, 1)
+
+        with patch('pillow_retry.api.producer.send_change') as send_change:
+            process_pillow_retry(error)
+        topic, meta = send_change.call_args[0]
+        self.assertEqual(topic, topics.FORM_SQL)
+        self.assertEqual(meta.document_id, 'form1')
+        self.assertFalse(PillowError.objects.filter(pillow=const.CHANGE_PUBLISHER_RETRY_NAME).exists())
@@ -2,3 +2,5 @@
 CHECKPOINT_FREQUENCY = 100
 CHECKPOINT_MIN_WAIT = 300
 DEFAULT_PROCESSOR_CHUNK_SIZE = 10
+# max number of batch processors to run concurrently in pipelined pillows
+MAX_PROCESSOR_WORKERS = 4
@@ -2,6 +2,8 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 from datetime import datetime
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
+from copy import deepcopy
 from corehq.sql_db.util import handle_connection_failure, get_all_db_aliases
 from jsonobject import DefaultProperty
 from dimagi.ext import jsonobject
@@ -91,6 +93,23 @@ class Change(object):
     def should_fetch_document(self):
         return not self.document and self.document_store and not self._document_checked
 
+    def copy(self):
+        """
+        Copy of this change, with its own copies of the document and metadata,
+        that can be processed independently of this one
+        """
+        change = Change(
+            self.id, self.sequence_id,
+            document=deepcopy(self.document),
+            deleted=self.deleted,
+            metadata=ChangeMeta.wrap(deepcopy(self.metadata.to_json())) if self.metadata else None,
+            document_store=self.document_store,
+            topic=self.topic,
+        )
+        change.error_raised = self.error_raised
+        change._document_checked = self._document_checked
+        return change
+
     def increment_attempt_count(self):
         if self.metadata:
             self.metadata.attempts += 1
@@ -168,6 +187,18 @@ class ChangeFeed(six.with_metaclass(ABCMeta, object)):
                  the last sequence ID that was processed for each topic.
         """
 
+    @contextmanager
+    def processed_offsets_as_of(self, offsets):
+        """
+        Report ``offsets`` (taken from ``get_processed_offsets``) as the processed
+        offsets within this context. Used to checkpoint a chunk of changes after
+        the feed has been read past it.
+
+        Feeds whose checkpoints are taken from the change sequence don't need
+        to do anything.
+        """
+        yield
+
     @abstractmethod
     def get_latest_offsets_as_checkpoint_value(self):
         """
@@ -2,18 +2,21 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import unicode_literals
 from abc import ABCMeta, abstractproperty, abstractmethod
+from collections import namedtuple
 from datetime import datetime
 from memoized import memoized
 
 import sys
 
+from concurrent.futures import ThreadPoolExecutor
+
 from corehq.util.datadog.gauges import datadog_counter, datadog_gauge, datadog_histogram
 from corehq.util.timer import TimingContext
 from dimagi.utils.logging import notify_exception
 from kafka.common import TopicPartition
-from pillowtop.const import CHECKPOINT_MIN_WAIT
+from pillowtop.const import CHECKPOINT_MIN_WAIT, MAX_PROCESSOR_WORKERS
 from pillowtop.dao.exceptions import DocumentMissingError
-from pillowtop.utils import force_seq_int
+from pillowtop.utils import bulk_fetch_changes_docs, force_seq_int
 from pillowtop.exceptions import PillowtopCheckpointReset
 from pillowtop.logger import pillow_logging
 import six
@@ -49,6 +52,9 @@ class PillowBase(six.with_metaclass(ABCMeta, object)):
     retry_errors = True
     # this will be the batch size for processors that support batch processing
     processor_chunk_size = 0
+    # set to true to load the documents for the next chunk while the current
+    # chunk is processed, and to run batch processors concurrently
+    pipelined = False
 
     @abstractproperty
     def pillow_id(self):
@@ -133,6 +139,9 @@ class PillowBase(six.with_metaclass(ABCMeta, object)):
             batch processors. If there are batch processors, checkpoint is updated
             at the end of the batch, otherwise is updated for every change.
         """
+        if self.pipelined and self.batch_processors:
+            return self._process_changes_pipelined(since, forever)
+
         context = PillowRuntimeContext(changes_seen=0)
         min_wait_seconds = 30
 
@@ -175,7 +184,112 @@ class PillowBase(six.with_metaclass(ABCMeta, object)):
             process_offset_chunk(changes_chunk, context)
             self.process_changes(since=self.get_last_checkpoint_sequence(), forever=forever)
 
-    def _batch_process_with_error_handling(self, changes_chunk):
+    def _process_changes_pipelined(self, since, forever):
+        """
+        Process changes in chunks, overlapping the work on consecutive chunks.
+
+            While a chunk is processed, the documents for the next chunk are
+            bulk loaded on a reader thread and set on its changes. Batch processors
+            run concurrently on a thread pool. The checkpoint is only updated to
+            the end of a chunk once all processors have finished with it.
+        """
+        context = PillowRuntimeContext(changes_seen=0)
+        change_feed = self.get_change_feed()
+        min_wait_seconds = 30
+        num_workers = min(len(self.batch_processors), MAX_PROCESSOR_WORKERS)
+
+        with ThreadPoolExecutor(max_workers=1) as reader, \
+                ThreadPoolExecutor(max_workers=num_workers) as processor_pool:
+
+            def queue_chunk(chunk):
+                return _PipelinedChunk(
+                    changes=chunk,
+                    changes_seen=context.changes_seen,
+                    # the feed has to be checkpointed at the end of this chunk
+                    # even though it will have moved on to the next one by then
+                    offsets=change_feed.get_processed_offsets(),
+                    prefetch=reader.submit(self._prefetch_documents, chunk),
+                )
+
+            def process_chunk(pipelined_chunk):
+                timer = TimingContext()
+                with timer:
+                    prefetch_time = pipelined_chunk.prefetch.result()
+                self._batch_process_with_error_handling(
+                    pipelined_chunk.changes, processor_pool=processor_pool,
+                    stage_times={'prefetch': prefetch_time, 'prefetch_wait': timer.duration},
+                )
+                chunk_context = PillowRuntimeContext(changes_seen=pipelined_chunk.changes_seen)
+                with change_feed.processed_offsets_as_of(pipelined_chunk.offsets):
+                    self._update_checkpoint(pipelined_chunk.changes[-1], chunk_context)
+
+            changes_chunk = []
+            last_process_time = datetime.utcnow()
+            pending = None
+            try:
+                for change in change_feed.iter_changes(since=since or None, forever=forever):
+                    context.changes_seen += 1
+                    if change:
+                        changes_chunk.append(change)
+                        chunk_full = len(changes_chunk) == self.processor_chunk_size
+                        time_elapsed = (datetime.utcnow() - last_process_time).seconds > min_wait_seconds
+                        if chunk_full or time_elapsed:
+                            last_process_time = datetime.utcnow()
+                            # unset pending before processing it so that it isn't
+                            # processed again if the checkpoint is reset
+                            pending, to_process = queue_chunk(changes_chunk), pending
+                            changes_chunk = []
+                            if to_process:
+                                process_chunk(to_process)
+                    else:
+                        pending, to_process = None, pending
+                        if to_process:
+                            process_chunk(to_process)
+                        self._update_checkpoint(None, None)
+                if changes_chunk:
+                    pending, to_process = queue_chunk(changes_chunk), pending
+                    changes_chunk = []
+                    if to_process:
+                        process_chunk(to_process)
+                pending, to_process = None, pending
+                if to_process:
+                    process_chunk(to_process)
+            except PillowtopCheckpointReset:
+                # like in non-pipelined mode, finish the changes that have already
+                # been read from the feed before reading on from the reset checkpoint
+                if pending:
+                    process_chunk(pending)
+                if changes_chunk:
+                    process_chunk(queue_chunk(changes_chunk))
+                reset = True
+            else:
+                reset = False
+
+        if reset:
+            self._process_changes_pipelined(since=self.get_last_checkpoint_sequence(), forever=forever)
+
+    def _prefetch_documents(self, changes_chunk):
+        """
+        Bulk load the documents for the given changes so that processors don't
+        need to look them up. Changes whose document can't be loaded are left
+        for the processors to deal with.
+
+        :return: time taken
+        """
+        timer = TimingContext()
+        with timer:
+            to_fetch = [
+                change for change in changes_chunk
+                if not change.deleted and change.document_store and change.should_fetch_document()
+            ]
+            try:
+                if to_fetch:
+                    bulk_fetch_changes_docs(to_fetch)
+            except Exception as ex:
+                pillow_logging.exception("[%s] Error prefetching documents: %s" % (self.get_name(), ex))
+        return timer.duration
+
+    def _batch_process_with_error_handling(self, changes_chunk, processor_pool=None, stage_times=None):
         """
         Process given chunk in batch mode first on batch-processors
             and only latter on serial processors one by one, so that
@@ -186,46 +300,76 @@ class PillowBase(six.with_metaclass(ABCMeta, object)):
 
             If there is an exception in chunked processing, falls back
             to serial processing.
-        """
-        processing_time = 0
 
-        def reprocess_serially(chunk, processor):
-            for change in chunk:
-                self.process_with_error_handling(change, processor)
-
-        for processor in self.batch_processors:
+            If a ``processor_pool`` is given the batch processors are run
+            concurrently on it, each on its own copy of the changes.
+        """
+        stage_times = dict(stage_times or {})
+        if self.batch_processors:
             if not changes_chunk:
                 return set(), 0
-
             changes_chunk = self._deduplicate_changes(changes_chunk)
-            retry_changes = set()
-            timer = TimingContext()
-            with timer:
-                try:
-                    retry_changes, change_exceptions = processor.process_changes_chunk(changes_chunk)
-                except Exception as ex:
-                    notify_exception(
-                        None,
-                        "{pillow_name} Error in processing changes chunk {change_ids}: {ex}".format(
-                            pillow_name=self.get_name(),
-                            change_ids=[c.id for c in changes_chunk],
-                            ex=ex
-                        ))
-                    self._record_batch_exception_in_datadog(processor)
-                    for change in set(changes_chunk) - set(retry_changes):
-                        self._record_change_success_in_datadog(change, processor)
-                    # fall back to processing one by one
-                    reprocess_serially(changes_chunk, processor)
-                else:
-                    # fall back to processing one by one for failed changes
-                    for change, exception in change_exceptions:
-                        handle_pillow_error(self, change, exception)
-                    reprocess_serially(retry_changes, processor)
-                processing_time += timer.duration
+
+        timer = TimingContext()
+        with timer:
+            if processor_pool:
+                # processors may modify the changes and their documents, so each
+                # processor running concurrently gets its own copy of the chunk
+                chunk_copies = [[change.copy() for change in changes_chunk] for _ in self.batch_processors]
+                processor_times = list(processor_pool.map(
+                    self._batch_process_on_processor, chunk_copies, self.batch_processors
+                ))
+            else:
+                processor_times = [
+                    self._batch_process_on_processor(changes_chunk, processor)
+                    for processor in self.batch_processors
+                ]
+        stage_times['batch_processors'] = timer.duration
+        processing_time = sum(processor_times)
+
         # process on serial_processors
+        serial_time = 0
         for change in changes_chunk:
-            processing_time += self.process_with_error_handling(change)
-        self._record_datadog_metrics(changes_chunk, processing_time)
+            serial_time += self.process_with_error_handling(change)
+        stage_times['serial_processors'] = serial_time
+        processing_time += serial_time
+        self._record_datadog_metrics(changes_chunk, processing_time, stage_times)
+
+    def _batch_process_on_processor(self, changes_chunk, processor):
+        """
+        Process the chunk on a single batch processor, falling back to serial
+        processing for changes that fail.
+
+        :return: time taken
+        """
+        def reprocess_serially(chunk, processor):
+            for change in chunk:
+                self.process_with_error_handling(change, processor)
+
+        retry_changes = set()
+        timer = TimingContext()
+        with timer:
+            try:
+                retry_changes, change_exceptions = processor.process_changes_chunk(changes_chunk)
+            except Exception as ex:
+                notify_exception(
+                    None,
+                    "{pillow_name} Error in processing changes chunk {change_ids}: {ex}".format(
+                        pillow_name=self.get_name(),
+                        change_ids=[c.id for c in changes_chunk],
+                        ex=ex
+                    ))
+                self._record_batch_exception_in_datadog(processor)
+                for change in set(changes_chunk) - set(retry_changes):
+                    self._record_change_success_in_datadog(change, processor)
+                # fall back to processing one by one
+                reprocess_serially(changes_chunk, processor)
+            else:
+                # fall back to processing one by one for failed changes
+                for change, exception in change_exceptions:
+                    handle_pillow_error(self, change, exception)
+                reprocess_serially(retry_changes, processor)
+        return timer.duration
 
     def process_with_error_handling(self, change, processor=None):
         # process given change on all serial processors or given processor.
@@ -285,7 +429,7 @@ class PillowBase(six.with_metaclass(ABCMeta, object)):
             sequence = {topic: force_seq_int(sequence)}
         return sequence
 
-    def _record_datadog_metrics(self, changes_chunk, processing_time):
+    def _record_datadog_metrics(self, changes_chunk, processing_time, stage_times=None):
         tags = ["pillow_name:{}".format(self.get_name()), "mode:chunked"]
         # Since success/fail count is tracked per processor, to get sense of
         #   actual operations count, multiply by number of processors
@@ -309,6 +453,11 @@ class PillowBase(six.with_metaclass(ABCMeta, object)):
             datadog_histogram('commcare.change_feed.chunked.processing_time_total', processing_time,
                 tags=tags + ["chunk_size:{}".format(str(len(changes_chunk)))])
 
+        # time spent in each stage of processing the chunk
+        for stage, duration in six.iteritems(stage_times or {}):
+            datadog_histogram('commcare.change_feed.chunked.stage_time', duration,
+                tags=tags + ["stage:{}".format(stage)])
+
     def _record_checkpoint_in_datadog(self):
         datadog_counter('commcare.change_feed.change_feed.checkpoint', tags=[
             'pillow_name:{}'.format(self.get_name()),
@@ -369,6 +518,16 @@ class PillowBase(six.with_metaclass(ABCMeta, object)):
         return unique
 
 
+class _PipelinedChunk(namedtuple('_PipelinedChunk', 'changes changes_seen offsets prefetch')):
+    """
+    A chunk of changes read from the change feed that is waiting to be processed
+
+    :param changes_seen: number of changes seen in the feed up to the end of this chunk
+    :param offsets: the feed's processed offsets at the end of this chunk
+    :param prefetch: future for the bulk load of this chunk's documents
+    """
+
+
 class ChangeEventHandler(six.with_metaclass(ABCMeta, object)):
     """
     A change-event-handler object used in constructed pillows.
@@ -396,11 +555,12 @@ class ConstructedPillow(PillowBase):
     """
 
     def __init__(self, name, checkpoint, change_feed, processor,
-                 change_processed_event_handler=None, processor_chunk_size=0):
+                 change_processed_event_handler=None, processor_chunk_size=0, pipelined=False):
         self._name = name
         self._checkpoint = checkpoint
         self._change_feed = change_feed
         self.processor_chunk_size = processor_chunk_size
+        self.pipelined = pipelined
         if isinstance(processor, list):
             self.processors = processor
         else:
@@ -5,10 +5,10 @@ import time
 
 from elasticsearch.exceptions import RequestError, ConnectionError, NotFoundError, ConflictError
 
-from pillowtop.utils import ensure_matched_revisions, ensure_document_exists
+from pillowtop.utils import ensure_matched_revisions, ensure_document_exists, bulk_fetch_changes_docs
 from pillowtop.exceptions import PillowtopIndexingError
 from pillowtop.logger import pillow_logging
-from .interface import PillowProcessor
+from .interface import BulkPillowProcessor
 
 
 def identity(x):
@@ -19,7 +19,7 @@ RETRY_INTERVAL = 2  # seconds, exponentially increasing
 MAX_RETRIES = 4  # exponential factor threshold for alerts
 
 
-class ElasticProcessor(PillowProcessor):
+class ElasticProcessor(BulkPillowProcessor):
 
     def __init__(self, elasticsearch, index_info, doc_prep_fn=None, doc_filter_fn=None):
         self.doc_filter_fn = doc_filter_fn
@@ -60,6 +60,64 @@ class ElasticProcessor(PillowProcessor):
             update=self._doc_exists(change.id),
         )
 
+    def process_changes_chunk(self, changes_chunk):
+        """
+        Index or delete the given changes with a single request to the ES _bulk API.
+
+            Documents are fetched in bulk and set on the changes. Changes whose
+            documents couldn't be fetched or transformed, as well as changes that
+            failed individually in the bulk request, are returned to the pillow
+            to be reprocessed serially.
+        """
+        changes_chunk = _deduplicate_changes(changes_chunk)
+        to_update = [change for change in changes_chunk if not (change.deleted and change.id)]
+        retry_changes, _ = bulk_fetch_changes_docs(to_update)
+
+        changes_by_id = {}
+        payload = []
+        for change in changes_chunk:
+            if change in retry_changes:
+                continue
+            if change.deleted and change.id:
+                payload.append(self._get_bulk_action('delete', change.id))
+                changes_by_id[change.id] = change
+                continue
+
+            doc = change.get_document()
+            if doc is None or (self.doc_filter_fn and self.doc_filter_fn(doc)):
+                continue
+
+            if doc.get('doc_type') is not None and doc['doc_type'].endswith("-Deleted"):
+                payload.append(self._get_bulk_action('delete', change.id))
+                changes_by_id[change.id] = change
+                continue
+
+            try:
+                doc_ready_to_save = self.doc_transform_fn(doc)
+            except Exception:
+                # let the serial path raise and record the error
+                retry_changes.add(change)
+                continue
+            payload.append(self._get_bulk_action('index', change.id))
+            payload.append(doc_ready_to_save)
+            changes_by_id[change.id] = change
+
+        if payload:
+            response = self.elasticsearch.bulk(payload)
+            retry_changes.update(
+                changes_by_id[doc_id] for doc_id in _get_failed_bulk_item_ids(response)
+            )
+        return retry_changes, []
+
+    def _get_bulk_action(self, op_type, doc_id):
+        return {
+            op_type: {
+                "_index": self.index_info.index,
+                "_type": self.index_info.type,
+                "_id": doc_id,
+            }
+        }
+
     def _doc_exists(self, doc_id):
         return self.elasticsearch.exists(self.index_info.index, self.index_info.type, doc_id)
 
@@ -68,6 +126,30 @@ class ElasticProcessor(PillowProcessor):
             self.elasticsearch.delete(self.index_info.index, self.index_info.type, doc_id)
 
 
+def _deduplicate_changes(changes_chunk):
+    # keep only the latest change for each document
+    latest_by_id = {change.id: change for change in changes_chunk}
+    return [change for change in changes_chunk if latest_by_id[change.id] is change]
+
+
+def _get_failed_bulk_item_ids(response):
+    """
+    Return the IDs of items that failed in a response from the ES _bulk API.
+    Deleting a document that isn't in the index is not considered a failure.
+    """
+    if not response.get('errors'):
+        return []
+
+    failed_ids = []
+    for item in response['items']:
+        (op_type, result), = item.items()
+        if op_type == 'delete' and result.get('status') == 404:
+            continue
+        if result.get('error') or result.get('status', 200) >= 400:
+            failed_ids.append(result['_id'])
+    return failed_ids
+
+
 def send_to_elasticsearch(index, doc_type, doc_id, es_getter, name, data=None, retries=MAX_RETRIES,
                           except_on_failure=False, update=False, delete=False, es_merge_update=False):
     """
@@ -6,6 +6,7 @@ import uuid
 from django.conf import settings
 from django.test import SimpleTestCase
 from elasticsearch.exceptions import ConnectionError
+from mock import patch
 
 from corehq.elastic import get_es_new
 from corehq.util.elastic import ensure_index_deleted
@@ -14,7 +15,8 @@ from pillowtop.es_utils import INDEX_REINDEX_SETTINGS, INDEX_STANDARD_SETTINGS,
     set_index_reindex_settings, set_index_normal_settings, mapping_exists, initialize_index, \
     initialize_index_and_mapping, assume_alias
 from pillowtop.exceptions import PillowtopIndexingError
-from pillowtop.processors.elastic import send_to_elasticsearch
+from pillowtop.feed.interface import Change
+from pillowtop.processors.elastic import send_to_elasticsearch, ElasticProcessor
 from .utils import get_doc_count, get_index_mapping, TEST_INDEX_INFO
 
 
@@ -242,3 +244,76 @@ class TestSendToElasticsearch(SimpleTestCase):
 
         # attempt to create the same doc twice shouldn't fail
         self._send_to_es_and_check(doc)
+
+
+class TestElasticProcessorBulk(SimpleTestCase):
+
+    def setUp(self):
+        self.es = get_es_new()
+        self.index = TEST_INDEX_INFO.index
+        self.processor = ElasticProcessor(self.es, TEST_INDEX_INFO)
+
+        with trap_extra_setup(ConnectionError):
+            ensure_index_deleted(self.index)
+            initialize_index_and_mapping(self.es, TEST_INDEX_INFO)
+
+    def tearDown(self):
+        ensure_index_deleted(self.index)
+
+    def _get_change(self, doc, deleted=False):
+        return Change(id=doc['_id'], sequence_id='0', document=doc, deleted=deleted)
+
+    def test_index_docs(self):
+        docs = [
+            {'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc', 'property': 'foo'},
+            {'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc', 'property': 'bar'},
+        ]
+        retry, errors = self.processor.process_changes_chunk([self._get_change(doc) for doc in docs])
+        self.assertEqual((set(), []), (retry, errors))
+        self.assertEqual(2, get_doc_count(self.es, self.index))
+
+        docs[0]['property'] = 'bazz'
+        self.processor.process_changes_chunk([self._get_change(docs[0])])
+        es_doc = self.es.get_source(self.index, TEST_INDEX_INFO.type, docs[0]['_id'])
+        self.assertEqual('bazz', es_doc['property'])
+
+    def test_delete_docs(self):
+        doc = {'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc', 'property': 'foo'}
+        missing_doc = {'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc-Deleted'}
+        self.processor.process_changes_chunk([self._get_change(doc)])
+        self.assertEqual(1, get_doc_count(self.es, self.index))
+
+        retry, errors = self.processor.process_changes_chunk([
+            self._get_change(doc, deleted=True),
+            self._get_change(missing_doc),
+        ])
+        self.assertEqual((set(), []), (retry, errors))
+        self.assertEqual(0, get_doc_count(self.es, self.index))
+
+    def test_dedupe_changes(self):
+        doc_id = uuid.uuid4().hex
+        first = {'_id': doc_id, 'doc_type': 'MyCoolDoc', 'property': 'foo'}
+        second = {'_id': doc_id, 'doc_type': 'MyCoolDoc', 'property': 'bar'}
+        self.processor.process_changes_chunk([self._get_change(first), self._get_change(second)])
+        es_doc = self.es.get_source(self.index, TEST_INDEX_INFO.type, doc_id)
+        self.assertEqual('bar', es_doc['property'])
+
+    def test_failed_items_are_retried(self):
+        change = self._get_change({'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc'})
+        response = {
+            'errors': True,
+            'items': [{'index': {'_id': change.id, 'status': 400, 'error': 'MapperParsingException'}}],
+        }
+        with patch.object(self.es, 'bulk', return_value=response):
+            retry, errors = self.processor.process_changes_chunk([change])
+        self.assertEqual(({change}, []), (retry, errors))
+
+    def test_transform_errors_are_retried(self):
+        def _bad_transform(doc):
+            raise ValueError
+
+        processor = ElasticProcessor(self.es, TEST_INDEX_INFO, doc_prep_fn=_bad_transform)
+        change = self._get_change({'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc'})
+        retry, errors = processor.process_changes_chunk([change])
+        self.assertEqual(({change}, []), (retry, errors))
+        self.assertEqual(0, get_doc_count(self.es, self.index))
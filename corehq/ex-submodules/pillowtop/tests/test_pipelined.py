@@ -0,0 +1,223 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import threading
+from contextlib import contextmanager
+from copy import copy
+
+from django.test import SimpleTestCase
+from mock import MagicMock
+
+from pillowtop.dao.mock import MockDocumentStore
+from pillowtop.exceptions import PillowtopCheckpointReset
+from pillowtop.feed.interface import Change, ChangeFeed, ChangeMeta
+from pillowtop.pillow.interface import ChangeEventHandler, ConstructedPillow
+from pillowtop.processors.interface import BulkPillowProcessor, PillowProcessor
+
+
+class IterableDocumentStore(MockDocumentStore):
+
+    def iter_documents(self, ids):
+        for doc_id in ids:
+            if doc_id in self._data_store:
+                yield self._data_store[doc_id]
+
+
+class OffsetsChangeFeed(ChangeFeed):
+    """Change feed whose checkpoints are taken from its processed offsets, like kafka"""
+
+    def __init__(self, changes):
+        self._changes = changes
+        self._processed_offsets = {}
+
+    def iter_changes(self, since, forever):
+        start = since + 1 if since is not None else 0
+        for change in self._changes[start:]:
+            self._processed_offsets['test'] = change.sequence_id
+            yield change
+
+    @contextmanager
+    def processed_offsets_as_of(self, offsets):
+        processed_offsets = self._processed_offsets
+        self._processed_offsets = copy(offsets)
+        try:
+            yield
+        finally:
+            self._processed_offsets = processed_offsets
+
+    def get_latest_offsets(self):
+        return {'test': len(self._changes)}
+
+    def get_latest_offsets_as_checkpoint_value(self):
+        return len(self._changes)
+
+    def get_processed_offsets(self):
+        return copy(self._processed_offsets)
+
+
+class RecordingBulkProcessor(BulkPillowProcessor):
+
+    def __init__(self, started, others_started):
+        self.started = started
+        self.others_started = others_started
+        self.processed = []
+        self.documents = []
+
+    def process_change(self, change):
+        self.processed.append(change.id)
+
+    def process_changes_chunk(self, changes_chunk):
+        self.started.set()
+        # both batch processors have to be running at the same time for this to return
+        assert self.others_started.wait(5)
+        self.processed.extend(change.id for change in changes_chunk)
+        self.documents.extend(change.document for change in changes_chunk)
+        return set(), []
+
+
+class ModifyingBulkProcessor(BulkPillowProcessor):
+
+    def __init__(self):
+        self.documents = []
+
+    def process_change(self, change):
+        pass
+
+    def process_changes_chunk(self, changes_chunk):
+        for change in changes_chunk:
+            change.document.setdefault('processed_by', []).append(self)
+            self.documents.append(change.document)
+        return set(), []
+
+
+class RecordingSerialProcessor(PillowProcessor):
+
+    def __init__(self):
+        self.processed = []
+
+    def process_change(self, change):
+        self.processed.append(change.id)
+
+
+class RecordingEventHandler(ChangeEventHandler):
+
+    def __init__(self, change_feed, processors):
+        self.change_feed = change_feed
+        self.processors = processors
+        self.checkpoints = []
+
+    def update_checkpoint(self, change, context):
+        self.checkpoints.append((
+            change.id,
+            self.get_new_seq(change),
+            [len(processor.processed) for processor in self.processors],
+        ))
+        return False
+
+    def get_new_seq(self, change):
+        return self.change_feed.get_processed_offsets()['test']
+
+
+class ResettingEventHandler(RecordingEventHandler):
+    """Raises a checkpoint reset the first time the checkpoint is updated"""
+
+    def update_checkpoint(self, change, context):
+        super(ResettingEventHandler, self).update_checkpoint(change, context)
+        if len(self.checkpoints) == 1:
+            raise PillowtopCheckpointReset()
+        return False
+
+
+def _get_changes(count):
+    document_store = IterableDocumentStore()
+    changes = []
+    for i in range(count):
+        doc_id = 'doc{}'.format(i)
+        document_store.save_document(doc_id, {'_id': doc_id})
+        metadata = ChangeMeta(document_id=doc_id, data_source_type='sql', data_source_name='test')
+        changes.append(Change(doc_id, i, metadata=metadata, document_store=document_store))
+    return changes
+
+
+class PipelinedPillowTest(SimpleTestCase):
+
+    def test_pipelined_processing(self):
+        changes = _get_changes(7)
+        change_feed = OffsetsChangeFeed(changes)
+
+        es_started, ucr_started = threading.Event(), threading.Event()
+        es_processor = RecordingBulkProcessor(es_started, ucr_started)
+        ucr_processor = RecordingBulkProcessor(ucr_started, es_started)
+        serial_processor = RecordingSerialProcessor()
+        processors = [es_processor, ucr_processor, serial_processor]
+        event_handler = RecordingEventHandler(change_feed, processors)
+        pillow = ConstructedPillow(
+            name='pipelined-pillow',
+            checkpoint=MagicMock(),
+            change_feed=change_feed,
+            processor=processors,
+            change_processed_event_handler=event_handler,
+            processor_chunk_size=3,
+            pipelined=True,
+        )
+        pillow.process_changes(since=None, forever=False)
+
+        doc_ids = [change.id for change in changes]
+        for processor in processors:
+            self.assertEqual(processor.processed, doc_ids)
+        # documents were loaded in bulk before the chunks were processed
+        self.assertEqual(es_processor.documents, [{'_id': doc_id} for doc_id in doc_ids])
+        # checkpoints are at the end of each chunk, once every processor is done with it
+        self.assertEqual(event_handler.checkpoints, [
+            ('doc2', 2, [3, 3, 3]),
+            ('doc5', 5, [6, 6, 6]),
+            ('doc6', 6, [7, 7, 7]),
+        ])
+
+    def test_checkpoint_reset(self):
+        changes = _get_changes(7)
+        change_feed = OffsetsChangeFeed(changes)
+        processors = [RecordingSerialProcessor(), ModifyingBulkProcessor()]
+        event_handler = ResettingEventHandler(change_feed, processors[:1])
+        checkpoint = MagicMock()
+        checkpoint.get_or_create_wrapped.return_value.wrapped_sequence = 5
+        pillow = ConstructedPillow(
+            name='pipelined-pillow',
+            checkpoint=checkpoint,
+            change_feed=change_feed,
+            processor=processors,
+            change_processed_event_handler=event_handler,
+            processor_chunk_size=3,
+            pipelined=True,
+        )
+        pillow.process_changes(since=None, forever=False)
+
+        # the chunk that was already read when the checkpoint was reset is
+        # processed before reading on from the reset checkpoint
+        self.assertEqual(processors[0].processed, [change.id for change in changes])
+        self.assertEqual(event_handler.checkpoints, [
+            ('doc2', 2, [3]),
+            ('doc5', 5, [6]),
+            ('doc6', 6, [7]),
+        ])
+
+    def test_processors_get_their_own_changes(self):
+        changes = _get_changes(3)
+        processors = [ModifyingBulkProcessor(), ModifyingBulkProcessor()]
+        pillow = ConstructedPillow(
+            name='pipelined-pillow',
+            checkpoint=MagicMock(),
+            change_feed=OffsetsChangeFeed(changes),
+            processor=processors,
+            processor_chunk_size=3,
+            pipelined=True,
+        )
+        pillow.process_changes(since=None, forever=False)
+
+        for processor in processors:
+            self.assertEqual(
+                processor.documents,
+                [{'_id': change.id, 'processed_by': [processor]} for change in changes]
+            )
+        for change in changes:
+            self.assertEqual(change.document, {'_id': change.id})
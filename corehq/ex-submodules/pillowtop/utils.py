@@ -1,7 +1,7 @@
 from __future__ import division
 from __future__ import absolute_import
 from __future__ import unicode_literals
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from copy import deepcopy
 from datetime import datetime
 import json
@@ -278,6 +278,54 @@ def prepare_bulk_payloads(bulk_changes, max_size, chunk_size=100):
     return [_f for _f in payloads if _f]
 
 
+def bulk_fetch_changes_docs(changes, domain=None):
+    """
+    Fetch the documents for the given changes in bulk (one query per document store)
+    and set them on the changes so that later lookups are avoided.
+
+    :return: tuple of (set of changes that should be retried serially, list of docs)
+        Changes whose document is missing or doesn't match the revision in the change
+        are retried serially so that the appropriate errors can be raised.
+    """
+    # break up by domain and doctype
+    changes_by_store = defaultdict(list)
+    for change in changes:
+        if domain:
+            assert change.metadata.domain == domain
+        if change.metadata:
+            key = (change.metadata.domain, change.metadata.data_source_name)
+        else:
+            key = change.document_store
+        changes_by_store[key].append(change)
+
+    # query
+    docs = []
+    for _changes in six.itervalues(changes_by_store):
+        doc_store = _changes[0].document_store
+        doc_ids_to_query = [change.id for change in _changes if change.should_fetch_document()]
+        new_docs = list(doc_store.iter_documents(doc_ids_to_query)) if doc_ids_to_query else []
+        docs_queried_prior = [change.document for change in _changes if not change.should_fetch_document()]
+        docs.extend(new_docs + [doc for doc in docs_queried_prior if doc is not None])
+
+    # catch missing docs
+    retry_changes = set()
+    docs_by_id = {doc['_id']: doc for doc in docs}
+    for change in changes:
+        if change.id not in docs_by_id:
+            # we need to capture DocumentMissingError which is not possible in bulk
+            #   so let pillow fall back to serial mode to capture the error for missing docs
+            retry_changes.add(change)
+            continue
+        else:
+            # set this, so that subsequent doc lookups are avoided
+            change.set_document(docs_by_id[change.id])
+        try:
+            ensure_matched_revisions(change, docs_by_id.get(change.id))
+        except DocumentMismatchError:
+            retry_changes.add(change)
+    return retry_changes, docs
+
+
 def ensure_matched_revisions(change, fetched_document):
     """
     This function ensures that the document fetched from a change matches the
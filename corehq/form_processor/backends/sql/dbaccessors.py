@@ -7,7 +7,7 @@ import logging
 import struct
 from abc import ABCMeta, abstractproperty
 from abc import abstractmethod
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from datetime import datetime
 from io import BytesIO
 from itertools import groupby
@@ -982,46 +982,72 @@ class CaseAccessorSQL(AbstractCaseAccessor):
 
     @staticmethod
     def save_case(case):
-        transactions_to_save = case.get_live_tracked_models(CaseTransaction)
-
-        indices_to_save_or_update = case.get_live_tracked_models(CommCareCaseIndexSQL)
-        index_ids_to_delete = [index.id for index in case.get_tracked_models_to_delete(CommCareCaseIndexSQL)]
-
-        attachments_to_save = case.get_tracked_models_to_create(CaseAttachmentSQL)
-        attachment_ids_to_delete = [att.id for att in case.get_tracked_models_to_delete(CaseAttachmentSQL)]
-        for attachment in attachments_to_save:
-            if attachment.is_saved():
-                raise CaseSaveError(
-                    """Updating attachments is not supported.
-                    case id={}, attachment id={}""".format(
-                        case.case_id, attachment.attachment_id
+        CaseAccessorSQL.save_cases([case])
+
+    @staticmethod
+    def save_cases(cases):
+        """Save cases along with their tracked transactions, indices and attachments
+
+        Rather than saving each model on its own, the models of all the cases
+        that live in the same database are written together: new rows with
+        multi-row inserts, changed rows with multi-row upserts and removed rows
+        with a single delete per table.
+        """
+        cases_by_db = defaultdict(list)
+        for case in cases:
+            for attachment in case.get_tracked_models_to_create(CaseAttachmentSQL):
+                if attachment.is_saved():
+                    raise CaseSaveError(
+                        """Updating attachments is not supported.
+                        case id={}, attachment id={}""".format(
+                            case.case_id, attachment.attachment_id
+                        )
                     )
-                )
+            cases_by_db[case.db].append(case)
 
         try:
-            with transaction.atomic(using=case.db, savepoint=False):
-                case.save()
-                for case_transaction in transactions_to_save:
-                    case_transaction.save()
+            for db_name, db_cases in six.iteritems(cases_by_db):
+                with transaction.atomic(using=db_name, savepoint=False):
+                    CaseAccessorSQL._save_cases_in_db(db_name, db_cases)
+        except InternalError as e:
+            raise CaseSaveError(e)
 
-                for index in indices_to_save_or_update:
-                    index.domain = case.domain  # ensure domain is set on indices
-                    update_fields = None
-                    if index.is_saved():
-                        # prevent changing identifier
-                        update_fields = ['referenced_id', 'referenced_type', 'relationship_id']
-                    index.save(update_fields=update_fields)
+        for case in cases:
+            case.clear_tracked_models()
+
+    @staticmethod
+    def _save_cases_in_db(db_name, cases):
+        transactions_to_save = []
+        indices_to_save_or_update = []
+        index_ids_to_delete = []
+        attachments_to_save = []
+        attachment_ids_to_delete = []
+        for case in cases:
+            transactions_to_save.extend(case.get_live_tracked_models(CaseTransaction))
+            for index in case.get_live_tracked_models(CommCareCaseIndexSQL):
+                index.domain = case.domain  # ensure domain is set on indices
+                indices_to_save_or_update.append(index)
+            index_ids_to_delete.extend(
+                index.id for index in case.get_tracked_models_to_delete(CommCareCaseIndexSQL)
+            )
+            attachments_to_save.extend(case.get_tracked_models_to_create(CaseAttachmentSQL))
+            attachment_ids_to_delete.extend(
+                att.id for att in case.get_tracked_models_to_delete(CaseAttachmentSQL)
+            )
 
-                CommCareCaseIndexSQL.objects.using(case.db).filter(id__in=index_ids_to_delete).delete()
+        _bulk_save(CommCareCaseSQL, db_name, cases)
+        _bulk_save(CaseTransaction, db_name, transactions_to_save)
+        # prevent changing identifier
+        _bulk_save(CommCareCaseIndexSQL, db_name, indices_to_save_or_update,
+                   update_fields=['referenced_id', 'referenced_type', 'relationship_id'])
 
-                for attachment in attachments_to_save:
-                    attachment.save()
+        if index_ids_to_delete:
+            CommCareCaseIndexSQL.objects.using(db_name).filter(id__in=index_ids_to_delete).delete()
 
-                CaseAttachmentSQL.objects.using(case.db).filter(id__in=attachment_ids_to_delete).delete()
+        _bulk_save(CaseAttachmentSQL, db_name, attachments_to_save)
 
-                case.clear_tracked_models()
-        except InternalError as e:
-            raise CaseSaveError(e)
+        if attachment_ids_to_delete:
+            CaseAttachmentSQL.objects.using(db_name).filter(id__in=attachment_ids_to_delete).delete()
 
     @staticmethod
     def get_open_case_ids_for_owner(domain, owner_id):
@@ -1135,6 +1161,28 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             [domain, external_id, case_type]
         ))
 
+    @staticmethod
+    def get_cases_by_external_ids(domain, external_ids, case_type=None):
+        """
+        Get the cases with any of the given external IDs using a single
+        query per shard.
+        """
+        from corehq.sql_db.util import get_db_aliases_for_partitioned_query
+        if not external_ids:
+            return []
+
+        cases = []
+        for db_name in get_db_aliases_for_partitioned_query():
+            query = CommCareCaseSQL.objects.using(db_name).filter(
+                domain=domain,
+                external_id__in=external_ids,
+                deleted=False,
+            )
+            if case_type:
+                query = query.filter(type=case_type)
+            cases.extend(query)
+        return cases
+
     @staticmethod
     def get_case_by_domain_hq_user_id(domain, user_id, case_type):
         try:
@@ -1469,6 +1517,54 @@ class LedgerAccessorSQL(AbstractLedgerAccessor):
                 yield trans
 
 
+def _bulk_save(model_class, db_name, objects, update_fields=None, batch_size=500):
+    """Save objects with one INSERT per batch for new rows and one upsert per batch
+    for existing rows
+
+    :param update_fields: fields to update on existing rows. Defaults to all
+    fields except the primary key.
+    """
+    new_objects = [obj for obj in objects if not obj.is_saved()]
+    saved_objects = [obj for obj in objects if obj.is_saved()]
+    if new_objects:
+        model_class.objects.using(db_name).bulk_create(new_objects, batch_size=batch_size)
+    if saved_objects:
+        _bulk_upsert(model_class, db_name, saved_objects, update_fields, batch_size)
+
+
+def _bulk_upsert(model_class, db_name, objects, update_fields, batch_size):
+    """Update existing rows with ``INSERT ... ON CONFLICT (pk) DO UPDATE``"""
+    connection = connections[db_name]
+    quote_name = connection.ops.quote_name
+    meta = model_class._meta
+    fields = meta.concrete_fields
+    if update_fields is None:
+        update_fields = [field for field in fields if not field.primary_key]
+    else:
+        update_fields = [meta.get_field(name) for name in update_fields]
+
+    sql_template = (
+        'INSERT INTO {table} ({columns}) VALUES {{rows}} '
+        'ON CONFLICT ({pk}) DO UPDATE SET {updates}'
+    ).format(
+        table=quote_name(meta.db_table),
+        columns=', '.join(quote_name(field.column) for field in fields),
+        pk=quote_name(meta.pk.column),
+        updates=', '.join(
+            '{0} = EXCLUDED.{0}'.format(quote_name(field.column)) for field in update_fields
+        ),
+    )
+    row_placeholder = '({})'.format(', '.join(['%s'] * len(fields)))
+    with connection.cursor() as cursor:
+        for chunk in chunked(objects, batch_size):
+            params = [
+                field.get_db_prep_save(field.pre_save(obj, False), connection)
+                for obj in chunk
+                for field in fields
+            ]
+            cursor.execute(sql_template.format(rows=', '.join([row_placeholder] * len(chunk))), params)
+
+
 def _sort_with_id_list(object_list, id_list, id_property):
     """Sort object list in the same order as given list of ids
 
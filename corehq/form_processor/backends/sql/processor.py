@@ -10,6 +10,7 @@ from django.db import transaction
 from lxml import etree
 
 from casexml.apps.case.xform import get_case_updates
+from corehq.apps.change_feed.producer import producer
 from corehq.form_processor.backends.sql.update_strategy import SqlCaseUpdateStrategy
 from corehq.form_processor.backends.sql.dbaccessors import (
     FormAccessorSQL, CaseAccessorSQL, LedgerAccessorSQL
@@ -116,8 +117,7 @@ class FormProcessorSQL(object):
 
             FormAccessorSQL.save_new_form(processed_forms.submitted)
             if cases:
-                for case in cases:
-                    CaseAccessorSQL.save_case(case)
+                CaseAccessorSQL.save_cases(cases)
 
             if stock_result:
                 ledgers_to_save = stock_result.models_to_save
@@ -127,9 +127,12 @@ class FormProcessorSQL(object):
             sort_submissions = toggles.SORT_OUT_OF_ORDER_FORM_SUBMISSIONS_SQL.enabled(
                 processed_forms.submitted.domain, toggles.NAMESPACE_DOMAIN)
             if sort_submissions:
-                for case in cases:
-                    if SqlCaseUpdateStrategy(case).reconcile_transactions_if_necessary():
-                        CaseAccessorSQL.save_case(case)
+                reconciled_cases = [
+                    case for case in cases
+                    if SqlCaseUpdateStrategy(case).reconcile_transactions_if_necessary()
+                ]
+                if reconciled_cases:
+                    CaseAccessorSQL.save_cases(reconciled_cases)
 
         if publish_to_kafka:
             try:
@@ -139,14 +142,15 @@ class FormProcessorSQL(object):
 
     @staticmethod
     def publish_changes_to_kafka(processed_forms, cases, stock_result):
-        publish_form_saved(processed_forms.submitted)
-        cases = cases or []
-        for case in cases:
-            publish_case_saved(case)
+        with producer.delivered():
+            publish_form_saved(processed_forms.submitted)
+            cases = cases or []
+            for case in cases:
+                publish_case_saved(case)
 
-        if stock_result:
-            for ledger in stock_result.models_to_save:
-                publish_ledger_v2_saved(ledger)
+            if stock_result:
+                for ledger in stock_result.models_to_save:
+                    publish_ledger_v2_saved(ledger)
 
     @classmethod
     def apply_deprecation(cls, existing_xform, new_xform):
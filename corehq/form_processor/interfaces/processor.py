@@ -10,6 +10,7 @@ from lxml import etree
 from redis.exceptions import RedisError
 
 from casexml.apps.case.exceptions import IllegalCaseId
+from casexml.apps.phone.restore_caching import invalidate_case_xml_cache
 from corehq.form_processor.exceptions import (
     KafkaPublishingError,
     PostSaveError,
@@ -177,7 +178,7 @@ class FormProcessorInterface(object):
         if stock_result:
             assert stock_result.populated
         try:
-            return self.processor.save_processed_models(
+            result = self.processor.save_processed_models(
                 forms,
                 cases=cases,
                 stock_result=stock_result,
@@ -200,6 +201,10 @@ class FormProcessorInterface(object):
             e.sentry_capture = False  # we've already notified
             raise
 
+        if cases:
+            invalidate_case_xml_cache(self.domain, [case.case_id for case in cases])
+        return result
+
     def hard_delete_case_and_forms(self, case, xforms):
         domain = case.domain
         all_domains = {domain} | {xform.domain for xform in xforms}
@@ -216,7 +221,9 @@ class FormProcessorInterface(object):
         return self.processor.assign_new_id(xform)
 
     def hard_rebuild_case(self, case_id, detail, lock=True):
-        return self.processor.hard_rebuild_case(self.domain, case_id, detail, lock=lock)
+        case = self.processor.hard_rebuild_case(self.domain, case_id, detail, lock=lock)
+        invalidate_case_xml_cache(self.domain, [case_id])
+        return case
 
     def get_cases_from_forms(self, case_db, xforms):
         """
@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from corehq.form_processor.utils import (
+    adjust_datetimes,
+    convert_xform_to_json,
+    convert_xform_to_json_with_adjusted_datetimes,
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'tests', 'data', 'ingestion')
+
+
+def _convert_then_adjust(xml):
+    return adjust_datetimes(convert_xform_to_json(xml))
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the time taken to turn form XML into form JSON by converting
+    it and then adjusting datetimes in the JSON, with converting it and
+    adjusting datetimes as the XML is parsed.
+
+    Uses the forms in corehq/form_processor/tests/data/ingestion, or the
+    XML files given.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, files, **options):
+        if not files:
+            files = sorted(
+                os.path.join(CORPUS_DIR, name)
+                for name in os.listdir(CORPUS_DIR) if name.endswith('.xml')
+            )
+        iterations = options['iterations']
+        for path in files:
+            with open(path, 'rb') as f:
+                xml = f.read()
+            print("{} ({} bytes)".format(os.path.basename(path), len(xml)))
+            for name, convert in (
+                ('convert then adjust', _convert_then_adjust),
+                ('adjust while parsing', convert_xform_to_json_with_adjusted_datetimes),
+            ):
+                elapsed = timeit.timeit(lambda: convert(xml), number=iterations)
+                print("    {:<22} {:8.3f} ms/form".format(name, elapsed / iterations * 1000))
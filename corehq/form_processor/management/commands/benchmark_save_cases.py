@@ -0,0 +1,110 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import time
+import uuid
+from datetime import datetime
+
+from contextlib2 import ExitStack
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from six.moves import range
+
+from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
+from corehq.form_processor.models import CaseTransaction, CommCareCaseIndexSQL, CommCareCaseSQL
+from dimagi.utils.chunked import chunked
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the time taken to save the cases of forms with 1, 10 and 100
+    case blocks one case at a time (CaseAccessorSQL.save_case) and all
+    together (CaseAccessorSQL.save_cases).
+
+    Each case is created with a transaction and an index, and then updated
+    with a second transaction. The cases are hard deleted afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('--forms', type=int, default=50,
+                            help='Number of forms to save for each form size')
+
+    def handle(self, domain, **options):
+        forms = options['forms']
+        print("{} forms of each size".format(forms))
+        for cases_per_form in (1, 10, 100):
+            for name, save in (('save_case', _save_one_at_a_time), ('save_cases', CaseAccessorSQL.save_cases)):
+                case_ids = []
+                try:
+                    elapsed = self._run_benchmark(domain, forms, cases_per_form, save, case_ids)
+                finally:
+                    for chunk in chunked(case_ids, 1000):
+                        CaseAccessorSQL.hard_delete_cases(domain, list(chunk))
+                print("{:>3} cases per form, {:<10} {:6.2f}s ({:.1f} ms/form)".format(
+                    cases_per_form, name, elapsed, elapsed / (forms * 2) * 1000
+                ))
+
+    def _run_benchmark(self, domain, forms, cases_per_form, save, case_ids):
+        elapsed = 0
+        for i in range(forms):
+            cases = [_new_case(domain) for j in range(cases_per_form)]
+            case_ids.extend(case.case_id for case in cases)
+            elapsed += _time_save(save, cases)
+
+            for case in cases:
+                case.name = 'updated'
+                _track_transaction(case)
+            elapsed += _time_save(save, cases)
+        return elapsed
+
+
+def _save_one_at_a_time(cases):
+    for case in cases:
+        CaseAccessorSQL.save_case(case)
+
+
+def _time_save(save, cases):
+    start = time.time()
+    # as in FormProcessorSQL.save_processed_models
+    with ExitStack() as stack:
+        for db_name in {case.db for case in cases}:
+            stack.enter_context(transaction.atomic(db_name))
+        save(cases)
+    return time.time() - start
+
+
+def _new_case(domain):
+    utcnow = datetime.utcnow()
+    case = CommCareCaseSQL(
+        case_id=uuid.uuid4().hex,
+        domain=domain,
+        type='benchmark',
+        owner_id='benchmark',
+        opened_on=utcnow,
+        modified_on=utcnow,
+        modified_by='benchmark',
+        server_modified_on=utcnow,
+    )
+    _track_transaction(case, CaseTransaction.TYPE_CASE_CREATE)
+    case.track_create(CommCareCaseIndexSQL(
+        case=case,
+        domain=domain,
+        identifier='parent',
+        referenced_type='benchmark',
+        referenced_id=uuid.uuid4().hex,
+        relationship_id=CommCareCaseIndexSQL.CHILD,
+    ))
+    return case
+
+
+def _track_transaction(case, action_type=0):
+    case.track_create(CaseTransaction(
+        case=case,
+        form_id=uuid.uuid4().hex,
+        server_date=datetime.utcnow(),
+        type=CaseTransaction.TYPE_FORM | action_type,
+        revoked=False,
+    ))
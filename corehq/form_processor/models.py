@@ -35,7 +35,6 @@ from corehq.blobs.util import get_content_md5
 from corehq.form_processor.abstract_models import DEFAULT_PARENT_IDENTIFIER
 from corehq.form_processor.exceptions import UnknownActionType
 from corehq.form_processor.track_related import TrackRelatedChanges
-from corehq.apps.tzmigration.api import force_phone_timezones_should_be_processed
 from corehq.sql_db.models import PartitionedModel, RestrictedManager
 from couchforms import const
 from couchforms.jsonobject_extensions import GeoPointProperty
@@ -483,16 +482,14 @@ class XFormInstanceSQL(PartitionedModel, models.Model, RedisLockableMixIn, Attac
     def form_data(self):
         """Returns the JSON representation of the form XML"""
         from couchforms import XMLSyntaxError
-        from .utils import convert_xform_to_json, adjust_datetimes
+        from .utils import convert_xform_to_json_with_adjusted_datetimes
         from corehq.form_processor.utils.metadata import scrub_form_meta
         xml = self.get_xml()
         try:
-            form_json = convert_xform_to_json(xml)
+            # we can assume all sql domains are new timezone domains
+            form_json = convert_xform_to_json_with_adjusted_datetimes(xml, process_timezones=True)
         except XMLSyntaxError:
             return {}
-        # we can assume all sql domains are new timezone domains
-        with force_phone_timezones_should_be_processed():
-            adjust_datetimes(form_json)
 
         scrub_form_meta(self.form_id, form_json)
         return form_json
@@ -1,10 +1,18 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
+import json
+import os
+
 from django.test import SimpleTestCase
 from corehq.apps.tzmigration.api import phone_timezones_should_be_processed
 from corehq.apps.tzmigration.test_utils import \
     run_pre_and_post_timezone_migration
-from corehq.form_processor.utils import adjust_datetimes
+from corehq.form_processor.utils import (
+    adjust_datetimes,
+    convert_xform_to_json,
+    convert_xform_to_json_with_adjusted_datetimes,
+)
+from corehq.util.test_utils import TestFileMixin, generate_cases
 
 
 class AdjustDatetimesTest(SimpleTestCase):
@@ -38,3 +46,36 @@ class AdjustDatetimesTest(SimpleTestCase):
             adjust_datetimes({'fake_datetime': fake_datetime}),
             {'fake_datetime': fake_datetime}
         )
+
+
+class ConvertXformToJsonWithAdjustedDatetimesTest(SimpleTestCase, TestFileMixin):
+    file_path = ('data', 'ingestion')
+    root = os.path.dirname(__file__)
+
+    def assert_same_json(self, xml):
+        expected = adjust_datetimes(convert_xform_to_json(xml))
+        actual = convert_xform_to_json_with_adjusted_datetimes(xml)
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    @run_pre_and_post_timezone_migration
+    def test_attributes(self):
+        xml = (
+            '<data xmlns="http://example.com/form" started="2013-03-09T06:30:09.007+03">'
+            '<item at="2015-07-14 2015-06-07 " on="2015-04-03">2013-03-09T06:30:09.007</item>'
+            '</data>'
+        )
+        self.assert_same_json(xml)
+        form_json = convert_xform_to_json_with_adjusted_datetimes(xml)
+        self.assertEqual(form_json['item']['#text'], '2013-03-09T06:30:09.007000Z')
+        self.assertEqual(form_json['item']['@at'], '2015-07-14 2015-06-07 ')
+        self.assertEqual(form_json['item']['@on'], '2015-04-03')
+
+
+@generate_cases([
+    ('small',),
+    ('repeat_heavy',),
+    ('attachment_heavy',),
+], ConvertXformToJsonWithAdjustedDatetimesTest)
+@run_pre_and_post_timezone_migration
+def test_corpus(self, name):
+    self.assert_same_json(self.get_xml(name))
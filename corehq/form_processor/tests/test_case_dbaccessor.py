@@ -366,6 +366,67 @@ class CaseAccessorTestsSQL(TestCase):
         with self.assertRaises(CaseSaveError):
             CaseAccessorSQL.save_case(case)
 
+    def test_save_cases(self):
+        utcnow = datetime.utcnow()
+        form_id = uuid.uuid4().hex
+        parent = _create_case()
+        cases = []
+        for i in range(5):
+            case = CommCareCaseSQL(
+                case_id=uuid.uuid4().hex,
+                domain=DOMAIN,
+                type='child',
+                name='child {}'.format(i),
+                owner_id='user1',
+                opened_on=utcnow,
+                modified_on=utcnow,
+                modified_by='user1',
+                server_modified_on=utcnow,
+            )
+            case.track_create(CaseTransaction(
+                case=case,
+                form_id=form_id,
+                server_date=utcnow,
+                type=CaseTransaction.TYPE_FORM | CaseTransaction.TYPE_CASE_CREATE,
+                revoked=False
+            ))
+            case.track_create(CommCareCaseIndexSQL(
+                case=case,
+                identifier='parent',
+                referenced_type='mother',
+                referenced_id=parent.case_id,
+                relationship_id=CommCareCaseIndexSQL.CHILD
+            ))
+            cases.append(case)
+        # existing cases are saved along with new ones
+        parent.name = 'mother'
+        cases.append(parent)
+
+        CaseAccessorSQL.save_cases(cases)
+
+        for case in cases:
+            self.assertTrue(case.is_saved())
+            self.assertFalse(case.has_tracked_models())
+        saved_cases = CaseAccessorSQL.get_cases([case.case_id for case in cases], ordered=True)
+        self.assertEqual([case.name for case in saved_cases], [case.name for case in cases])
+        self.assertEqual(
+            len(CaseAccessorSQL.get_reverse_indexed_cases(DOMAIN, [parent.case_id])), 5
+        )
+        for case in cases[:-1]:
+            [transaction] = CaseAccessorSQL.get_transactions(case.case_id)
+            self.assertEqual(transaction.form_id, form_id)
+
+    def test_save_cases_update_transactions(self):
+        case = _create_case()
+        [transaction] = CaseAccessorSQL.get_transactions(case.case_id)
+        transaction.revoked = True
+        case.track_update(transaction)
+        CaseAccessorSQL.save_cases([case])
+
+        [updated_transaction] = CaseAccessorSQL.get_transactions(case.case_id)
+        self.assertEqual(updated_transaction.id, transaction.id)
+        self.assertTrue(updated_transaction.revoked)
+
     def test_get_case_ids_by_owners(self):
         case1 = _create_case(user_id="user1")
         case2 = _create_case(user_id="user1")
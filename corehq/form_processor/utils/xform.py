@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 from datetime import datetime
+from io import BytesIO
 from lxml import etree
 
 import iso8601
@@ -8,6 +9,7 @@ import pytz
 import six
 
 import xml2json
+from xml2json.lib import convert_xml_to_json
 from corehq.apps.tzmigration.api import phone_timezones_should_be_processed
 from corehq.form_processor.interfaces.processor import XFormQuestionValueIterator
 from corehq.form_processor.models import Attachment
@@ -183,6 +185,16 @@ def adjust_text_to_datetime(text, process_timezones=None):
         return matching_datetime.replace(tzinfo=None)
 
 
+def _adjust_datetime_text(text, process_timezones):
+    """Returns datetime-like text formatted uniformly, or None if it isn't a valid datetime"""
+    try:
+        return six.text_type(json_format_datetime(
+            adjust_text_to_datetime(text, process_timezones=process_timezones)
+        ))
+    except (iso8601.ParseError, ValueError):
+        return None
+
+
 def adjust_datetimes(data, parent=None, key=None, process_timezones=None):
     """
     find all datetime-like strings within data (deserialized json)
@@ -202,12 +214,9 @@ def adjust_datetimes(data, parent=None, key=None, process_timezones=None):
     # todo: in the future this will convert to UTC
     if isinstance(data, six.string_types) and jsonobject.re_loose_datetime.match(data):
         soft_assert_type_text(data)
-        try:
-            parent[key] = six.text_type(json_format_datetime(
-                adjust_text_to_datetime(data, process_timezones=process_timezones)
-            ))
-        except (iso8601.ParseError, ValueError):
-            pass
+        adjusted = _adjust_datetime_text(data, process_timezones)
+        if adjusted is not None:
+            parent[key] = adjusted
     elif isinstance(data, dict):
         for key, value in data.items():
             adjust_datetimes(value, parent=data, key=key, process_timezones=process_timezones)
@@ -220,6 +229,42 @@ def adjust_datetimes(data, parent=None, key=None, process_timezones=None):
     return data
 
 
+def convert_xform_to_json_with_adjusted_datetimes(xml_string, process_timezones=None):
+    """
+    Equivalent to ``adjust_datetimes(convert_xform_to_json(xml_string))``
+
+    Rather than walking the whole JSON again once it has been built,
+    datetime-like text and attribute values are formatted on the XML
+    elements as they are parsed. The JSON is then built from the parsed
+    tree by xml2json, as in convert_xform_to_json.
+    """
+    process_timezones = process_timezones or phone_timezones_should_be_processed()
+    if isinstance(xml_string, six.text_type):
+        xml_string = xml_string.encode('utf-8')
+
+    root = None
+    try:
+        for event, element in etree.iterparse(BytesIO(xml_string), events=('end',)):
+            text = element.text
+            if text and jsonobject.re_loose_datetime.match(text):
+                adjusted = _adjust_datetime_text(text, process_timezones)
+                if adjusted is not None:
+                    element.text = adjusted
+            for name, value in element.attrib.items():
+                if jsonobject.re_loose_datetime.match(value):
+                    adjusted = _adjust_datetime_text(value, process_timezones)
+                    if adjusted is not None:
+                        element.set(name, adjusted)
+            root = element
+    except etree.XMLSyntaxError as e:
+        from couchforms import XMLSyntaxError
+        raise XMLSyntaxError('Invalid XML: %s' % e)
+
+    name, json_form = convert_xml_to_json(root)
+    json_form['#type'] = name
+    return json_form
+
+
 def resave_form(domain, form):
     from corehq.form_processor.utils import should_use_sql_backend
     from corehq.form_processor.change_publishers import publish_form_saved
@@ -160,7 +160,7 @@ class OpenmrsRepeater(CaseRepeater):
         payload = super(OpenmrsRepeater, self).get_payload(repeat_record)
         return json.loads(payload)
 
-    def send_request(self, repeat_record, payload):
+    def send_request(self, repeat_record, payload, session=None):
         value_sources = chain(
             six.itervalues(self.openmrs_config.case_config.patient_identifiers),
             six.itervalues(self.openmrs_config.case_config.person_properties),
@@ -10,6 +10,13 @@ CHECK_REPEATERS_KEY = 'check-repeaters-key'
 
 POST_TIMEOUT = 75  # seconds
 
+# Max number of repeat records of one repeater sent by a single task
+# when REPEATERS_BATCH_DISPATCH is on
+DISPATCH_BATCH_SIZE = 100
+# Number of failed sends in a row after which an endpoint is considered
+# down and the rest of its repeat records are postponed
+ENDPOINT_FAILURE_THRESHOLD = 3
+
 RECORD_PENDING_STATE = 'PENDING'
 RECORD_SUCCESS_STATE = 'SUCCESS'
 RECORD_FAILURE_STATE = 'FAIL'
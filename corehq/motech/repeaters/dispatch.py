@@ -0,0 +1,217 @@
+"""
+Sends repeat records in batches, grouped by repeater.
+
+The records of a batch are sent over a requests session that is shared by
+everything this process sends to the same endpoint, so connections are
+kept alive between sends, with at most REPEATERS_DISPATCH_CONCURRENCY
+requests in flight. If the endpoint fails several times in a row, the
+rest of the batch, and any other batch for that endpoint, is postponed
+until the endpoint is due to be retried rather than each record being
+tried and failing on its own. Results are saved in bulk at the end.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+from couchdbkit.exceptions import BulkSaveError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from six.moves.urllib.parse import urlparse
+
+from corehq.motech.repeaters.const import (
+    ENDPOINT_FAILURE_THRESHOLD,
+    MIN_RETRY_WAIT,
+    RECORD_FAILURE_STATE,
+    RECORD_PENDING_STATE,
+)
+from corehq.motech.repeaters.models import RepeatRecord
+from corehq.util.datadog.gauges import datadog_counter
+from dimagi.utils.couch.undo import DELETED_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_endpoint(url):
+    parsed = urlparse(url)
+    return '{}://{}'.format(parsed.scheme, parsed.netloc)
+
+
+def get_endpoint_session(endpoint):
+    """
+    Returns the session used for everything this process sends to endpoint
+    """
+    with _sessions_lock:
+        if endpoint not in _sessions:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings.REPEATERS_DISPATCH_CONCURRENCY,
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[endpoint] = session
+        return _sessions[endpoint]
+
+
+def _get_backoff_key(endpoint):
+    return 'repeater-endpoint-backoff-{}'.format(endpoint)
+
+
+def get_endpoint_backoff(endpoint):
+    """
+    Returns when endpoint can be sent to again, or None if it isn't being backed off
+    """
+    until = cache.get(_get_backoff_key(endpoint))
+    if until and until > datetime.utcnow():
+        return until
+    return None
+
+
+def set_endpoint_backoff(endpoint, until):
+    timeout = int((until - datetime.utcnow()).total_seconds())
+    if timeout > 0:
+        cache.set(_get_backoff_key(endpoint), until, timeout)
+
+
+def prepare_repeat_record(repeat_record):
+    """
+    Deals with repeat records that shouldn't be sent (cancelled, paused,
+    deleted repeater etc.) and returns whether repeat_record should be fired.
+    """
+    if (
+        repeat_record.state == RECORD_FAILURE_STATE and
+        repeat_record.overall_tries >= repeat_record.max_possible_tries
+    ):
+        repeat_record.cancel()
+        repeat_record.save()
+        return False
+    if repeat_record.cancelled:
+        return False
+
+    repeater = repeat_record.repeater
+    if not repeater:
+        repeat_record.cancel()
+        repeat_record.save()
+        return False
+
+    if repeater.paused:
+        # postpone repeat record by 1 day so that these don't get picked in each cycle and
+        # thus clogging the queue with repeat records with paused repeater
+        repeat_record.postpone_by(timedelta(days=1))
+        return False
+    if repeater.doc_type.endswith(DELETED_SUFFIX):
+        if not repeat_record.doc_type.endswith(DELETED_SUFFIX):
+            repeat_record.doc_type += DELETED_SUFFIX
+            repeat_record.save()
+        return False
+    return repeat_record.state in (RECORD_PENDING_STATE, RECORD_FAILURE_STATE)
+
+
+def claim_repeat_records(repeat_records):
+    """
+    Bulk version of RepeatRecord.attempt_forward_now: pushes the next check
+    of the records that are due out by 48 hours, so that they aren't queued
+    again while they are being sent, and returns them. Records that another
+    process saved first are left out.
+    """
+    now = datetime.utcnow()
+    claimed = [
+        record for record in repeat_records
+        if not (record.succeeded or record.cancelled or record.next_check is None)
+        and record.next_check < now
+    ]
+    if not claimed:
+        return []
+    for record in claimed:
+        record.next_check = now + timedelta(hours=48)
+    try:
+        RepeatRecord.bulk_save(claimed)
+    except BulkSaveError as e:
+        conflicts = {error['id'] for error in e.errors}
+        claimed = [record for record in claimed if record._id not in conflicts]
+    return claimed
+
+
+class _EndpointBackoff(object):
+    """
+    Tracks failed sends to an endpoint, and when it should next be tried
+    once enough of them fail in a row
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.until = get_endpoint_backoff(endpoint)
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def record_attempt(self, attempt):
+        with self.lock:
+            if attempt.succeeded:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= ENDPOINT_FAILURE_THRESHOLD and self.until is None:
+                self.until = attempt.next_check or datetime.utcnow() + MIN_RETRY_WAIT
+                set_endpoint_backoff(self.endpoint, self.until)
+                datadog_counter('commcare.repeaters.dispatch.endpoint_backoff')
+
+
+def dispatch_repeat_records(repeat_records):
+    """
+    Sends repeat records that all belong to the same repeater and saves them
+    """
+    repeat_records = [record for record in repeat_records if prepare_repeat_record(record)]
+    if not repeat_records:
+        return
+
+    endpoint = get_endpoint(repeat_records[0].repeater.url)
+    session = get_endpoint_session(endpoint)
+    backoff = _EndpointBackoff(endpoint)
+
+    def send(repeat_record):
+        if backoff.until:
+            repeat_record.last_checked = datetime.utcnow()
+            repeat_record.next_check = backoff.until
+            datadog_counter('commcare.repeaters.dispatch.postponed')
+            return
+        try:
+            repeat_record.fire(session=session, save=False)
+        except Exception:
+            logger.exception('Failed to process repeat record: {}'.format(repeat_record._id))
+        if repeat_record.attempts:
+            backoff.record_attempt(repeat_record.attempts[-1])
+        datadog_counter('commcare.repeaters.dispatch.sent')
+
+    remaining = iter(repeat_records)
+    remaining_lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with remaining_lock:
+                    repeat_record = next(remaining, None)
+                if repeat_record is None:
+                    return
+                send(repeat_record)
+        finally:
+            # payloads are generated in this thread
+            connections.close_all()
+
+    num_workers = min(settings.REPEATERS_DISPATCH_CONCURRENCY, len(repeat_records))
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        for future in [pool.submit(worker) for i in range(num_workers)]:
+            future.result()
+
+    try:
+        RepeatRecord.bulk_save(repeat_records)
+    except BulkSaveError as e:
+        logger.error('Failed to save repeat records', extra={'details': {'errors': e.errors}})
@@ -0,0 +1,59 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from six.moves import range
+
+from corehq.motech.repeaters.const import POST_TIMEOUT
+from corehq.motech.repeaters.dispatch import get_endpoint, get_endpoint_session
+from corehq.motech.repeaters.stub_server import StubServer
+from dimagi.utils.post import simple_post
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the throughput of sending repeater payloads one at a time with a
+    new connection for each, as process_repeat_record does, with sending them
+    concurrently over a pooled keep-alive session, as the batch dispatcher does.
+
+    Payloads are sent to a local stub server with a simulated response time.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payloads', type=int, default=1000)
+        parser.add_argument('--payload-size', type=int, default=4096, help='Bytes per payload')
+        parser.add_argument('--latency', type=float, default=0.02,
+                            help='Seconds the stub server takes to respond')
+        parser.add_argument('--concurrency', type=int, default=4)
+
+    def handle(self, **options):
+        payload = 'x' * options['payload_size']
+        print("{payloads} payloads of {payload_size} bytes, {latency}s server latency".format(**options))
+        with StubServer(latency=options['latency']) as server:
+            def send_unpooled(i):
+                simple_post(payload, server.url, timeout=POST_TIMEOUT)
+
+            session = get_endpoint_session(get_endpoint(server.url))
+
+            def send_pooled(i):
+                simple_post(payload, server.url, timeout=POST_TIMEOUT, session=session)
+
+            self._run_benchmark('one at a time, new connections', server, send_unpooled, 1, options)
+            self._run_benchmark('one at a time, pooled', server, send_pooled, 1, options)
+            self._run_benchmark('{} at a time, pooled'.format(options['concurrency']),
+                                server, send_pooled, options['concurrency'], options)
+
+    def _run_benchmark(self, name, server, send, concurrency, options):
+        server.connections.clear()
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(send, range(options['payloads'])))
+        elapsed = time.time() - start
+        print("{:<35} {:6.2f}s ({:.0f} payloads/sec, {} connections)".format(
+            name, elapsed, options['payloads'] / elapsed, len(server.connections)
+        ))
@@ -293,16 +293,17 @@ class Repeater(QuickCachedDocumentMixin, Document):
     def verify(self):
         return not self.skip_cert_verify
 
-    def send_request(self, repeat_record, payload):
+    def send_request(self, repeat_record, payload, session=None):
         headers = self.get_headers(repeat_record)
         auth = self.get_auth()
         url = self.get_url(repeat_record)
-        return simple_post(payload, url, headers=headers, timeout=POST_TIMEOUT, auth=auth, verify=self.verify)
+        return simple_post(payload, url, headers=headers, timeout=POST_TIMEOUT, auth=auth, verify=self.verify,
+                           session=session)
 
-    def fire_for_record(self, repeat_record):
+    def fire_for_record(self, repeat_record, session=None):
         payload = self.get_payload(repeat_record)
         try:
-            response = self.send_request(repeat_record, payload)
+            response = self.send_request(repeat_record, payload, session=session)
         except (Timeout, ConnectionError) as error:
             log_repeater_timeout_in_datadog(self.domain)
             return self.handle_response(RequestConnectionError(error), repeat_record)
@@ -702,11 +703,16 @@ class RepeatRecord(Document):
             succeeded=False,
         )
 
-    def fire(self, force_send=False):
+    def fire(self, force_send=False, session=None, save=True):
+        """
+        :param session: requests.Session to send the payload with
+        :param save: pass False to leave saving the record to the caller,
+            e.g. to save the records of a batch together
+        """
         if self.try_now() or force_send:
             self.overall_tries += 1
             try:
-                attempt = self.repeater.fire_for_record(self)
+                attempt = self.repeater.fire_for_record(self, session=session)
             except Exception as e:
                 log_repeater_error_in_datadog(self.domain, status_code=None,
                                               repeater_type=self.repeater_type)
@@ -717,7 +723,8 @@ class RepeatRecord(Document):
                 # that'll only happen if fire_for_record raise a non-Exception exception (e.g. SIGINT)
                 # or handle_payload_exception raises an exception. I'm okay with that. -DMR
                 self.add_attempt(attempt)
-                self.save()
+                if save:
+                    self.save()
 
     @staticmethod
     def _format_response(response):
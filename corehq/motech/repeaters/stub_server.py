@@ -0,0 +1,81 @@
+"""
+A local HTTP server that accepts repeater payloads, for testing and
+benchmarking how repeat records are sent.
+"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.socketserver import ThreadingMixIn, TCPServer
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    # keep connections alive between requests
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server.stub
+        if server.latency:
+            time.sleep(server.latency)
+        server.record_request(self.client_address, body)
+        response = b'OK'
+        self.send_response(server.status_code)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingTCPServer(ThreadingMixIn, TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class StubServer(object):
+    """
+    Usage:
+
+        with StubServer(latency=0.05) as server:
+            requests.post(server.url, data)
+        server.requests  # bodies of the requests received
+        server.connections  # distinct client connections used
+    """
+
+    def __init__(self, status_code=200, latency=0):
+        self.status_code = status_code
+        self.latency = latency
+        self.requests = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://{}:{}/'.format(host, port)
+
+    def record_request(self, client_address, body):
+        with self._lock:
+            self.requests.append(body)
+            self.connections.add(client_address)
+
+    def __enter__(self):
+        self._server = _ThreadingTCPServer(('127.0.0.1', 0), _StubRequestHandler)
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
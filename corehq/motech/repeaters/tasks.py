@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from celery.schedules import crontab
@@ -11,13 +12,17 @@ from django.conf import settings
 from corehq.motech.repeaters.const import (
     CHECK_REPEATERS_INTERVAL,
     CHECK_REPEATERS_KEY,
-    RECORD_PENDING_STATE,
-    RECORD_FAILURE_STATE,
+    DISPATCH_BATCH_SIZE,
 )
 from corehq.motech.repeaters.dbaccessors import (
     iterate_repeat_records,
     get_overdue_repeat_record_count,
 )
+from corehq.motech.repeaters.dispatch import (
+    claim_repeat_records,
+    dispatch_repeat_records,
+    prepare_repeat_record,
+)
 from corehq.util.datadog.gauges import (
     datadog_bucket_timer,
     datadog_counter,
@@ -26,7 +31,6 @@ from corehq.util.datadog.gauges import (
 from corehq.util.datadog.utils import make_buckets_from_timedeltas
 from corehq.util.soft_assert import soft_assert
 from dimagi.utils.couch import get_redis_lock
-from dimagi.utils.couch.undo import DELETED_SUFFIX
 
 
 _check_repeaters_buckets = make_buckets_from_timedeltas(
@@ -66,50 +70,48 @@ def check_repeaters():
             tags=[],
             timing_buckets=_check_repeaters_buckets,
         ):
+            records_by_repeater = defaultdict(list)
             for record in iterate_repeat_records(start):
                 if datetime.utcnow() > six_hours_later:
                     _soft_assert(False, "I've been iterating repeat records for six hours. I quit!")
                     break
                 datadog_counter("commcare.repeaters.check.attempt_forward")
-                record.attempt_forward_now()
+                if settings.REPEATERS_BATCH_DISPATCH:
+                    batch = records_by_repeater[record.repeater_id]
+                    batch.append(record)
+                    if len(batch) >= DISPATCH_BATCH_SIZE:
+                        enqueue_repeat_records(records_by_repeater.pop(record.repeater_id))
+                else:
+                    record.attempt_forward_now()
+            for batch in records_by_repeater.values():
+                enqueue_repeat_records(batch)
     finally:
         check_repeater_lock.release()
 
 
-@task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
-def process_repeat_record(repeat_record):
-    if (
-        repeat_record.state == RECORD_FAILURE_STATE and
-        repeat_record.overall_tries >= repeat_record.max_possible_tries
-    ):
-        repeat_record.cancel()
-        repeat_record.save()
-        return
-    if repeat_record.cancelled:
-        return
+def enqueue_repeat_records(repeat_records):
+    """
+    Queues a task to send the repeat records of one repeater that are due
+    """
+    repeat_records = claim_repeat_records(repeat_records)
+    if repeat_records:
+        process_repeat_records.delay(repeat_records)
 
-    repeater = repeat_record.repeater
-    if not repeater:
-        repeat_record.cancel()
-        repeat_record.save()
-        return
 
+@task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
+def process_repeat_record(repeat_record):
     try:
-        if repeater.paused:
-            # postpone repeat record by 1 day so that these don't get picked in each cycle and
-            # thus clogging the queue with repeat records with paused repeater
-            repeat_record.postpone_by(timedelta(days=1))
-            return
-        if repeater.doc_type.endswith(DELETED_SUFFIX):
-            if not repeat_record.doc_type.endswith(DELETED_SUFFIX):
-                repeat_record.doc_type += DELETED_SUFFIX
-                repeat_record.save()
-        elif repeat_record.state == RECORD_PENDING_STATE or repeat_record.state == RECORD_FAILURE_STATE:
-                repeat_record.fire()
+        if prepare_repeat_record(repeat_record):
+            repeat_record.fire()
     except Exception:
         logging.exception('Failed to process repeat record: {}'.format(repeat_record._id))
 
 
+@task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
+def process_repeat_records(repeat_records):
+    dispatch_repeat_records(repeat_records)
+
+
 repeaters_overdue = datadog_gauge_task(
     'commcare.repeaters.overdue',
     get_overdue_repeat_record_count,
@@ -6,6 +6,7 @@ import uuid
 from collections import namedtuple
 from datetime import datetime, timedelta
 
+from django.core.cache import cache
 from django.test import override_settings, TestCase
 from mock import patch
 
@@ -21,6 +22,12 @@ from corehq.form_processor.interfaces.dbaccessors import CaseAccessors, FormAcce
 from corehq.form_processor.tests.utils import run_with_all_backends, FormProcessorTestUtils
 from corehq.motech.repeaters.const import MIN_RETRY_WAIT, POST_TIMEOUT, RECORD_SUCCESS_STATE
 from corehq.motech.repeaters.dbaccessors import delete_all_repeat_records, delete_all_repeaters
+from corehq.motech.repeaters.dispatch import (
+    _get_backoff_key,
+    claim_repeat_records,
+    dispatch_repeat_records,
+    get_endpoint,
+)
 from corehq.motech.repeaters.models import (
     CaseRepeater,
     FormRepeater,
@@ -34,6 +41,7 @@ from corehq.motech.repeaters.repeater_generators import (
     RegisterGenerator,
     BasePayloadGenerator,
 )
+from corehq.motech.repeaters.stub_server import StubServer
 from corehq.motech.repeaters.tasks import check_repeaters, process_repeat_record
 from couchforms.const import DEVICE_LOG_XMLNS
 from dimagi.utils.parsing import json_format_datetime
@@ -595,6 +603,75 @@ class RepeaterFailureTest(BaseRepeaterTest):
         self.assertTrue(repeat_record.succeeded)
 
 
+class RepeaterDispatchTest(BaseRepeaterTest):
+
+    def setUp(self):
+        super(RepeaterDispatchTest, self).setUp()
+        self.domain_name = "test-domain"
+        self.domain = create_domain(self.domain_name)
+        self.server = StubServer().__enter__()
+        self.repeater = CaseRepeater(
+            domain=self.domain_name,
+            url=self.server.url,
+        )
+        self.repeater.save()
+        with patch('corehq.motech.repeaters.models.simple_post'):
+            self.post_xml(self.xform_xml, self.domain_name)
+        delete_all_repeat_records()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        cache.delete(_get_backoff_key(get_endpoint(self.server.url)))
+        self.domain.delete()
+        self.repeater.delete()
+        delete_all_repeat_records()
+        super(RepeaterDispatchTest, self).tearDown()
+
+    def register_records(self, count):
+        case = CaseAccessors(self.domain_name).get_case(CASE_ID)
+        next_check = datetime.utcnow() - timedelta(minutes=1)
+        return [self.repeater.register(case, next_check=next_check) for i in range(count)]
+
+    @run_with_all_backends
+    def test_dispatch(self):
+        repeat_records = claim_repeat_records(self.register_records(6))
+        self.assertEqual(len(repeat_records), 6)
+        # claimed records aren't claimed again
+        self.assertEqual(claim_repeat_records([RepeatRecord.get(r._id) for r in repeat_records]), [])
+
+        with override_settings(REPEATERS_DISPATCH_CONCURRENCY=2):
+            dispatch_repeat_records(repeat_records)
+
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertLessEqual(len(self.server.connections), 2)
+        for repeat_record in repeat_records:
+            repeat_record = RepeatRecord.get(repeat_record._id)
+            self.assertEqual(repeat_record.state, RECORD_SUCCESS_STATE)
+            self.assertEqual(repeat_record.overall_tries, 1)
+
+    @run_with_all_backends
+    def test_endpoint_backoff(self):
+        self.server.status_code = 500
+        repeat_records = claim_repeat_records(self.register_records(5))
+
+        with override_settings(REPEATERS_DISPATCH_CONCURRENCY=1):
+            dispatch_repeat_records(repeat_records)
+
+        # the endpoint is backed off after three failures in a row
+        self.assertEqual(len(self.server.requests), 3)
+        repeat_records = [RepeatRecord.get(r._id) for r in repeat_records]
+        backoff_until = repeat_records[2].next_check
+        self.assertGreater(backoff_until, datetime.utcnow())
+        self.assertEqual([r.overall_tries for r in repeat_records], [1, 1, 1, 0, 0])
+        self.assertEqual([r.next_check for r in repeat_records[3:]], [backoff_until, backoff_until])
+
+        # and other records for the endpoint are postponed without being sent
+        repeat_records = claim_repeat_records(self.register_records(1))
+        dispatch_repeat_records(repeat_records)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(RepeatRecord.get(repeat_records[0]._id).next_check, backoff_until)
+
+
 class IgnoreDocumentTest(BaseRepeaterTest):
 
     @classmethod
@@ -424,6 +424,13 @@ APP_BUILDER_SHADOW_MODULES = StaticToggle(
     help_link='https://confluence.dimagi.com/display/ccinternal/Shadow+Modules',
 )
 
+INCREMENTAL_APP_BUILDS = StaticToggle(
+    'incremental_app_builds',
+    'Reuse form files from the previous build when their inputs have not changed',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
 CASE_LIST_CUSTOM_XML = StaticToggle(
     'case_list_custom_xml',
     'Allow custom XML to define case lists (ex. for case tiles)',
@@ -612,6 +619,13 @@ HIERARCHICAL_LOCATION_FIXTURE = StaticToggle(
     ),
 )
 
+LOCATION_FIXTURE_CACHE = StaticToggle(
+    'location_fixture_cache',
+    'Share rendered location fixtures between users who sync the same locations',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
 EXTENSION_CASES_SYNC_ENABLED = StaticToggle(
     'extension_sync',
     'Enikshay/L10K: Enable extension syncing',
@@ -672,6 +686,20 @@ LIVEQUERY_SYNC = StaticToggle(
     namespaces=[NAMESPACE_DOMAIN]
 )
 
+LIVEQUERY_PARALLEL_FETCH = StaticToggle(
+    'livequery_parallel_fetch',
+    'Fetch case indices and cases from all shards concurrently in livequery sync',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN]
+)
+
+RESTORE_CASE_XML_CACHE = StaticToggle(
+    'restore_case_xml_cache',
+    'Share serialized case XML between OTA restores',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN]
+)
+
 NO_VELLUM = StaticToggle(
     'no_vellum',
     'Allow disabling Form Builder per form '
@@ -1305,6 +1333,13 @@ USER_TESTING_SIMPLIFY = StaticToggle(
     [NAMESPACE_DOMAIN]
 )
 
+SET_BASED_CASE_UPDATE_RULES = StaticToggle(
+    'set_based_case_update_rules',
+    'Filter cases for automatic case update rules in SQL and update matching cases in batches',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
 # when enabled this should prevent any changes to a domains data
 DATA_MIGRATION = StaticToggle(
     'data_migration',
@@ -1,6 +1,10 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 import six
 from django.core.cache import cache
 
@@ -72,3 +76,59 @@ def get_exponential(rate_limit_key, exponential_base=2):
 
 def clear_limit(rate_limit_key):
     ExponentialCache.delete_key(rate_limit_key)
+
+
+class SizedLRUCache(object):
+    """ SizedLRUCache is an in-process, thread-safe LRU cache bounded by the total size of its values
+
+    Each value is set with its size, in whatever unit `max_size` is given in. When the total
+    exceeds `max_size`, the least recently used values are evicted. Values older than
+    `timeout` seconds are treated as missing.
+    """
+
+    def __init__(self, max_size, timeout=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (value, size, expires)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, size, expires = self._entries.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires < time.time():
+                self.size -= size
+                return default
+            self._entries[key] = (value, size, expires)
+            return value
+
+    def set(self, key, value, size):
+        if size > self.max_size:
+            return
+        expires = time.time() + self.timeout if self.timeout is not None else None
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (value, size, expires)
+            self.size += size
+            while self.size > self.max_size:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
@@ -2,7 +2,8 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 from django.test import SimpleTestCase
 from django.core.cache import cache
-from corehq.util.cache_utils import ExponentialBackoff
+from mock import patch
+from corehq.util.cache_utils import ExponentialBackoff, SizedLRUCache
 
 
 class TestExponentialBackoff(SimpleTestCase):
@@ -32,3 +33,43 @@ class TestExponentialBackoff(SimpleTestCase):
         key = None
         ExponentialBackoff.increment(key)  # first incr is 1
         self.assertFalse(ExponentialBackoff.should_backoff(key))
+
+
+class TestSizedLRUCache(SimpleTestCase):
+
+    def test_get_set(self):
+        lru = SizedLRUCache(max_size=10)
+        self.assertIsNone(lru.get('a'))
+        lru.set('a', 'value', 3)
+        self.assertEqual(lru.get('a'), 'value')
+        lru.set('a', 'new value', 4)
+        self.assertEqual(lru.get('a'), 'new value')
+        self.assertEqual(lru.size, 4)
+
+    def test_evicts_least_recently_used(self):
+        lru = SizedLRUCache(max_size=10)
+        lru.set('a', 'a', 4)
+        lru.set('b', 'b', 4)
+        lru.get('a')
+        lru.set('c', 'c', 4)
+        self.assertEqual(lru.get('a'), 'a')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 'c')
+        self.assertEqual(lru.size, 8)
+
+    def test_value_larger_than_max_size(self):
+        lru = SizedLRUCache(max_size=10)
+        lru.set('a', 'a', 4)
+        lru.set('b', 'b', 11)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 'a')
+
+    def test_timeout(self):
+        lru = SizedLRUCache(max_size=10, timeout=60)
+        with patch('corehq.util.cache_utils.time.time', return_value=1000):
+            lru.set('a', 'a', 4)
+        with patch('corehq.util.cache_utils.time.time', return_value=1059):
+            self.assertEqual(lru.get('a'), 'a')
+        with patch('corehq.util.cache_utils.time.time', return_value=1061):
+            self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.size, 0)
@@ -17,6 +17,7 @@ class NestableTimer(object):
         self.beginning = None
         self.end = None
         self.subs = []
+        self.counts = {}
         self.root = self if is_root else None
         self.parent = None
         self.uuid = uuid.uuid4()
@@ -154,6 +155,11 @@ class TimingContext(object):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.stop(self.peek().name)
 
+    def add_count(self, name, value=1):
+        """Add to a named count (e.g. cache hits) on the current timer"""
+        counts = self.peek().counts
+        counts[name] = counts.get(name, 0) + value
+
     def to_dict(self):
         """Get timing data as a recursive dictionary of the format:
         {
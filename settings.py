@@ -154,6 +154,7 @@ MIDDLEWARE = [
     'auditcare.middleware.AuditMiddleware',
     'no_exceptions.middleware.NoExceptionsMiddleware',
     'corehq.apps.locations.middleware.LocationAccessMiddleware',
+    'corehq.apps.change_feed.middleware.BatchedChangePublishingMiddleware',
 ]
 
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
@@ -616,6 +617,14 @@ SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL = 15
 # messages will not be processed.
 SMS_QUEUE_STALE_MESSAGE_DURATION = 7 * 24
 
+# Max number of queued SMS that run_sms_queue --claim will claim and
+# enqueue in a single transaction
+SMS_QUEUE_DISPATCH_BATCH_SIZE = 500
+
+# Max number of seconds run_sms_queue --claim will wait before checking
+# the queue again when no SMS is due sooner than that
+SMS_QUEUE_DISPATCH_MAX_WAIT = 10
+
 
 ####### Reminders Queue Settings #######
 
@@ -709,6 +718,20 @@ LOCAL_PILLOWTOPS = {}
 # Set to None to enable all or empty tuple to disable all.
 REPEATERS_WHITELIST = None
 
+# Send due repeat records in batches per repeater, over pooled keep-alive
+# connections, instead of spawning one task per repeat record
+REPEATERS_BATCH_DISPATCH = False
+
+# Max number of concurrent requests to the endpoint of a repeater
+REPEATERS_DISPATCH_CONCURRENCY = 4
+
+# Max number of media files fetched at once while building a CCZ
+CCZ_MEDIA_FETCH_CONCURRENCY = 8
+
+# Max total size, in bytes of JSON, of the app builds that each process keeps
+# in memory for phone API calls
+APP_BUILD_CACHE_MAX_SIZE = 50 * 1024 * 1024
+
 # If ENABLE_PRELOGIN_SITE is set to true, redirect to Dimagi.com urls
 ENABLE_PRELOGIN_SITE = False
 
@@ -842,6 +865,13 @@ ICDS_SMS_INDICATOR_DOMAINS = []
 
 KAFKA_BROKERS = ['localhost:9092']
 KAFKA_API_VERSION = None
+# Changes published in a batch (see ChangeProducer.batched) are sent after
+# waiting up to KAFKA_PRODUCER_LINGER_MS for more changes to send with them
+KAFKA_PRODUCER_LINGER_MS = 20
+KAFKA_PRODUCER_BATCH_SIZE = 16384
+# seconds to wait for a batch of changes to be delivered before queuing the
+# remaining changes in pillow_retry
+KAFKA_PRODUCER_FLUSH_TIMEOUT = 10
 
 MOBILE_INTEGRATION_TEST_TOKEN = None
 
@@ -33,6 +33,7 @@ class SharedDriveConfiguration(object):
         self.temp_dir = self._init_dir(temp_dir)
         self.blob_dir = self._init_dir(blob_dir)
         self.tzmigration_planning_dir = self._init_dir('tzmigration-planning')
+        self.ccz_media_cache_dir = self._init_dir('ccz-media-cache')
 
     def _init_dir(self, name):
         if not self.shared_drive_path or not os.path.isdir(self.shared_drive_path) or not name: